@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 import os
+import time
+import socket
 import ctypes
 from ctypes import wintypes
 from datetime import datetime, timedelta
@@ -24,6 +26,8 @@ from constants import (
     NIIF_ERROR,
     TIMER_MAIN,
     WM_COMMAND,
+    WM_WORKER_DONE,
+    WM_USER_ACTIVE,
     MID_ONCE_NO_REMIND,
     MID_ONCE_NO_HIBERNATE,
     MID_RESET_ONCE,
@@ -54,14 +58,20 @@ from core import (
     APPDATA_DIR,
     ensure_single_instance,
     log_error,
+    log_stats,
     resource_path,
+    CONFIG_PATH,
     load_config,
+    read_config_text,
+    parse_config_text,
+    config_write_pending,
+    is_own_config_text,
     save_config,
-    DEFAULT_REMIND_TEMPLATE,
-    get_idle_seconds,
-    get_uptime_seconds,
-    is_online_two_level,
-    pushplus_send,
+    flush_config,
+    mark_config_synced,
+    use_config_scheduler,
+    Config,
+    get_backend,
     build_expected_shortcut_spec,
     read_startup_shortcut_spec,
     create_startup_shortcut,
@@ -86,6 +96,25 @@ from ui import (
     _settings_wndproc,
     _countdown_wndproc,
 )
+from worker import BackgroundWorker
+from connectivity import ConnectivityOracle
+from dnscache import get_resolver
+from prewarm import Prewarmer
+from scheduler import Scheduler
+from outbox import Outbox, OutboxDispatcher, MemoryOutbox
+from notify import Notifier, reached_network, deferred_only
+from digest import Digest, merge_messages
+from template import TemplateContext, BASE_INFO, local_ip, format_battery
+from journal import (
+    ActivityJournal,
+    JournalSampler,
+    OUTCOME_REMIND_OK,
+    OUTCOME_REMIND_FAIL,
+    OUTCOME_COUNTDOWN,
+    OUTCOME_HIBERNATE,
+    OUTCOME_RESUME,
+    OUTCOME_OFFLINE,
+)
 
 # -----------------------------
 # App
@@ -93,9 +122,25 @@ from ui import (
 class App:
     MAIN_CLASS = "AutoShutdown_HiddenMain"
 
-    def __init__(self):
-        self.cfg = load_config()
+    def __init__(self, cfg: dict = None, backend=None, worker=None):
+        # backend 可注入（如 FakeBackend），使调度与策略逻辑脱离 Win32 运行
+        self.backend = backend or get_backend()
         self.hwnd = None
+        # 所有定时任务（主检查、恢复宽限、提醒重发、倒计时、配置监视、合并窗口、预热、配置保存）共用一个系统定时器
+        self.scheduler = Scheduler(
+            self.backend.monotonic,
+            lambda ms: self.backend.set_timer(self.hwnd, TIMER_MAIN, ms),
+            lambda: self.backend.kill_timer(self.hwnd, TIMER_MAIN),
+        )
+        self.cfg = None
+        # 只读配置视图，配置变化时整体替换：后台线程（发送、探测、重发调度器）直接读取
+        self.conf = None
+        # 联网判断缓存（TTL 内重复触发不做网络 I/O）
+        self.connectivity = ConnectivityOracle(clock=self.backend.monotonic)
+        # 用户输入事件源（start_input_events() 中创建），只在等待用户回来期间 arm
+        self.input_source = None
+        self._input_armed_at = None
+        self.set_cfg(load_config() if cfg is None else cfg)
         self.nid = None
         self.menu = None
         self.hicon = None
@@ -110,12 +155,260 @@ class App:
         
         # 添加新属性来跟踪联网提醒状态
         self.online_remind_count = 0
+        # 以下两项为单调时钟秒数，不受系统时间调整影响
+        self.last_online_remind_time = None
+        self.resume_grace_until = float("-inf")
+
+        # 联网检测与消息发送在后台线程执行，结果经 WM_WORKER_DONE 回投到主窗口
+        self.worker = worker or BackgroundWorker(self._post_worker_done,
+                                                 low_priority_init=self.backend.lower_thread_priority)
+
+        # 活动日志（内存映射环形文件），在 start_journal() 中打开
+        self.journal = None
+        self.journal_sampler = None
+        self.last_online = None
+
+        # 待发送通知的持久化队列与后台重发（attach_outbox() 中创建）；打开之前的提醒先记在内存队列中
+        self.outbox = None
+        self.outbox_dispatcher = None
+        self.early_outbox = MemoryOutbox()
+        self.send_fail_streak = 0
+        # 多通道并发投递（pushplus / webhook / SMTP / 本地管道）
+        self.notifier = Notifier()
+        self.last_notify = None
+        # 合并窗口（digest_window_sec > 0 时启用）内缓存的提醒
+        self.digest = Digest()
+        # 预计触发前预先解析域名、刷新联网判断并建立通知连接
+        self.prewarmer = Prewarmer(self.connectivity, self.notifier, ready=self._prewarm_ready)
+
+        # config.json 外部修改监视（Windows 为 stat 检查，Linux 为 inotify）
+        self.config_watcher = None
+        # 检测到变化时自己的写入尚未落盘：下一次检查时重新判断
+        self._config_recheck = False
+
+    def set_cfg(self, cfg: dict):
+        # 配置 dict 是持久化的原始数据；Config 为校验后的只读视图，仅在配置变化时重建
+        self.cfg = cfg
+        self.conf = Config(cfg)
+        self.connectivity.ttl_sec = self.conf.net_cache_ttl_sec
+        get_resolver().configure(ttl_sec=self.conf.dns_cache_ttl_sec,
+                                 negative_ttl_sec=self.conf.dns_negative_ttl_sec)
+        if getattr(self, "outbox_dispatcher", None):
+            self.outbox_dispatcher.merge = self._outbox_merge()
+        if self.input_source is not None and not self.conf.input_events_enabled:
+            self.input_source.disarm()
+
+    def _outbox_merge(self):
+        return merge_messages if self.conf.digest_window_sec > 0 else None
+
+    def update_cfg(self, **changes):
+        self.cfg.update(changes)
+        self.conf = Config(self.cfg)
+        self.persist_config()
+
+    def start_config_watch(self):
+        if self.conf.config_watch_sec <= 0:
+            self.scheduler.cancel("config_watch")
+            return
+        try:
+            if self.config_watcher is None:
+                self.config_watcher = self.backend.watch_file(CONFIG_PATH)
+            self.scheduler.schedule("config_watch", self.conf.config_watch_sec, self.check_config_changed,
+                                    period=self.conf.config_watch_sec)
+        except Exception as e:
+            log_error(e)
+
+    def check_config_changed(self):
+        # 未变化时只有一次 stat / 非阻塞 read，不解析 JSON
+        if self.config_watcher is None:
+            return
+        if not self.config_watcher.poll() and not self._config_recheck:
+            return
+        if config_write_pending():
+            # 磁盘上是自己尚未覆盖的旧版本，与内存不同并不代表外部修改
+            self._config_recheck = True
+            return
+        self._config_recheck = False
+        try:
+            text = read_config_text()
+            if is_own_config_text(text):
+                # 自己保存引起的变化
+                return
+            cfg = parse_config_text(text)
+        except Exception as e:
+            # 外部工具写入未完成或内容无效：保留当前配置，等下一次变化
+            log_error(e)
+            return
+        if cfg == self.cfg:
+            return
+        watch_sec = self.conf.config_watch_sec
+        mark_config_synced(cfg)
+        self.set_cfg(cfg)
+        self.apply_main_timer()
+        if self.conf.config_watch_sec != watch_sec:
+            self.start_config_watch()
+        self.tray_info("AutoShutdown", "检测到配置文件更新，已重新加载。", NIIF_INFO)
+
+    def open_outbox(self):
+        """后台线程调用：读取 outbox.log；由 UI 线程的 attach_outbox() 接管。"""
+        try:
+            return Outbox()
+        except Exception as e:
+            log_error(e)
+            return None
+
+    def attach_outbox(self, outbox):
+        if outbox is None:
+            return
+        try:
+            dispatcher = OutboxDispatcher(
+                outbox,
+                lambda title, content, channels: self.send_message(self.conf, title, content, channels),
+                online_check=lambda: self.connectivity.check(self.conf),
+                merge=self._outbox_merge(),
+            )
+        except Exception as e:
+            log_error(e)
+            return
+        self.outbox = outbox
+        self.outbox_dispatcher = dispatcher
+        moved = self.early_outbox.transfer(outbox)
+        if moved:
+            log_stats("outbox_early", count=moved)
+        dispatcher.start()
+
+    def settle_outbox(self, msg, result):
+        """按一次发送结果更新队列中的消息（msg 为 outbox_add() 的返回值），并唤醒重发调度器。"""
+        if msg is not None:
+            box, msg_id = msg
+            box.settle(msg_id, result)
+        self.kick_outbox()
+
+    def kick_outbox(self):
+        # 新的失败消息的重试时间可能早于调度器当前的等待：唤醒后重新计算
+        if self.outbox_dispatcher:
+            self.outbox_dispatcher.kick()
+
+    def outbox_add(self, title: str, content: str):
+        """先落盘再发送，返回 (队列, id)；重发队列尚未打开时先记在内存队列中，打开后转入。"""
+        box = self.outbox if self.outbox is not None else self.early_outbox
+        return box, box.add(title, content)
+
+    def open_journal(self):
+        """后台线程调用：打开（必要时创建）activity.bin；由 UI 线程的 attach_journal() 接管。"""
+        if not self.conf.journal_enabled:
+            return None
+        try:
+            return ActivityJournal(capacity=self.conf.journal_capacity)
+        except Exception as e:
+            log_error(e)
+            return None
+
+    def attach_journal(self, journal):
+        if journal is None:
+            return
+        try:
+            sampler = JournalSampler(
+                journal,
+                self.backend,
+                interval_sec=self.conf.journal_sample_sec,
+                online_getter=lambda: -1 if self.last_online is None else int(self.last_online),
+            )
+            sampler.start()
+        except Exception as e:
+            log_error(e)
+            journal.close()
+            return
+        self.journal = journal
+        self.journal_sampler = sampler
+
+    def stop_journal(self):
+        stopped = True
+        if self.journal_sampler:
+            stopped = self.journal_sampler.stop()
+            self.journal_sampler = None
+        if self.journal:
+            if stopped:
+                self.journal.close()
+            else:
+                # 采样线程仍在写入映射区：不关闭，随进程退出释放
+                log_stats("journal_stop_timeout")
+            self.journal = None
+
+    def record_outcome(self, outcome: int):
+        if self.journal is None:
+            return
+        try:
+            online = -1 if self.last_online is None else int(self.last_online)
+            self.journal.append(self.backend.idle_seconds(), self.backend.uptime_seconds(), online, outcome,
+                                ts=self.backend.now().timestamp())
+        except Exception as e:
+            log_error(e)
+
+    def start_input_events(self):
+        try:
+            self.input_source = self.backend.input_source()
+            self.input_source.start(self.hwnd, self._on_input_event)
+        except Exception as e:
+            log_error(e)
+            self.input_source = None
+
+    def arm_input_events(self):
+        """用户已离开：开始监听输入，回来时由 on_user_active 立即处理，无需等到下一次检查。"""
+        if self.input_source is None or not self.conf.input_events_enabled:
+            return
+        if self.input_source.arm():
+            self._input_armed_at = self.backend.monotonic()
+
+    def _on_input_event(self, source: str):
+        # 后台线程中的事件源投递回 UI 线程处理
+        if self.input_source is not None and self.input_source.threaded and self.hwnd:
+            user32.PostMessageW(self.hwnd, WM_USER_ACTIVE, WPARAM_T(0), LPARAM_T(0))
+            return
+        self.on_user_active(source)
+
+    def on_input_message(self, msg: int, wparam: int):
+        if self.input_source is not None:
+            self.input_source.on_message(msg, wparam)
+
+    def on_user_active(self, source: str = ""):
+        """用户回到电脑前：取消倒计时、清零提醒计数，并按新的空闲时长重新安排检查。"""
+        armed_at, self._input_armed_at = self._input_armed_at, None
+        away = None if armed_at is None else round(self.backend.monotonic() - armed_at, 1)
+        self._online_ok_count = 0
+        self.online_remind_count = 0
         self.last_online_remind_time = None
-        self.resume_grace_until = datetime.min
+        cancelled = self.active_dialog is not None
+        if cancelled:
+            self.active_dialog.on_cancel()
+        log_stats("user_active", source=source or getattr(self.input_source, "name", ""),
+                  away_sec=away, countdown_cancelled=cancelled)
+        self.backend.invalidate_idle()
+        if self.journal_sampler:
+            self.journal_sampler.kick()
+        self.apply_main_timer()
+
+    def _post_worker_done(self):
+        if self.hwnd:
+            user32.PostMessageW(self.hwnd, WM_WORKER_DONE, WPARAM_T(0), LPARAM_T(0))
+
+    def on_worker_done(self):
+        self.worker.drain()
+
+    def on_timer(self):
+        """系统定时器触发：执行所有到期的定时任务。"""
+        self.scheduler.run_due()
+
+    def _on_main_deadline(self):
+        # 倒计时窗口打开期间不做检查，只顺延
+        if self.active_dialog is not None:
+            self.apply_main_timer()
+            return
+        self.tick()
 
     def tray_info(self, title: str, msg: str, level=NIIF_INFO):
         try:
-            if not bool(self.cfg.get("tray_balloon_enabled", False)):
+            if not self.conf.tray_balloon_enabled:
                 return
             tray_balloon(self.nid, title, msg, level=level, timeout_ms=5000)
         except Exception as e:
@@ -169,8 +462,8 @@ class App:
             user32.CheckMenuItem(self.menu, mid, MF_BYCOMMAND | (MF_CHECKED if on else MF_UNCHECKED))
         check(MID_ONCE_NO_REMIND, self.suppress_once_remind)
         check(MID_ONCE_NO_HIBERNATE, self.suppress_once_hibernate)
-        check(MID_AUTOSTART, bool(self.cfg.get("autostart_enabled", False)))
-        check(MID_TRAY_BALLOON, bool(self.cfg.get("tray_balloon_enabled", False)))
+        check(MID_AUTOSTART, self.conf.autostart_enabled)
+        check(MID_TRAY_BALLOON, self.conf.tray_balloon_enabled)
 
     def show_menu(self):
         self._update_menu_checks()
@@ -186,48 +479,40 @@ class App:
             user32.PostMessageW(self.hwnd, WM_COMMAND, WPARAM_T(cmd), LPARAM_T(0))
 
     def apply_main_timer(self):
+        sched = self.scheduler
         try:
             # 获取当前空闲时间和阈值
-            idle_seconds = get_idle_seconds()
-            idle_threshold_minutes = int(self.cfg.get("idle_minutes", 60))
-            idle_threshold_seconds = idle_threshold_minutes * 60
-
-            remind_times = 0
-            try:
-                remind_times = int(self.cfg.get("online_remind_times", 0))
-            except Exception:
-                remind_times = 0
-            remind_times = 0 if remind_times < 0 else remind_times
+            idle_seconds = self.backend.idle_seconds()
+            idle_threshold_seconds = self.conf.idle_sec
+            remind_times = self.conf.online_remind_times
+            now = self.backend.monotonic()
 
-            if (remind_times > 0 and self.online_remind_count > 0 and self.last_online_remind_time
+            if (remind_times > 0 and self.online_remind_count > 0 and self.last_online_remind_time is not None
                     and self.online_remind_count < remind_times):
-                target = self.last_online_remind_time + timedelta(seconds=idle_threshold_seconds)
-                remaining = int((target - datetime.now()).total_seconds())
-                interval = remaining if remaining > 0 else 1
+                # 提醒重发：距上次提醒满一个空闲阈值时再检查
+                deadline = max(now + 1, self.last_online_remind_time + idle_threshold_seconds)
+                sched.cancel("main")
+                sched.schedule_at("remind", deadline, self._on_main_deadline)
             else:
                 if idle_seconds < idle_threshold_seconds:
                     interval = max(1, idle_threshold_seconds - idle_seconds)
                 else:
                     # 已达到阈值，避免 1 秒内重复触发，按阈值间隔检查
                     interval = max(1, idle_threshold_seconds)
+                sched.cancel("remind")
+                sched.schedule("main", interval, self._on_main_deadline)
+                deadline = now + interval
 
-            now = datetime.now()
+            # 恢复宽限期结束时立即检查一次
             if self.resume_grace_until > now:
-                grace_remaining = int((self.resume_grace_until - now).total_seconds())
-                if grace_remaining > 0:
-                    interval = min(interval, grace_remaining)
-            interval = max(1, interval)
-            
-            user32.KillTimer(self.hwnd, UINT_PTR_T(TIMER_MAIN))
-            user32.SetTimer(self.hwnd, UINT_PTR_T(TIMER_MAIN), interval * 1000, None)
-            
-            # 添加调试信息，打印下一次检查的时间
-            next_check = now + timedelta(seconds=interval)
-            # print(f"[DEBUG] 当前空闲秒数: {idle_seconds}, 阈值: {idle_threshold_seconds}")
-            # print(f"[DEBUG] 下次检查间隔: {interval} 秒, 预计检查时间: {next_check.strftime('%Y-%m-%d %H:%M:%S')}")
+                sched.schedule_at("grace", self.resume_grace_until, self._on_main_deadline)
+            else:
+                sched.cancel("grace")
+
+            self.prewarm(deadline)
         except Exception as e:
             log_error(e)
-            user32.SetTimer(self.hwnd, UINT_PTR_T(TIMER_MAIN), 60 * 1000, None)  # 默认每分钟检查一次
+            sched.schedule("main", 60, self._on_main_deadline)  # 默认每分钟检查一次
 
     def _format_td(self, td: timedelta) -> str:
         sec = int(td.total_seconds())
@@ -250,14 +535,10 @@ class App:
         return dt.strftime("%Y-%m-%d %H:%M:%S")
 
     def _set_resume_grace(self):
-        try:
-            grace_sec = int(self.cfg.get("resume_grace_sec", 120))
-        except Exception:
-            grace_sec = 120
-        if grace_sec <= 0:
-            self.resume_grace_until = datetime.min
+        if self.conf.resume_grace_sec <= 0:
+            self.resume_grace_until = float("-inf")
             return
-        self.resume_grace_until = datetime.now() + timedelta(seconds=grace_sec)
+        self.resume_grace_until = self.backend.monotonic() + self.conf.resume_grace_sec
 
     def _maybe_show_last_hibernate_notice(self, prefix: str = ""):
         last_str = str(self.cfg.get("last_hibernate_time", "")).strip()
@@ -274,15 +555,17 @@ class App:
             msg = f"{prefix}\n{msg}"
         self.tray_info("AutoShutdown", msg, NIIF_INFO)
         self.cfg["last_hibernate_notice_time"] = last_str
-        save_config(self.cfg)
+        self.persist_config()
 
     def mark_hibernate_time(self):
         prev_time = str(self.cfg.get("last_hibernate_time", ""))
         prev_notice = str(self.cfg.get("last_hibernate_notice_time", ""))
-        ts = datetime.now().isoformat(timespec="seconds")
+        ts = self.backend.now().isoformat(timespec="seconds")
+        self.record_outcome(OUTCOME_HIBERNATE)
         self.cfg["last_hibernate_time"] = ts
         self.cfg["last_hibernate_notice_time"] = ""
-        save_config(self.cfg)
+        # 随后立即休眠，不等待合并写入
+        self.persist_config(flush=True)
         return ts, prev_time, prev_notice
 
     def revert_hibernate_time(self, ts: str, prev_time: str, prev_notice: str):
@@ -290,9 +573,12 @@ class App:
             return
         self.cfg["last_hibernate_time"] = prev_time
         self.cfg["last_hibernate_notice_time"] = prev_notice
-        save_config(self.cfg)
+        self.persist_config()
 
     def on_resume_event(self):
+        self.record_outcome(OUTCOME_RESUME)
+        # 休眠期间网络状态可能已变化
+        self.connectivity.invalidate("resume")
         self._online_ok_count = 0
         self.online_remind_count = 0
         self.last_online_remind_time = None
@@ -300,14 +586,41 @@ class App:
         self._maybe_show_last_hibernate_notice("检测到系统从休眠恢复")
         self.apply_main_timer()
 
+    def template_context(self, uptime: timedelta = None, idle: timedelta = None) -> TemplateContext:
+        """提醒模板的占位符取值；未传入的时长按当前状态计算。"""
+        backend = self.backend
+        remind_times = self.conf.online_remind_times
+        if uptime is None:
+            uptime = timedelta(seconds=backend.uptime_seconds())
+        if idle is None:
+            idle = timedelta(seconds=backend.idle_seconds())
+
+        def last_hibernate(ctx):
+            dt = self._parse_dt(str(self.cfg.get("last_hibernate_time", "")).strip())
+            return self._format_dt(dt) if dt else "无"
+
+        def remind_index(ctx):
+            n = self.online_remind_count + 1
+            return f"{n}/{remind_times}" if remind_times > 0 else str(n)
+
+        return TemplateContext({
+            "base_info": BASE_INFO.render,
+            "hostname": lambda ctx: socket.gethostname(),
+            "uptime": lambda ctx: self._format_td(uptime),
+            "idle": lambda ctx: f"{int(idle.total_seconds() / 60)} 分钟",
+            "time": lambda ctx: backend.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "ip": lambda ctx: local_ip(),
+            "battery": lambda ctx: format_battery(backend.battery_status()),
+            "last_hibernate": last_hibernate,
+            "remind_index": remind_index,
+        })
+
     def get_thresholds(self):
-        uptime_th = timedelta(hours=int(self.cfg.get("uptime_hours", 2)))
-        idle_th = timedelta(minutes=int(self.cfg.get("idle_minutes", 60)))
-        countdown = int(self.cfg.get("pre_hibernate_countdown_sec", 60))
-        return uptime_th, idle_th, countdown
+        conf = self.conf
+        return conf.uptime_th, conf.idle_th, conf.pre_hibernate_countdown_sec
 
     def should_trigger(self, uptime: timedelta, idle: timedelta) -> bool:
-        if datetime.now() < self.resume_grace_until:
+        if self.backend.monotonic() < self.resume_grace_until:
             return False
         uptime_th, idle_th, _ = self.get_thresholds()
         if uptime < uptime_th:
@@ -325,130 +638,310 @@ class App:
 
         if self.suppress_once_hibernate:
             self.tray_info("AutoShutdown", "本次已设置不关机：跳过休眠。", NIIF_INFO)
-            self.last_trigger_time = datetime.now()
+            self.last_trigger_time = self.backend.now()
             self.consume_once_flags()
             return
 
+        # 休眠前把合并窗口中的提醒发出去（失败则留在重发队列）
+        self.flush_digest()
         self.tray_info("AutoShutdown", f"{reason}：将弹出可取消休眠提示。", NIIF_WARNING)
         detail = base_info + f"\n\n{countdown} 秒后自动休眠。"
-        dlg = CountdownDialog(self.hwnd, countdown, detail, "即将进入休眠", app=self)
-        dlg.show()
-        self.active_dialog = dlg
-        self.last_trigger_time = datetime.now()
+        self.record_outcome(OUTCOME_COUNTDOWN)
+        self.active_dialog = self.show_countdown(countdown, detail)
+        self.last_trigger_time = self.backend.now()
         self.consume_once_flags()
         
+    def show_countdown(self, countdown: int, detail: str):
+        dlg = CountdownDialog(self.hwnd, countdown, detail, "即将进入休眠", app=self)
+        dlg.show()
+        return dlg
+
+    def probe_online(self, conf: Config) -> bool:
+        return self.connectivity.check(conf)
+
+    def send_message(self, conf: Config, title: str, content: str, channels=None):
+        return self.notifier.send(conf, title, content, only=channels)
+
+    def prewarm(self, deadline: float):
+        # deadline（单调时钟）为下一次检查；提前 prewarm_lead_sec 秒在后台完成 DNS / 联网判断 / 握手
+        lead = self.conf.prewarm_lead_sec
+        if lead <= 0:
+            self.scheduler.cancel("prewarm")
+            return
+        self.scheduler.schedule_at("prewarm", deadline - lead, self._start_prewarm)
+
+    def _start_prewarm(self):
+        conf = self.conf
+        self.worker.submit(lambda: self.prewarmer.prewarm(conf, conf.prewarm_lead_sec), key="prewarm")
+
+    def _prewarm_ready(self, lead_sec: float) -> bool:
+        """后台线程中调用：lead_sec 秒后仍可能触发提醒时才预热（用户回到电脑前则跳过）。"""
+        if self.suppress_once_remind:
+            return False
+        uptime_th, idle_th, _ = self.get_thresholds()
+        lead = timedelta(seconds=lead_sec)
+        return (timedelta(seconds=self.backend.uptime_seconds()) + lead >= uptime_th
+                and timedelta(seconds=self.backend.idle_seconds()) + lead >= idle_th)
+
+    def persist_config(self, flush: bool = False):
+        save_config(self.cfg)
+        if flush:
+            flush_config()
+
     def tick(self):
-        uptime = timedelta(seconds=get_uptime_seconds())
-        idle = timedelta(seconds=get_idle_seconds())
+        uptime = timedelta(seconds=self.backend.uptime_seconds())
+        idle = timedelta(seconds=self.backend.idle_seconds())
 
         # 若不满足阈值，清零"联网成功提醒计数"（用于"两次提醒后休眠"）
-        try:
-            uptime_th, idle_th, _ = self.get_thresholds()
-        except Exception:
-            uptime_th = timedelta(hours=int(self.cfg.get("uptime_hours", 2)))
-            idle_th = timedelta(minutes=int(self.cfg.get("idle_minutes", 60)))
-        try:
-            if uptime < uptime_th or idle < idle_th:
-                self._online_ok_count = 0
-                # 重置联网提醒状态
-                self.online_remind_count = 0
-                self.last_online_remind_time = None
-        except Exception:
-            pass
+        uptime_th, idle_th, _ = self.get_thresholds()
+        if uptime < uptime_th or idle < idle_th:
+            self._online_ok_count = 0
+            # 重置联网提醒状态
+            self.online_remind_count = 0
+            self.last_online_remind_time = None
 
         # 重新应用定时器 - 这样可以根据当前空闲状态调整下次检查时间
         self.apply_main_timer()
 
+        if uptime >= uptime_th and idle >= idle_th:
+            self.arm_input_events()
+
         if not self.should_trigger(uptime, idle):
             return
 
+        # 上一轮检测/发送尚未完成时不重复提交
+        if self.worker.busy("trigger"):
+            return
+
         title = "电脑长时间未关机提醒"
-        base_info = (
-            f"电脑已运行：{self._format_td(uptime)}\n"
-            f"空闲时间：{int(idle.total_seconds() / 60)} 分钟\n"
-            f"时间：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        # 渲染提醒内容：只计算模板中用到的占位符
+        ctx = self.template_context(uptime, idle)
+        content = self.conf.remind_tpl.render(ctx)
+        base_info = ctx["base_info"]
+
+        conf = self.conf
+        self.worker.submit(
+            lambda: self.probe_online(conf),
+            lambda online: self.on_probe_result(bool(online), title, content, base_info, idle_th),
+            key="trigger",
         )
 
-        # 渲染提醒内容（支持 {base_info}）
-        tpl = str(self.cfg.get("remind_template", DEFAULT_REMIND_TEMPLATE) or "").strip()
-        if not tpl:
-            tpl = DEFAULT_REMIND_TEMPLATE
-        if "{base_info}" in tpl:
-            content = tpl.replace("{base_info}", base_info)
-        else:
-            content = base_info + "\n\n" + tpl
+    def on_probe_result(self, online: bool, title: str, content: str, base_info: str, idle_th: timedelta):
+        self.last_online = online
+        # 检测期间已弹出倒计时（如测试休眠），放弃本轮
+        if self.active_dialog is not None:
+            return
 
-        online = is_online_two_level(self.cfg)
         if online:
+            # 联网正常：顺带唤醒重发队列
+            if self.outbox_dispatcher:
+                self.outbox_dispatcher.kick()
+
             if self.suppress_once_remind:
                 self.tray_info("AutoShutdown", "本次已设置不提醒：跳过联网消息发送。", NIIF_INFO)
-                self.last_trigger_time = datetime.now()
+                self.last_trigger_time = self.backend.now()
                 self.consume_once_flags()
                 return
 
-            remind_times = 0
-            try:
-                remind_times = int(self.cfg.get("online_remind_times", 0))
-            except Exception:
-                remind_times = 0
-            remind_times = 0 if remind_times < 0 else remind_times
-
-            if (remind_times > 0 and self.online_remind_count > 0 and self.last_online_remind_time
+            remind_times = self.conf.online_remind_times
+            if (remind_times > 0 and self.online_remind_count > 0 and self.last_online_remind_time is not None
                     and self.online_remind_count < remind_times):
-                time_since_first_remind = datetime.now() - self.last_online_remind_time
+                time_since_first_remind = timedelta(seconds=self.backend.monotonic() - self.last_online_remind_time)
                 if time_since_first_remind < idle_th:
                     return
 
-            ok, _detail = pushplus_send(self.cfg, title, content)
-            if ok:
-                if remind_times <= 0:
-                    self.tray_info("AutoShutdown", "已发送群组微信通知。", NIIF_INFO)
-                    self.last_trigger_time = datetime.now()
-                    self.consume_once_flags()
-                    return
+            if self.conf.digest_window_sec > 0:
+                # 合并模式：先缓存，窗口结束时统一发送；提醒计数与休眠决策在送达后（on_digest_result）进行
+                self.queue_digest(title, base_info)
+                self.tray_info("AutoShutdown", "已加入合并提醒，窗口结束时发送。", NIIF_INFO)
+                self.last_trigger_time = self.backend.now()
+                return
 
-                next_count = self.online_remind_count + 1
-                self.online_remind_count = next_count
-                self.last_online_remind_time = datetime.now()
-
-                if next_count < remind_times:
-                    self.tray_info(
-                        "AutoShutdown",
-                        f"已发送群组微信通知（{next_count}/{remind_times}）：继续满足条件将再次提醒。",
-                        NIIF_INFO
-                    )
-                    self.last_trigger_time = datetime.now()
-                    self.consume_once_flags()
-                    self.apply_main_timer()
-                    return
+            # 先落盘再发送：发送失败时由后台调度器重发，消息不会丢失
+            msg = self.outbox_add(title, content)
+            conf = self.conf
+            self.worker.submit(
+                lambda: self.send_message(conf, title, content),
+                lambda result: self.on_send_result(result, base_info, remind_times, msg),
+                key="trigger",
+            )
+            return
 
-                self.tray_info(
-                    "AutoShutdown",
-                    f"已发送群组微信通知（{next_count}/{remind_times}）：将弹出可取消休眠提示。",
-                    NIIF_INFO
-                )
-                self.prepare_hibernate_flow(base_info, reason=f"联网提醒已发送（{next_count}/{remind_times}）")
-                self.online_remind_count = 0
-                self.last_online_remind_time = None
-                return
+        self.record_outcome(OUTCOME_OFFLINE)
+        self.online_remind_count = 0
+        self.last_online_remind_time = None
+        self.prepare_hibernate_flow(base_info, reason=self.hibernate_policy(online=False, delivered=False))
+
+    def hibernate_policy(self, online: bool, delivered: bool, remind_count: int = 0, remind_times: int = 0):
+        """根据一轮触发的结果决定是否休眠：返回休眠原因，None 表示本轮不休眠。"""
+        if not online:
+            return "无网络"
+        if delivered:
+            if remind_times > 0 and remind_count >= remind_times:
+                return f"联网提醒已发送（{remind_count}/{remind_times}）"
+            return None
+        limit = self.conf.send_fail_hibernate_after
+        if limit > 0 and self.send_fail_streak >= limit:
+            return f"连续 {self.send_fail_streak} 次发送失败"
+        return None
+
+    def on_send_result(self, result, base_info: str, remind_times: int, msg=None):
+        ok = bool(result and result[0])
+        self.last_notify = result
+        # 被限流推迟不是发送失败：消息已在队列中，不影响联网判断与休眠决策
+        deferred = (not ok) and deferred_only(result)
+        # 联网通道送达本身就是一次联网判断
+        if reached_network(result):
+            self.connectivity.note_online(self.conf)
+        elif not ok and not deferred:
+            self.connectivity.invalidate("push_failed")
+
+        # 未送达的通道留在队列中由后台重发
+        self.settle_outbox(msg, result)
+
+        if self.active_dialog is not None:
+            return
 
-            # send failed -> treat as offline
-            self.online_remind_count = 0
-            self.last_online_remind_time = None
-            self.prepare_hibernate_flow(base_info, reason="发送失败")
+        if deferred:
+            self.tray_info("AutoShutdown", "发送频率超出限额：消息已排队，稍后自动发送。", NIIF_INFO)
+            self.last_trigger_time = self.backend.now()
+            self.consume_once_flags()
+            return
+
+        self.record_outcome(OUTCOME_REMIND_OK if ok else OUTCOME_REMIND_FAIL)
+        if not ok:
+            # 一次发送失败不直接休眠：重新确认联网后交给 hibernate_policy 决定
+            self.send_fail_streak += 1
+            conf = self.conf
+            self.worker.submit(
+                lambda: self.probe_online(conf),
+                lambda online: self.on_send_failed(bool(online), base_info),
+                key="trigger",
+            )
+            return
+
+        self.send_fail_streak = 0
+        self.on_remind_accepted(base_info, remind_times, "已发送群组微信通知")
+
+    def on_remind_accepted(self, base_info: str, remind_times: int, note: str, count: int = 1):
+        """提醒已送达（合并发送时为 count 条）：累计提醒次数并按策略决定是否休眠。"""
+        if remind_times <= 0:
+            self.tray_info("AutoShutdown", f"{note}。", NIIF_INFO)
+            self.last_trigger_time = self.backend.now()
+            self.consume_once_flags()
             return
 
+        next_count = self.online_remind_count + count
+        self.online_remind_count = next_count
+        self.last_online_remind_time = self.backend.monotonic()
+
+        reason = self.hibernate_policy(online=True, delivered=True, remind_count=next_count, remind_times=remind_times)
+        if reason is None:
+            self.tray_info(
+                "AutoShutdown",
+                f"{note}（{next_count}/{remind_times}）：继续满足条件将再次提醒。",
+                NIIF_INFO
+            )
+            self.last_trigger_time = self.backend.now()
+            self.consume_once_flags()
+            self.apply_main_timer()
+            return
+
+        self.tray_info(
+            "AutoShutdown",
+            f"{note}（{next_count}/{remind_times}）：将弹出可取消休眠提示。",
+            NIIF_INFO
+        )
+        self.prepare_hibernate_flow(base_info, reason=reason)
         self.online_remind_count = 0
         self.last_online_remind_time = None
-        self.prepare_hibernate_flow(base_info, reason="无网络")
 
-    def autostart_integrity_check(self):
+    def queue_digest(self, title: str, base_info: str):
+        if self.digest.add(title, base_info, now=self.backend.now()):
+            self.scheduler.schedule("digest", self.conf.digest_window_sec, self.flush_digest)
+
+    def flush_digest(self):
+        """合并窗口结束（或即将休眠）：把缓存的提醒渲染为一条消息发送。"""
+        self.scheduler.cancel("digest")
+        if not self.digest:
+            return
+        title, content = self.digest.render(self.conf.remind_tpl, self.template_context())
+        count = len(self.digest)
+        base_info = self.digest.blocks[-1]
+        window = (self.backend.now() - self.digest.opened_at).total_seconds() if self.digest.opened_at else 0
+        self.digest.clear()
+        log_stats("digest", count=count, window_sec=round(window, 1))
+
+        box, msg_id = msg = self.outbox_add(title, content)
+        conf = self.conf
+        if not self.worker.submit(
+            lambda: self.send_message(conf, title, content),
+            lambda result: self.on_digest_result(result, count, msg, base_info),
+        ):
+            box.retry_later(msg_id)
+            self.kick_outbox()
+
+    def on_digest_result(self, result, count: int, msg=None, base_info: str = ""):
+        # 合并提醒送达后才累计提醒次数（count 条）并决定是否休眠；失败与单条发送一样计入连续失败
+        ok = bool(result and result[0])
+        self.last_notify = result
+        deferred = (not ok) and deferred_only(result)
+        if reached_network(result):
+            self.connectivity.note_online(self.conf)
+        elif not ok and not deferred:
+            self.connectivity.invalidate("push_failed")
+        self.settle_outbox(msg, result)
+
+        if self.active_dialog is not None:
+            return
+
+        if deferred:
+            self.tray_info("AutoShutdown", f"合并提醒（{count} 条）超出发送限额：已排队，稍后自动发送。", NIIF_INFO)
+            return
+
+        self.record_outcome(OUTCOME_REMIND_OK if ok else OUTCOME_REMIND_FAIL)
+        if not ok:
+            self.send_fail_streak += 1
+            conf = self.conf
+            self.worker.submit(
+                lambda: self.probe_online(conf),
+                lambda online: self.on_send_failed(bool(online), base_info),
+                key="trigger",
+            )
+            return
+
+        self.send_fail_streak = 0
+        self.on_remind_accepted(base_info, self.conf.online_remind_times, f"已发送合并提醒（{count} 条）", count=count)
+
+    def on_send_failed(self, online: bool, base_info: str):
+        self.last_online = online
+        if self.active_dialog is not None:
+            return
+        reason = self.hibernate_policy(online=online, delivered=False)
+        if reason is None:
+            self.tray_info("AutoShutdown", "消息发送失败，已加入重发队列。", NIIF_WARNING)
+            self.last_trigger_time = self.backend.now()
+            self.consume_once_flags()
+            return
+
+        if not online:
+            self.record_outcome(OUTCOME_OFFLINE)
+        self.send_fail_streak = 0
+        self.online_remind_count = 0
+        self.last_online_remind_time = None
+        self.prepare_hibernate_flow(base_info, reason=reason)
+
+    def scan_autostart(self):
+        """
+        只做文件/注册表检查（可在后台线程执行）：自启已关闭时清理残留；
+        快捷方式与期望一致时返回 None，否则返回 (当前描述, 期望描述)。
+        """
         try:
             # 配置为“关闭自启”时，确保没有残留（包括旧注册表方式）
-            if not bool(self.cfg.get("autostart_enabled", False)):
+            if not self.conf.autostart_enabled:
                 delete_startup_shortcut()
                 cleanup_old_registry_run_entry()
-                return
+                return None
 
             expected_target, expected_args, expected_icon, expected_wd = build_expected_shortcut_spec()
             current = read_startup_shortcut_spec()
@@ -462,14 +955,23 @@ class App:
                 mismatch = not (ct == et and ca == ea)
 
             if not mismatch:
-                return
+                return None
 
-            # 修复 / 关闭 / 忽略 三选一
             cur_desc = "(无)" if not current else (
                 f"Target={current.get('TargetPath','')}\nArgs={current.get('Arguments','')}"
             )
             exp_desc = f"Target={expected_target}\nArgs={expected_args}"
+            return cur_desc, exp_desc
+        except Exception as e:
+            log_error(e)
+            return None
 
+    def resolve_autostart_mismatch(self, found):
+        """UI 线程：自启项异常时弹出 修复 / 关闭 / 忽略 三选一。"""
+        if not found:
+            return
+        cur_desc, exp_desc = found
+        try:
             pressed = task_dialog_3choice(
                 self.hwnd,
                 "检测到自启项异常",
@@ -504,14 +1006,12 @@ class App:
             if pressed == 101:
                 cleanup_old_registry_run_entry()
                 ok = create_startup_shortcut()
-                self.cfg["autostart_enabled"] = True
-                save_config(self.cfg)
+                self.update_cfg(autostart_enabled=True)
                 self.tray_info("AutoShutdown", "已修复开机自启快捷方式。" if ok else "修复失败，请查看 error.log。", NIIF_INFO if ok else NIIF_ERROR)
             elif pressed == 102:
                 delete_startup_shortcut()
                 cleanup_old_registry_run_entry()
-                self.cfg["autostart_enabled"] = False
-                save_config(self.cfg)
+                self.update_cfg(autostart_enabled=False)
                 self.tray_info("AutoShutdown", "已关闭开机自启。", NIIF_INFO)
             else:
                 # ignore
@@ -533,26 +1033,21 @@ class App:
             self.consume_once_flags()
             self.tray_info("AutoShutdown", "已恢复默认。", NIIF_INFO)
         elif mid == MID_AUTOSTART:
-            enabled = bool(self.cfg.get("autostart_enabled", False))
-            if not enabled:
+            if not self.conf.autostart_enabled:
                 cleanup_old_registry_run_entry()
                 ok = create_startup_shortcut()
                 if ok:
-                    self.cfg["autostart_enabled"] = True
-                    save_config(self.cfg)
+                    self.update_cfg(autostart_enabled=True)
                     self.tray_info("AutoShutdown", "已开启开机自启。", NIIF_INFO)
                 else:
                     self.tray_info("AutoShutdown", "开启自启失败。", NIIF_ERROR)
             else:
                 delete_startup_shortcut()
                 cleanup_old_registry_run_entry()
-                self.cfg["autostart_enabled"] = False
-                save_config(self.cfg)
+                self.update_cfg(autostart_enabled=False)
                 self.tray_info("AutoShutdown", "已关闭开机自启。", NIIF_INFO)
         elif mid == MID_TRAY_BALLOON:
-            enabled = bool(self.cfg.get("tray_balloon_enabled", False))
-            self.cfg["tray_balloon_enabled"] = not enabled
-            save_config(self.cfg)
+            self.update_cfg(tray_balloon_enabled=not self.conf.tray_balloon_enabled)
         elif mid == MID_SETTINGS:
             if self.settings is None:
                 self.settings = SettingsWindow(self, self.hwnd)
@@ -569,9 +1064,81 @@ class App:
             self.destroy_tray()
         except Exception:
             pass
+        self.scheduler.cancel("startup")
+        if self.digest and self.outbox is not None:
+            # 未到窗口结束的提醒写入重发队列，下次启动时发送
+            self.outbox.add(*self.digest.render(self.conf.remind_tpl, self.template_context()))
+            self.digest.clear()
+        self.scheduler.cancel("prewarm")
+        if self.input_source is not None:
+            self.input_source.close()
+        self.worker.shutdown()
+        self.stop_journal()
+        if self.outbox_dispatcher:
+            self.outbox_dispatcher.stop()
+        self.notifier.shutdown()
+        flush_config()
+        if self.config_watcher is not None:
+            self.config_watcher.close()
+            self.config_watcher = None
         user32.PostQuitMessage(0)
 
+    def _timed(self, timings: dict, name: str, fn):
+        t = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            timings[name + "_ms"] = round((time.perf_counter() - t) * 1000.0, 1)
+
     def create_main_window(self):
+        """第一阶段：窗口、托盘图标、菜单与主定时器，完成后立即进入消息循环；其余工作由 start_deferred() 延后执行。"""
+        timings = {}
+        t0 = time.perf_counter()
+        self._timed(timings, "window", self._create_hidden_window)
+        self._timed(timings, "tray", self.create_tray)
+        self._timed(timings, "menu", self.build_menu)
+        self._timed(timings, "timer", self.apply_main_timer)
+        # 配置的延迟写入也交给主定时器，到期后在后台线程写盘
+        use_config_scheduler(self._schedule_config_flush)
+        timings["total_ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+        # 进程创建至托盘出现的总耗时（含解释器启动与模块导入）
+        age = self.backend.process_age_sec()
+        log_stats("startup", phase="tray", process_ms=None if age is None else round(age * 1000.0, 1), **timings)
+        self.scheduler.schedule("startup", self.conf.startup_delay_sec, self.start_deferred)
+
+    def _schedule_config_flush(self, delay_sec: float, flush):
+        def submit():
+            if not self.worker.submit(flush, key="config_save"):
+                # 上一次写入（fsync）仍在进行：稍后再试，否则这次保存要等到下一次修改或退出才落盘
+                self.scheduler.schedule("config_save", delay_sec, submit)
+        self.scheduler.schedule("config_save", delay_sec, submit)
+
+    def start_deferred(self):
+        """第二阶段：UI 线程上的轻量工作直接执行，文件 I/O 与自启项检查交给低优先级线程。"""
+        timings = {}
+        self._timed(timings, "config_watch", self.start_config_watch)
+        self._timed(timings, "input", self.start_input_events)
+        self._timed(timings, "notice", self._maybe_show_last_hibernate_notice)
+        log_stats("startup", phase="deferred_ui", delay_sec=self.conf.startup_delay_sec, **timings)
+        self.worker.submit(self._startup_background, self._on_startup_background_done,
+                           key="startup", low_priority=True)
+
+    def _startup_background(self):
+        # 只做文件读写与检查，App 的状态在 UI 线程的 _on_startup_background_done() 中更新
+        timings = {}
+        journal = self._timed(timings, "journal", self.open_journal)
+        outbox = self._timed(timings, "outbox", self.open_outbox)
+        found = self._timed(timings, "autostart", self.scan_autostart)
+        return journal, outbox, found, timings
+
+    def _on_startup_background_done(self, result):
+        journal, outbox, found, timings = result or (None, None, None, {})
+        self._timed(timings, "attach_journal", lambda: self.attach_journal(journal))
+        self._timed(timings, "attach_outbox", lambda: self.attach_outbox(outbox))
+        log_stats("startup", phase="deferred_io", **timings)
+        self.resolve_autostart_mismatch(found)
+
+    def _create_hidden_window(self):
         _register_window_class(self.MAIN_CLASS, _main_wndproc)
         _register_window_class(SettingsWindow.CLASS_NAME, _settings_wndproc)
         _register_window_class(CountdownDialog.CLASS_NAME, _countdown_wndproc)
@@ -587,12 +1154,6 @@ class App:
         )
         _hwnd_to_obj[self.hwnd] = self
 
-        self.create_tray()
-        self.build_menu()
-        self._maybe_show_last_hibernate_notice()
-        self.apply_main_timer()
-        self.autostart_integrity_check()
-
     def run(self):
         self.create_main_window()
         msg = wintypes.MSG()
@@ -0,0 +1,836 @@
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import time
+import struct
+import atexit
+import threading
+from datetime import datetime, timedelta
+
+from core import _w, ensure_dirs, log_error, APPDATA_DIR, _run_subprocess_hidden
+from idleclock import IdleClock, TICK_MASK
+
+# -----------------------------
+# File change watchers
+# -----------------------------
+class StatWatcher:
+    """按 mtime/size 判断文件是否变化；poll() 只做一次 os.stat。"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._sig = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def poll(self) -> bool:
+        sig = self._stat()
+        if sig == self._sig:
+            return False
+        self._sig = sig
+        return True
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """inotify 监视所在目录（兼容 os.replace 的原子替换），poll() 为非阻塞读取事件队列。"""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, path: str):
+        import ctypes
+        self.path = path
+        self._name = os.fsencode(os.path.basename(path))
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
+        if libc.inotify_add_watch(fd, os.fsencode(os.path.dirname(path) or "."), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, "inotify_add_watch failed")
+        self._fd = fd
+
+    def poll(self) -> bool:
+        changed = False
+        while True:
+            try:
+                buf = os.read(self._fd, 4096)
+            except BlockingIOError:
+                break
+            except OSError:
+                break
+            if not buf:
+                break
+            off = 0
+            while off + self._EVENT.size <= len(buf):
+                _wd, _mask, _cookie, length = self._EVENT.unpack_from(buf, off)
+                off += self._EVENT.size
+                name = buf[off:off + length].rstrip(b"\x00")
+                off += length
+                if name == self._name:
+                    changed = True
+        return changed
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+# -----------------------------
+# Input activity sources
+# -----------------------------
+class InputActivitySource:
+    """
+    用户输入事件源：arm() 之后的第一次输入调用 callback(name) 并自动解除。
+    只在等待用户回来期间 arm，用户在电脑前时不注册任何监听，也不产生唤醒。
+    基类不监听任何事件（退回到主定时器轮询空闲时长）。
+    """
+    name = "none"
+    # callback 是否在后台线程中调用（需要宿主投递回 UI 线程）
+    threaded = False
+
+    def __init__(self):
+        self.callback = None
+        self.armed = False
+        self._lock = threading.Lock()
+
+    def start(self, hwnd, callback):
+        self.callback = callback
+
+    def arm(self) -> bool:
+        with self._lock:
+            if self.armed:
+                return False
+            self.armed = True
+        try:
+            self._arm()
+        except Exception as e:
+            log_error(e)
+            with self._lock:
+                self.armed = False
+            return False
+        return True
+
+    def disarm(self):
+        with self._lock:
+            if not self.armed:
+                return
+            self.armed = False
+        try:
+            self._disarm()
+        except Exception as e:
+            log_error(e)
+
+    def fire(self) -> bool:
+        """检测到输入：只有 arm 状态下的第一次有效。"""
+        with self._lock:
+            if not self.armed:
+                return False
+        self.disarm()
+        if self.callback:
+            self.callback(self.name)
+        return True
+
+    def on_message(self, msg: int, wparam: int):
+        """Win32 窗口消息（WM_INPUT / WM_WTSSESSION_CHANGE）。"""
+        pass
+
+    def close(self):
+        self.disarm()
+
+    def _arm(self):
+        pass
+
+    def _disarm(self):
+        pass
+
+
+class RawInputSource(InputActivitySource):
+    """
+    Win32：arm 时以 RIDEV_INPUTSINK 注册键盘/鼠标原始输入（后台窗口也能收到 WM_INPUT），
+    收到第一条后立即注销；会话解锁/重新连接（WM_WTSSESSION_CHANGE）同样视为用户回来。
+    """
+    name = "rawinput"
+
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        from ctypes import wintypes
+        import winapi
+
+        class RAWINPUTDEVICE(ctypes.Structure):
+            _fields_ = [
+                ("usUsagePage", wintypes.USHORT),
+                ("usUsage", wintypes.USHORT),
+                ("dwFlags", wintypes.DWORD),
+                ("hwndTarget", winapi.HWND_T),
+            ]
+
+        self._ctypes = ctypes
+        self._winapi = winapi
+        self._RAWINPUTDEVICE = RAWINPUTDEVICE
+        self.hwnd = None
+        self._session_registered = False
+
+        winapi.user32.RegisterRawInputDevices.argtypes = [ctypes.POINTER(RAWINPUTDEVICE), wintypes.UINT, wintypes.UINT]
+        winapi.user32.RegisterRawInputDevices.restype = wintypes.BOOL
+        winapi.wtsapi32.WTSRegisterSessionNotification.argtypes = [winapi.HWND_T, wintypes.DWORD]
+        winapi.wtsapi32.WTSRegisterSessionNotification.restype = wintypes.BOOL
+        winapi.wtsapi32.WTSUnRegisterSessionNotification.argtypes = [winapi.HWND_T]
+        winapi.wtsapi32.WTSUnRegisterSessionNotification.restype = wintypes.BOOL
+
+    def start(self, hwnd, callback):
+        from constants import NOTIFY_FOR_THIS_SESSION
+        super().start(hwnd, callback)
+        self.hwnd = hwnd
+        # 会话通知是事件驱动的，常驻注册不产生唤醒
+        try:
+            self._session_registered = bool(
+                self._winapi.wtsapi32.WTSRegisterSessionNotification(hwnd, NOTIFY_FOR_THIS_SESSION))
+        except Exception as e:
+            log_error(e)
+
+    def _register(self, flags: int, hwnd):
+        from constants import HID_USAGE_PAGE_GENERIC, HID_USAGE_GENERIC_MOUSE, HID_USAGE_GENERIC_KEYBOARD
+        ctypes = self._ctypes
+        devices = (self._RAWINPUTDEVICE * 2)(
+            self._RAWINPUTDEVICE(HID_USAGE_PAGE_GENERIC, HID_USAGE_GENERIC_MOUSE, flags, hwnd),
+            self._RAWINPUTDEVICE(HID_USAGE_PAGE_GENERIC, HID_USAGE_GENERIC_KEYBOARD, flags, hwnd),
+        )
+        if not self._winapi.user32.RegisterRawInputDevices(devices, 2, ctypes.sizeof(self._RAWINPUTDEVICE)):
+            raise ctypes.WinError(ctypes.get_last_error())
+
+    def _arm(self):
+        from constants import RIDEV_INPUTSINK
+        if not self.hwnd:
+            raise OSError("raw input needs a target window")
+        self._register(RIDEV_INPUTSINK, self.hwnd)
+
+    def _disarm(self):
+        from constants import RIDEV_REMOVE
+        # RIDEV_REMOVE 要求 hwndTarget 为空
+        self._register(RIDEV_REMOVE, None)
+
+    def on_message(self, msg: int, wparam: int):
+        from constants import (WM_INPUT, WM_WTSSESSION_CHANGE, WTS_CONSOLE_CONNECT, WTS_REMOTE_CONNECT,
+                               WTS_SESSION_LOGON, WTS_SESSION_UNLOCK)
+        if msg == WM_INPUT:
+            self.fire()
+        elif msg == WM_WTSSESSION_CHANGE and wparam in (
+                WTS_CONSOLE_CONNECT, WTS_REMOTE_CONNECT, WTS_SESSION_LOGON, WTS_SESSION_UNLOCK):
+            self.fire()
+
+    def close(self):
+        super().close()
+        if self._session_registered:
+            self._session_registered = False
+            try:
+                self._winapi.wtsapi32.WTSUnRegisterSessionNotification(self.hwnd)
+            except Exception:
+                pass
+
+
+class EvdevInputSource(InputActivitySource):
+    """
+    Linux：arm 时打开可读的 /dev/input/event*，后台线程无超时地 select 等待，
+    任一设备可读即为用户输入；disarm 通过管道唤醒线程退出。需要 input 组权限。
+    """
+    name = "evdev"
+    threaded = True
+    INPUT_DIR = "/dev/input"
+
+    def __init__(self, devices=None):
+        super().__init__()
+        self.devices = list(devices) if devices is not None else self.list_devices()
+        self._wake = None
+
+    @classmethod
+    def list_devices(cls):
+        try:
+            names = sorted(n for n in os.listdir(cls.INPUT_DIR) if n.startswith("event"))
+        except OSError:
+            return []
+        return [os.path.join(cls.INPUT_DIR, n) for n in names if os.access(os.path.join(cls.INPUT_DIR, n), os.R_OK)]
+
+    def _arm(self):
+        fds = []
+        for path in self.devices:
+            try:
+                fds.append(os.open(path, os.O_RDONLY | os.O_NONBLOCK | getattr(os, "O_CLOEXEC", 0)))
+            except OSError:
+                continue
+        if not fds:
+            raise OSError("no readable input device")
+        r, w = os.pipe()
+        self._wake = w
+        threading.Thread(target=self._wait, args=(fds, r), name="evdev-input", daemon=True).start()
+
+    def _wait(self, fds, wake_r):
+        import select
+        try:
+            ready, _, _ = select.select(fds + [wake_r], [], [])
+            if wake_r not in ready:
+                self.fire()
+        except Exception as e:
+            log_error(e)
+        finally:
+            for fd in fds + [wake_r]:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+
+    def _disarm(self):
+        w, self._wake = self._wake, None
+        if w is None:
+            return
+        try:
+            os.write(w, b"\0")
+        finally:
+            os.close(w)
+
+
+class IdleHintInputSource(InputActivitySource):
+    """
+    Linux 无 evdev 权限时的替代：arm 期间每 poll_sec 秒读一次 logind 的 IdleHint，
+    变为 no 即视为用户回来。只在用户离开时轮询，用户在电脑前时没有唤醒。
+    """
+    name = "idlehint"
+    threaded = True
+
+    def __init__(self, poll_sec: float = 5.0):
+        super().__init__()
+        self.poll_sec = poll_sec
+        self._stop = None
+
+    @staticmethod
+    def idle_hint():
+        session = os.environ.get("XDG_SESSION_ID") or "self"
+        r = _run_subprocess_hidden(["loginctl", "show-session", session, "-p", "IdleHint", "--value"],
+                                   capture_output=True, text=True, timeout=5, check=False)
+        value = (r.stdout or "").strip()
+        return None if value not in ("yes", "no") else value == "yes"
+
+    def _arm(self):
+        stop = self._stop = threading.Event()
+        threading.Thread(target=self._poll, args=(stop,), name="idlehint-input", daemon=True).start()
+
+    def _poll(self, stop):
+        while not stop.wait(self.poll_sec):
+            try:
+                if self.idle_hint() is False:
+                    self.fire()
+                    return
+            except Exception as e:
+                log_error(e)
+                return
+
+    def _disarm(self):
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+
+# -----------------------------
+# Platform backend interface
+# -----------------------------
+class PlatformBackend:
+    """
+    平台原语：空闲/开机时长、一级联网判断、休眠、单实例、时钟与主定时器。
+    App 的调度与策略逻辑只通过该接口访问系统，便于在非 Windows 环境下运行与测试。
+    """
+    name = "base"
+
+    def idle_seconds(self) -> int:
+        raise NotImplementedError
+
+    def uptime_seconds(self) -> int:
+        raise NotImplementedError
+
+    def is_online(self) -> bool:
+        raise NotImplementedError
+
+    def hibernate(self) -> bool:
+        raise NotImplementedError
+
+    def acquire_single_instance(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def set_timer(self, hwnd, timer_id: int, ms: int):
+        raise NotImplementedError
+
+    def kill_timer(self, hwnd, timer_id: int):
+        raise NotImplementedError
+
+    def watch_file(self, path: str):
+        """返回带 poll() -> bool 的文件变化监视器。"""
+        return StatWatcher(path)
+
+    def battery_status(self):
+        """(电量百分比, 是否接通电源)；没有电池或无法获取时为 None。"""
+        return None
+
+    def input_source(self) -> InputActivitySource:
+        """用户输入事件源；基类不监听，由主定时器轮询空闲时长。"""
+        return InputActivitySource()
+
+    def invalidate_idle(self):
+        """输入事件表明用户已回来：丢弃缓存的空闲状态，下一次 idle_seconds() 重新读取。"""
+        pass
+
+    def lower_thread_priority(self):
+        """把当前线程降为后台优先级（启动后的非关键工作使用）。"""
+        pass
+
+    def process_age_sec(self):
+        """进程创建至今的秒数（含解释器启动与模块导入）；无法获取时为 None。"""
+        return None
+
+# -----------------------------
+# Win32
+# -----------------------------
+class Win32Backend(PlatformBackend):
+    name = "win32"
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        import winapi
+
+        class LASTINPUTINFO(ctypes.Structure):
+            _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+
+        self._ctypes = ctypes
+        self._wintypes = wintypes
+        self._winapi = winapi
+        self._LASTINPUTINFO = LASTINPUTINFO
+
+        winapi.user32.GetLastInputInfo.argtypes = [ctypes.POINTER(LASTINPUTINFO)]
+        winapi.user32.GetLastInputInfo.restype = wintypes.BOOL
+        winapi.kernel32.GetTickCount64.argtypes = []
+        winapi.kernel32.GetTickCount64.restype = ctypes.c_ulonglong
+        self._mutex_handle = None
+        # dwTime 只有 32 位，与 GetTickCount64 对齐后计算，开机超过 49.7 天也不会回绕
+        self._idle_clock = IdleClock()
+
+    def idle_seconds(self) -> int:
+        ctypes = self._ctypes
+        lii = self._LASTINPUTINFO()
+        lii.cbSize = ctypes.sizeof(self._LASTINPUTINFO)
+        if not self._winapi.user32.GetLastInputInfo(ctypes.byref(lii)):
+            return 0
+        # 先取 dwTime 再取当前时刻，保证 dwTime 不晚于当前时刻
+        tick = int(self._winapi.kernel32.GetTickCount64())
+        return self._idle_clock.idle_ms(lii.dwTime, tick) // 1000
+
+    def uptime_seconds(self) -> int:
+        return int(self._winapi.kernel32.GetTickCount64() // 1000)
+
+    def is_online(self) -> bool:
+        try:
+            flags = self._wintypes.DWORD(0)
+            return bool(self._winapi.wininet.InternetGetConnectedState(self._ctypes.byref(flags), 0))
+        except Exception:
+            return False
+
+    def hibernate(self) -> bool:
+        """
+        尝试多种方法使系统进入休眠状态：
+        1. 首先尝试使用shutdown /h命令
+        2. 如果失败，则尝试使用 rundll32 powrprof.dll,SetSuspendState
+        """
+        try:
+            # 方法1: 使用 shutdown /h 命令
+            result = _run_subprocess_hidden(["shutdown", "/h"], check=False, timeout=10)
+            if result.returncode == 0:
+                return True
+        except Exception:
+            pass
+
+        try:
+            # 方法2: 使用 rundll32 调用电源管理函数
+            # SetSuspendState(Hibernate, ForceCritical, DisableWakeEvent)
+            result = _run_subprocess_hidden([
+                "rundll32.exe",
+                "powrprof.dll,SetSuspendState",
+                "1,1,0"
+            ], check=False, timeout=10)
+            if result.returncode == 0:
+                return True
+        except Exception:
+            pass
+
+        # 如果以上方法都失败，则返回False
+        return False
+
+    def acquire_single_instance(self, name: str) -> bool:
+        ctypes = self._ctypes
+        wintypes = self._wintypes
+        kernel32 = self._winapi.kernel32
+        HANDLE_T = self._winapi.HANDLE_T
+        from constants import ERROR_ALREADY_EXISTS
+
+        kernel32.CreateMutexW.argtypes = [wintypes.LPVOID, wintypes.BOOL, wintypes.LPCWSTR]
+        kernel32.CreateMutexW.restype = HANDLE_T
+        kernel32.CloseHandle.argtypes = [HANDLE_T]
+        kernel32.CloseHandle.restype = wintypes.BOOL
+
+        h = kernel32.CreateMutexW(None, True, _w(name))
+        if not h:
+            return True
+        last_err = ctypes.get_last_error()
+        if last_err == ERROR_ALREADY_EXISTS:
+            kernel32.CloseHandle(h)
+            return False
+        self._mutex_handle = h
+
+        def _release():
+            try:
+                if self._mutex_handle:
+                    kernel32.CloseHandle(self._mutex_handle)
+            except Exception:
+                pass
+        atexit.register(_release)
+        return True
+
+    def set_timer(self, hwnd, timer_id: int, ms: int):
+        user32 = self._winapi.user32
+        UINT_PTR_T = self._winapi.UINT_PTR_T
+        user32.KillTimer(hwnd, UINT_PTR_T(timer_id))
+        user32.SetTimer(hwnd, UINT_PTR_T(timer_id), max(1, int(ms)), None)
+
+    def kill_timer(self, hwnd, timer_id: int):
+        self._winapi.user32.KillTimer(hwnd, self._winapi.UINT_PTR_T(timer_id))
+
+    def lower_thread_priority(self):
+        from constants import THREAD_MODE_BACKGROUND_BEGIN
+        kernel32 = self._winapi.kernel32
+        kernel32.GetCurrentThread.argtypes = []
+        kernel32.GetCurrentThread.restype = self._winapi.HANDLE_T
+        kernel32.SetThreadPriority.argtypes = [self._winapi.HANDLE_T, self._ctypes.c_int]
+        kernel32.SetThreadPriority.restype = self._wintypes.BOOL
+        # 后台模式同时降低 CPU、磁盘 I/O 与内存优先级
+        kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+
+    def process_age_sec(self):
+        ctypes = self._ctypes
+        wintypes = self._wintypes
+        kernel32 = self._winapi.kernel32
+        FILETIME = wintypes.FILETIME
+        kernel32.GetCurrentProcess.argtypes = []
+        kernel32.GetCurrentProcess.restype = self._winapi.HANDLE_T
+        kernel32.GetProcessTimes.argtypes = [self._winapi.HANDLE_T] + [ctypes.POINTER(FILETIME)] * 4
+        kernel32.GetProcessTimes.restype = wintypes.BOOL
+        kernel32.GetSystemTimeAsFileTime.argtypes = [ctypes.POINTER(FILETIME)]
+        kernel32.GetSystemTimeAsFileTime.restype = None
+
+        created, exited, kernel, user, now = FILETIME(), FILETIME(), FILETIME(), FILETIME(), FILETIME()
+        if not kernel32.GetProcessTimes(kernel32.GetCurrentProcess(), ctypes.byref(created), ctypes.byref(exited),
+                                        ctypes.byref(kernel), ctypes.byref(user)):
+            return None
+        kernel32.GetSystemTimeAsFileTime(ctypes.byref(now))
+        as_int = lambda ft: (int(ft.dwHighDateTime) << 32) | int(ft.dwLowDateTime)
+        # FILETIME 单位为 100 纳秒
+        return max(0.0, (as_int(now) - as_int(created)) / 1e7)
+
+    def input_source(self) -> InputActivitySource:
+        try:
+            return RawInputSource()
+        except Exception as e:
+            log_error(e)
+            return InputActivitySource()
+
+    def battery_status(self):
+        ctypes = self._ctypes
+
+        class SYSTEM_POWER_STATUS(ctypes.Structure):
+            _fields_ = [
+                ("ACLineStatus", ctypes.c_ubyte),
+                ("BatteryFlag", ctypes.c_ubyte),
+                ("BatteryLifePercent", ctypes.c_ubyte),
+                ("SystemStatusFlag", ctypes.c_ubyte),
+                ("BatteryLifeTime", self._wintypes.DWORD),
+                ("BatteryFullLifeTime", self._wintypes.DWORD),
+            ]
+
+        sps = SYSTEM_POWER_STATUS()
+        if not self._winapi.kernel32.GetSystemPowerStatus(ctypes.byref(sps)):
+            return None
+        # BatteryFlag 128 = 无电池；BatteryLifePercent 255 = 未知
+        if sps.BatteryFlag == 128 or sps.BatteryLifePercent == 255:
+            return None
+        return int(sps.BatteryLifePercent), sps.ACLineStatus == 1
+
+# -----------------------------
+# Linux
+# -----------------------------
+class LinuxBackend(PlatformBackend):
+    """
+    /proc/uptime 读取开机时长，logind 的 IdleHint 判断空闲，systemctl hibernate 休眠，
+    flock 实现单实例。Linux 下没有 Win32 消息循环，定时器仅记录到期时间，由宿主循环驱动。
+    """
+    name = "linux"
+    # IdleHint 的缓存时间：主检查、预热与活动日志短时间内多次读取空闲时长，只调用一次 loginctl
+    IDLE_HINT_TTL_SEC = 5.0
+
+    def __init__(self):
+        self._lock_fd = None
+        self.timers = {}
+        self._session = os.environ.get("XDG_SESSION_ID") or "self"
+        self._idle_lock = threading.Lock()
+        self._idle_checked_at = None
+        self._idle_since = None           # 空闲开始的单调时钟秒数，None 表示不空闲
+
+    def _query_idle_since(self):
+        try:
+            r = _run_subprocess_hidden(
+                ["loginctl", "show-session", self._session, "-p", "IdleHint", "-p", "IdleSinceHintMonotonic"],
+                capture_output=True, text=True, timeout=5, check=False,
+            )
+            props = dict(ln.split("=", 1) for ln in (r.stdout or "").splitlines() if "=" in ln)
+        except Exception:
+            return None
+        if props.get("IdleHint") != "yes":
+            return None
+        try:
+            since_us = int(props.get("IdleSinceHintMonotonic", "0"))
+        except ValueError:
+            return None
+        return since_us / 1e6 if since_us > 0 else None
+
+    def idle_seconds(self) -> int:
+        # 缓存的是空闲开始时刻而不是时长，TTL 内的结果仍随时间增长
+        with self._idle_lock:
+            now = time.monotonic()
+            if self._idle_checked_at is None or now - self._idle_checked_at >= self.IDLE_HINT_TTL_SEC:
+                self._idle_since = self._query_idle_since()
+                self._idle_checked_at = time.monotonic()
+            since = self._idle_since
+        return 0 if since is None else max(0, int(time.monotonic() - since))
+
+    def invalidate_idle(self):
+        with self._idle_lock:
+            self._idle_checked_at = None
+
+    def uptime_seconds(self) -> int:
+        try:
+            with open("/proc/uptime", "r", encoding="ascii") as f:
+                return int(float(f.read().split()[0]))
+        except Exception:
+            return int(time.monotonic())
+
+    def is_online(self) -> bool:
+        # 存在处于 up 状态的非回环网卡即视为一级联网
+        try:
+            for iface in os.listdir("/sys/class/net"):
+                if iface == "lo":
+                    continue
+                try:
+                    with open(os.path.join("/sys/class/net", iface, "operstate"), "r", encoding="ascii") as f:
+                        if f.read().strip() in ("up", "unknown"):
+                            return True
+                except OSError:
+                    continue
+        except OSError:
+            return False
+        return False
+
+    def hibernate(self) -> bool:
+        try:
+            r = _run_subprocess_hidden(["systemctl", "hibernate"], check=False, timeout=10)
+            return r.returncode == 0
+        except Exception:
+            return False
+
+    def acquire_single_instance(self, name: str) -> bool:
+        import fcntl
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+        lock_dir = os.environ.get("XDG_RUNTIME_DIR") or APPDATA_DIR
+        try:
+            ensure_dirs(lock_dir)
+            fd = os.open(os.path.join(lock_dir, safe + ".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError as e:
+            log_error(e)
+            return True
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def set_timer(self, hwnd, timer_id: int, ms: int):
+        self.timers[timer_id] = self.monotonic() + max(1, int(ms)) / 1000.0
+
+    def kill_timer(self, hwnd, timer_id: int):
+        self.timers.pop(timer_id, None)
+
+    def watch_file(self, path: str):
+        try:
+            return InotifyWatcher(path)
+        except Exception as e:
+            log_error(e)
+            return StatWatcher(path)
+
+    def lower_thread_priority(self):
+        # Linux 的 nice 值按线程生效（tid 即 PRIO_PROCESS 的目标）
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+
+    def process_age_sec(self):
+        try:
+            with open("/proc/self/stat", "r", encoding="ascii") as f:
+                # comm 字段可能含空格，从最后一个 ')' 之后按空格切分；starttime 为第 22 个字段
+                fields = f.read().rsplit(")", 1)[1].split()
+            start_sec = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+            with open("/proc/uptime", "r", encoding="ascii") as f:
+                uptime = float(f.read().split()[0])
+        except (OSError, ValueError, IndexError):
+            return None
+        return max(0.0, uptime - start_sec)
+
+    def input_source(self) -> InputActivitySource:
+        devices = EvdevInputSource.list_devices()
+        if devices:
+            return EvdevInputSource(devices)
+        return IdleHintInputSource()
+
+    def battery_status(self):
+        base = "/sys/class/power_supply"
+
+        def read(name, prop):
+            with open(os.path.join(base, name, prop), "r", encoding="ascii") as f:
+                return f.read().strip()
+
+        percent = None
+        plugged = False
+        try:
+            for name in sorted(os.listdir(base)):
+                try:
+                    kind = read(name, "type")
+                    if kind == "Battery" and percent is None:
+                        percent = int(read(name, "capacity"))
+                    elif kind == "Mains" and read(name, "online") == "1":
+                        plugged = True
+                except (OSError, ValueError):
+                    continue
+        except OSError:
+            return None
+        return None if percent is None else (percent, plugged)
+
+# -----------------------------
+# In-memory fake
+# -----------------------------
+class FakeBackend(PlatformBackend):
+    """
+    确定性的内存实现：虚拟时钟由 advance() 推进，输入/联网/休眠结果均可脚本化。
+    空闲时长与 Win32 相同，由 32 位最后输入 tick 与 64 位开机 tick 经 IdleClock 计算，
+    uptime_sec 设为接近 49.7 天的倍数即可复现 tick 回绕。
+    """
+    name = "fake"
+
+    def __init__(self, start: datetime = datetime(2024, 1, 1, 9, 0, 0), uptime_sec: int = 0):
+        self._start = start
+        self.mono = 0.0
+        self.boot_mono = -float(uptime_sec)
+        self.last_input_mono = 0.0
+        self.online = True
+        self.hibernate_ok = True
+        self.hibernate_calls = 0
+        self.instances = set()
+        self.timers = {}
+        self.timer_periods = {}
+        self.battery = None
+        self.inputs = InputActivitySource()
+        self.inputs.name = "fake"
+        self.idle_clock = IdleClock()
+
+    def advance(self, seconds: float):
+        self.mono += float(seconds)
+
+    def user_input(self):
+        self.last_input_mono = self.mono
+        self.inputs.fire()
+
+    def reboot(self):
+        self.boot_mono = self.mono
+        self.last_input_mono = self.mono
+        self.idle_clock.reset()
+
+    def tick64(self) -> int:
+        """GetTickCount64：开机以来的毫秒数。"""
+        return max(0, int(round((self.mono - self.boot_mono) * 1000)))
+
+    def last_input_tick(self) -> int:
+        """LASTINPUTINFO.dwTime：最后输入时刻的 32 位 tick。"""
+        return max(0, int(round((self.last_input_mono - self.boot_mono) * 1000))) & TICK_MASK
+
+    def idle_seconds(self) -> int:
+        return self.idle_clock.idle_ms(self.last_input_tick(), self.tick64()) // 1000
+
+    def uptime_seconds(self) -> int:
+        return max(0, int(self.mono - self.boot_mono))
+
+    def is_online(self) -> bool:
+        return bool(self.online)
+
+    def hibernate(self) -> bool:
+        self.hibernate_calls += 1
+        return bool(self.hibernate_ok)
+
+    def acquire_single_instance(self, name: str) -> bool:
+        if name in self.instances:
+            return False
+        self.instances.add(name)
+        return True
+
+    def now(self) -> datetime:
+        return self._start + timedelta(seconds=self.mono)
+
+    def monotonic(self) -> float:
+        return self.mono
+
+    def set_timer(self, hwnd, timer_id: int, ms: int):
+        # 与 SetTimer 一致：周期性定时器，到期后由驱动方按周期顺延
+        period = max(1, int(ms)) / 1000.0
+        self.timers[timer_id] = self.mono + period
+        self.timer_periods[timer_id] = period
+
+    def kill_timer(self, hwnd, timer_id: int):
+        self.timers.pop(timer_id, None)
+        self.timer_periods.pop(timer_id, None)
+
+    def battery_status(self):
+        return self.battery
+
+    def input_source(self) -> InputActivitySource:
+        return self.inputs
+
+
+def default_backend() -> PlatformBackend:
+    if os.name == "nt":
+        return Win32Backend()
+    if os.name == "posix" and os.path.exists("/proc/uptime"):
+        return LinuxBackend()
+    return FakeBackend()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+
+from core import is_online_two_level, log_stats, Config
+
+# -----------------------------
+# Connectivity oracle
+# -----------------------------
+class ConnectivityOracle:
+    """
+    缓存最近一次两级联网判断。TTL 内的重复触发直接返回缓存结果，不做网络 I/O；
+    系统恢复、推送失败时提前失效，推送成功则视为一次在线判断。
+    """
+
+    def __init__(self, probe=None, ttl_sec: int = 120, clock=time.monotonic):
+        self.probe = probe or is_online_two_level
+        self.ttl_sec = ttl_sec
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._key = None
+        self.verdict = None
+        self.checked_at = None
+        self.latency_ms = None
+        self.probes = 0
+        self.hits = 0
+
+    @staticmethod
+    def _probe_key(conf: Config):
+        return conf.net_check_targets, conf.net_check_method, conf.net_check_timeout_sec
+
+    def age(self):
+        """缓存结果的年龄（秒）；没有缓存时为 None。"""
+        if self.checked_at is None:
+            return None
+        return max(0.0, self.clock() - self.checked_at)
+
+    def fresh(self, conf: Config = None) -> bool:
+        age = self.age()
+        if age is None or age >= self.ttl_sec:
+            return False
+        return conf is None or self._probe_key(conf) == self._key
+
+    def check(self, conf: Config, force: bool = False) -> bool:
+        # 串行化：并发调用者等待同一次检测的结果
+        with self._lock:
+            if not force and self.fresh(conf):
+                self.hits += 1
+                return self.verdict
+            t0 = time.perf_counter()
+            try:
+                verdict = bool(self.probe(conf))
+            except Exception:
+                verdict = False
+            self.latency_ms = round((time.perf_counter() - t0) * 1000.0, 1)
+            self._store(verdict, self._probe_key(conf))
+            self.probes += 1
+        log_stats("probe", online=verdict, latency_ms=self.latency_ms, hits=self.hits, probes=self.probes)
+        return verdict
+
+    def _store(self, verdict: bool, key):
+        self.verdict = verdict
+        self.checked_at = self.clock()
+        self._key = key
+
+    def note_online(self, conf: Config):
+        """推送成功即证明在线，刷新缓存。"""
+        with self._lock:
+            self._store(True, self._probe_key(conf))
+
+    def invalidate(self, reason: str = ""):
+        with self._lock:
+            had = self.checked_at is not None
+            self.verdict = None
+            self.checked_at = None
+            self._key = None
+        if had:
+            log_stats("probe_invalidate", reason=reason)
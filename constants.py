@@ -21,12 +21,31 @@ WM_LBUTTONDBLCLK = 0x0203
 WM_RBUTTONUP = 0x0205
 WM_SETFONT = 0x0030
 WM_POWERBROADCAST = 0x0218
+WM_INPUT = 0x00FF
+WM_WTSSESSION_CHANGE = 0x02B1
 
 PBT_APMSUSPEND = 0x0004
 PBT_APMRESUMECRITICAL = 0x0006
 PBT_APMRESUMESUSPEND = 0x0007
 PBT_APMRESUMEAUTOMATIC = 0x0012
 
+# WTSRegisterSessionNotification：用户回到会话的通知
+WTS_CONSOLE_CONNECT = 0x1
+WTS_REMOTE_CONNECT = 0x3
+WTS_SESSION_LOGON = 0x5
+WTS_SESSION_UNLOCK = 0x8
+NOTIFY_FOR_THIS_SESSION = 0
+
+# RegisterRawInputDevices
+RIDEV_REMOVE = 0x00000001
+RIDEV_INPUTSINK = 0x00000100
+HID_USAGE_PAGE_GENERIC = 0x01
+HID_USAGE_GENERIC_MOUSE = 0x02
+HID_USAGE_GENERIC_KEYBOARD = 0x06
+
+# SetThreadPriority
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+
 CS_HREDRAW = 0x0002
 CS_VREDRAW = 0x0001
 
@@ -95,12 +114,13 @@ NIIF_ERROR = 0x00000003
 
 ERROR_ALREADY_EXISTS = 183
 
-# Timers
+# Timers（TIMER_MAIN 由 scheduler.Scheduler 统一管理，只为最早的截止时间设置）
 TIMER_MAIN = 1
 TIMER_SETTINGS_DELAYCHECK = 2
-TIMER_COUNTDOWN = 3
 
 TRAY_CALLBACK_MSG = WM_APP + 1
+WM_WORKER_DONE = WM_APP + 2
+WM_USER_ACTIVE = WM_APP + 3
 
 # Menu IDs
 MID_ONCE_NO_REMIND = 1001
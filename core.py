@@ -5,21 +5,19 @@ import sys
 import json
 import time
 import atexit
-import socket
 import ctypes
-import subprocess
+import threading
 from ctypes import wintypes
-from datetime import datetime
-from urllib import request as urlrequest
+from datetime import datetime, timedelta
 
 from constants import (
     APP_NAME,
     STARTUP_SHORTCUT_NAME,
     RUN_KEY_PATH,
     RUN_VALUE_NAME,
-    ERROR_ALREADY_EXISTS,
 )
-from winapi import kernel32, user32, shell32, wininet, HANDLE_T, HWND_T
+from template import compile_template
+from lnk import ShellLink, read_lnk, write_lnk, SW_SHOWMINNOACTIVE
 
 # -----------------------------
 # Helpers
@@ -48,6 +46,39 @@ def log_error(e: Exception):
     except Exception:
         pass
 
+STATS_LOG = os.path.join(APPDATA_DIR, "stats.log")
+STATS_LOG_MAX_BYTES = 1024 * 1024
+# 代替 stats.log 接收记录（模拟等不应写入真实日志的场合），None 表示写文件
+_stats_sink = None
+
+def set_stats_sink(sink):
+    """sink(rec) 代替写入 stats.log 接收每条记录；返回原来的 sink，便于恢复。"""
+    global _stats_sink
+    prev, _stats_sink = _stats_sink, sink
+    return prev
+
+def log_stats(kind: str, **fields):
+    """运行统计写入 stats.log（每行一个 JSON），超过 1 MB 时轮转为 stats.log.1。"""
+    try:
+        sink = _stats_sink
+        if sink is not None:
+            rec = {"time": datetime.now().isoformat(timespec="seconds"), "kind": kind}
+            rec.update(fields)
+            sink(rec)
+            return
+        ensure_dirs(APPDATA_DIR)
+        try:
+            if os.path.getsize(STATS_LOG) > STATS_LOG_MAX_BYTES:
+                os.replace(STATS_LOG, STATS_LOG + ".1")
+        except OSError:
+            pass
+        rec = {"time": datetime.now().isoformat(timespec="seconds"), "kind": kind}
+        rec.update(fields)
+        with open(STATS_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    except Exception:
+        pass
+
 def get_entry_script_path() -> str:
     if getattr(sys, "frozen", False):
         return os.path.abspath(sys.executable)
@@ -86,6 +117,10 @@ DEFAULT_CONFIG = {
     "pushplus_token": "",
     "pushplus_topic": "",
     "pushplus_api": "https://www.pushplus.plus/send",
+    # 客户端限流（同一 token/topic 共享）与相同内容去重窗口
+    "pushplus_rate_per_hour": 30,
+    "pushplus_burst": 5,
+    "pushplus_dedup_sec": 600,
     "remind_template": DEFAULT_REMIND_TEMPLATE,
     "online_remind_times": 0,  # 0=仅提醒；N=提醒N次后休眠
 
@@ -99,6 +134,39 @@ DEFAULT_CONFIG = {
 
     "net_check_url": "https://baidu.com",
     "net_check_timeout_sec": 2,
+    # 并发探测的目标（http(s):// / tcp://host:port / dns://host），为空时只探测 net_check_url
+    "net_check_targets": [],
+    "net_check_method": "HEAD",  # HEAD=只读状态行；204=目标为 generate_204 类地址；GET=完整请求
+    "dns_cache_ttl_sec": 300,  # 域名解析结果缓存时长，0=不缓存
+    "dns_negative_ttl_sec": 30,  # 解析失败的缓存时长
+    "prewarm_lead_sec": 10,  # 预计触发前多少秒预先解析域名、刷新联网判断并建立连接，0=关闭
+    "net_cache_ttl_sec": 120,  # 联网判断结果缓存时长，0=每次重新检测
+
+    "journal_enabled": True,
+    "journal_sample_sec": 60,
+    "journal_capacity": 131072,
+
+    # 通知通道：pushplus / webhook / smtp / local，并发投递
+    "notify_channels": ["pushplus"],
+    "notify_require": "any",  # any=任一通道送达即视为已提醒；all=所有已配置通道都需送达
+    "notify_timeout_sec": 8,
+    "webhook_url": "",
+    "smtp_host": "",
+    "smtp_port": 25,
+    "smtp_security": "none",  # none / starttls / ssl
+    "smtp_user": "",
+    "smtp_password": "",
+    "smtp_from": "",
+    "smtp_to": "",
+    "local_sink_path": "",  # Windows 命名管道 \\.\pipe\name 或 Unix 套接字路径
+    "send_fail_hibernate_after": 3,  # 联网但连续发送失败 N 次后休眠，0=从不；失败消息进入重发队列
+    "digest_window_sec": 0,  # >0 时窗口内的提醒合并为一条消息发送，0=逐条发送
+
+    "config_watch_sec": 5,  # 0=不监视 config.json 的外部修改
+    # 等待用户回来期间监听键盘/鼠标/会话解锁事件：立即取消倒计时并清零提醒计数
+    "input_events_enabled": True,
+    # 启动后延迟多少秒再做非关键工作（活动日志、重发队列、自启项检查、上次休眠提示），避开登录时的繁忙期
+    "startup_delay_sec": 20,
 
     "autostart_enabled": False,
 }
@@ -122,155 +190,368 @@ def migrate_config_if_needed():
     except Exception as e:
         log_error(e)
 
+def migrate_legacy_keys(user_cfg: dict) -> dict:
+    """旧版 online_hibernate_policy → online_remind_times（仅在新键缺失时迁移）。"""
+    user_cfg = dict(user_cfg)
+    if "online_remind_times" not in user_cfg and "online_hibernate_policy" in user_cfg:
+        try:
+            user_cfg["online_remind_times"] = int(user_cfg.get("online_hibernate_policy", 0))
+        except Exception:
+            pass
+    user_cfg.pop("online_hibernate_policy", None)
+    return user_cfg
+
+def parse_config_text(text: str) -> dict:
+    """解析 config.json 的内容并合并默认值；None 表示文件缺失，内容无效时抛出异常。"""
+    cfg = dict(DEFAULT_CONFIG)
+    if text is not None:
+        user_cfg = json.loads(text)
+        if not isinstance(user_cfg, dict):
+            raise ValueError("config.json is not an object")
+        cfg.update(migrate_legacy_keys(user_cfg))
+    return cfg
+
+def read_config_text(path: str = CONFIG_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def read_config_file(path: str = CONFIG_PATH) -> dict:
+    """读取并合并默认值；文件缺失返回默认配置，内容无效时抛出异常。"""
+    return parse_config_text(read_config_text(path))
+
 def load_config() -> dict:
     migrate_config_if_needed()
     ensure_dirs(APPDATA_DIR)
-    cfg = dict(DEFAULT_CONFIG)
     try:
-        if os.path.exists(CONFIG_PATH):
-            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-                user_cfg = json.load(f)
-            if isinstance(user_cfg, dict):
-                cfg.update(user_cfg)
-                if "online_remind_times" not in user_cfg and "online_hibernate_policy" in user_cfg:
-                    try:
-                        cfg["online_remind_times"] = int(user_cfg.get("online_hibernate_policy", 0))
-                    except Exception:
-                        pass
-                if "online_hibernate_policy" in cfg:
-                    cfg.pop("online_hibernate_policy", None)
+        return read_config_file()
     except Exception as e:
         log_error(e)
-    return cfg
+        return dict(DEFAULT_CONFIG)
+
+def write_file_atomic(path: str, text: str):
+    """写临时文件并 fsync 后 os.replace，休眠/断电时不会留下截断的文件。"""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ConfigStore:
+    """
+    config.json 的写入器：短时间内的多次保存合并为一次，由后台定时线程（或宿主的定时器）原子写入；
+    序列化结果与上次写入相同时跳过。flush() 同步写出尚未落盘的内容。
+    """
+
+    def __init__(self, path: str = CONFIG_PATH, delay_sec: float = 0.5):
+        self.path = path
+        self.delay_sec = delay_sec
+        self._lock = threading.Lock()
+        # 写盘（含 fsync）期间只持有 _write_lock，UI 线程调用的 save() / owns() / pending() 不被阻塞
+        self._write_lock = threading.Lock()
+        self._pending = None
+        self._writing = None
+        self._written = None
+        self._timer = None
+        # 宿主提供的延迟调度（见 use_scheduler），为 None 时使用 threading.Timer
+        self._schedule = None
+        self._scheduled = False
+        atexit.register(self.flush)
+
+    def use_scheduler(self, schedule):
+        """schedule(delay_sec, fn) 在 delay_sec 秒后调用 fn，由宿主的定时器替代后台定时线程；
+        save() 须在宿主定时器所在线程调用。"""
+        with self._lock:
+            self._schedule = schedule
+
+    def save(self, cfg: dict):
+        text = json.dumps(cfg, ensure_ascii=False, indent=2)
+        with self._lock:
+            latest = next((t for t in (self._pending, self._writing) if t is not None), self._written)
+            if text == latest:
+                return
+            self._pending = text
+            if self._schedule is not None:
+                if not self._scheduled:
+                    self._scheduled = True
+                    self._schedule(self.delay_sec, self.flush)
+            elif self._timer is None:
+                self._timer = threading.Timer(self.delay_sec, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                # 宿主侧的计划到期时发现没有待写内容即返回，不需要取消
+                self._scheduled = False
+                text, self._pending = self._pending, None
+                if text is None or text == self._written:
+                    return
+                self._writing = text
+            written = False
+            try:
+                ensure_dirs(os.path.dirname(self.path))
+                write_file_atomic(self.path, text)
+                written = True
+            except Exception as e:
+                log_error(e)
+            with self._lock:
+                self._writing = None
+                if written:
+                    self._written = text
+
+    def pending(self) -> bool:
+        """有尚未写完的内容（此时磁盘上是旧版本）。"""
+        with self._lock:
+            return self._pending is not None or self._writing is not None
+
+    def owns(self, text: str) -> bool:
+        """text 是否为本进程写出、正在写出或待写出的内容。"""
+        with self._lock:
+            return text is not None and text in (self._written, self._writing, self._pending)
+
+    def mark_synced(self, cfg: dict):
+        """磁盘内容已由外部更新为 cfg：丢弃尚未写出的旧内容，避免覆盖。"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._scheduled = False
+            self._pending = None
+            self._written = json.dumps(cfg, ensure_ascii=False, indent=2)
+
+
+_config_store = ConfigStore()
 
 def save_config(cfg: dict):
-    try:
-        ensure_dirs(APPDATA_DIR)
-        with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-            json.dump(cfg, f, ensure_ascii=False, indent=2)
-    except Exception as e:
-        log_error(e)
+    _config_store.save(cfg)
+
+def flush_config():
+    _config_store.flush()
+
+def use_config_scheduler(schedule):
+    _config_store.use_scheduler(schedule)
+
+def mark_config_synced(cfg: dict):
+    _config_store.mark_synced(cfg)
+
+def config_write_pending() -> bool:
+    return _config_store.pending()
+
+def is_own_config_text(text: str) -> bool:
+    return _config_store.owns(text)
 
 # -----------------------------
-# Single instance (Mutex)
+# Typed config
 # -----------------------------
-_single_instance_handle = None
+# 整数项取值范围（设置窗口与 Config 共用）
+CONFIG_INT_LIMITS = {
+    "uptime_hours": (0, 168),
+    "idle_minutes": (0, 24 * 60),
+    "pre_hibernate_countdown_sec": (1, 3600),
+    "resume_grace_sec": (0, 24 * 3600),
+    "net_check_timeout_sec": (1, 10),
+    "net_cache_ttl_sec": (0, 3600),
+    "online_remind_times": (0, 99),
+    "journal_sample_sec": (5, 24 * 3600),
+    "journal_capacity": (16, 1 << 24),
+    "config_watch_sec": (0, 3600),
+    "send_fail_hibernate_after": (0, 99),
+    "notify_timeout_sec": (1, 60),
+    "pushplus_rate_per_hour": (1, 3600),
+    "pushplus_burst": (1, 100),
+    "pushplus_dedup_sec": (0, 24 * 3600),
+    "digest_window_sec": (0, 3600),
+    "dns_cache_ttl_sec": (0, 24 * 3600),
+    "dns_negative_ttl_sec": (0, 3600),
+    # 预热的连接需在空闲连接过期（60 秒）前用上
+    "prewarm_lead_sec": (0, 50),
+    "startup_delay_sec": (0, 600),
+}
 
-def ensure_single_instance(mutex_name: str = r"Local\AutoShutdownReminder_SingleInstance") -> bool:
-    global _single_instance_handle
-    kernel32.CreateMutexW.argtypes = [wintypes.LPVOID, wintypes.BOOL, wintypes.LPCWSTR]
-    kernel32.CreateMutexW.restype = HANDLE_T
-    kernel32.CloseHandle.argtypes = [HANDLE_T]
-    kernel32.CloseHandle.restype = wintypes.BOOL
-
-    h = kernel32.CreateMutexW(None, True, _w(mutex_name))
-    if not h:
-        return True
-    last_err = ctypes.get_last_error()
-    if last_err == ERROR_ALREADY_EXISTS:
-        kernel32.CloseHandle(h)
-        return False
-    _single_instance_handle = h
+# net_check_method：HEAD=只取状态行；204=GET generate_204 类地址且只接受 204；GET=完整请求（读正文）
+PROBE_METHODS = ("HEAD", "204", "GET")
 
-    def _release():
+def clamp_config_int(key: str, value, default=None) -> int:
+    lo, hi = CONFIG_INT_LIMITS[key]
+    try:
+        v = int(value)
+    except Exception:
         try:
-            if _single_instance_handle:
-                kernel32.CloseHandle(_single_instance_handle)
+            v = int(DEFAULT_CONFIG[key] if default is None else default)
         except Exception:
-            pass
-    atexit.register(_release)
-    return True
+            v = int(DEFAULT_CONFIG[key])
+    return max(lo, min(hi, v))
+
+
+class Config:
+    """
+    校验后的只读配置视图。由配置 dict 构建一次（配置变化时重建），
+    阈值预先换算为 timedelta / 秒，调用方直接按属性读取，无需每次 int()/get()。
+    last_hibernate_time 等运行状态不在其中，仍保存在配置 dict 里。
+    """
+    __slots__ = (
+        "pushplus_token", "pushplus_topic", "pushplus_api", "remind_template",
+        "online_remind_times", "uptime_hours", "idle_minutes", "pre_hibernate_countdown_sec",
+        "resume_grace_sec", "net_check_url", "net_check_timeout_sec", "net_cache_ttl_sec",
+        "tray_balloon_enabled", "autostart_enabled", "input_events_enabled",
+        "journal_enabled", "journal_sample_sec", "journal_capacity", "config_watch_sec",
+        "send_fail_hibernate_after", "notify_timeout_sec",
+        "pushplus_rate_per_hour", "pushplus_burst", "pushplus_dedup_sec", "digest_window_sec",
+        "dns_cache_ttl_sec", "dns_negative_ttl_sec", "prewarm_lead_sec", "startup_delay_sec",
+        "net_check_targets", "net_check_method", "notify_channels", "notify_require", "webhook_url",
+        "smtp_host", "smtp_port", "smtp_security", "smtp_user", "smtp_password", "smtp_from", "smtp_to",
+        "local_sink_path",
+        # 派生值
+        "uptime_th", "idle_th", "idle_sec", "resume_grace", "remind_tpl", "channel_timeout_sec",
+    )
+
+    def __init__(self, cfg: dict = None):
+        d = dict(DEFAULT_CONFIG)
+        d.update(migrate_legacy_keys(cfg or {}))
+        put = lambda k, v: object.__setattr__(self, k, v)
+
+        for k in CONFIG_INT_LIMITS:
+            put(k, clamp_config_int(k, d.get(k)))
+        put("pushplus_token", str(d.get("pushplus_token") or "").strip())
+        put("pushplus_topic", str(d.get("pushplus_topic") or "").strip())
+        put("pushplus_api", str(d.get("pushplus_api") or "").strip() or DEFAULT_CONFIG["pushplus_api"])
+        put("remind_template", str(d.get("remind_template") or "").strip() or DEFAULT_REMIND_TEMPLATE)
+        put("net_check_url", str(d.get("net_check_url") or "").strip() or DEFAULT_CONFIG["net_check_url"])
+        for k in ("tray_balloon_enabled", "autostart_enabled", "journal_enabled", "input_events_enabled"):
+            put(k, bool(d.get(k)))
+
+        # 联网探测与通知通道：在这里解析一次，后台线程直接读取（Config 只读，可跨线程共享）
+        put("net_check_targets", tuple(_split_list(d.get("net_check_targets"))) or (self.net_check_url,))
+        method = str(d.get("net_check_method") or "HEAD").strip().upper()
+        put("net_check_method", method if method in PROBE_METHODS else "HEAD")
+        put("notify_channels", tuple(_split_list(d.get("notify_channels"))) or ("pushplus",))
+        put("notify_require", str(d.get("notify_require") or "any").strip().lower())
+        for k in ("webhook_url", "smtp_host", "smtp_user", "smtp_from", "local_sink_path"):
+            put(k, str(d.get(k) or "").strip())
+        put("smtp_password", str(d.get("smtp_password") or ""))
+        put("smtp_security", str(d.get("smtp_security") or "none").strip().lower())
+        try:
+            smtp_port = int(d.get("smtp_port") or 0)
+        except Exception:
+            smtp_port = 0
+        put("smtp_port", smtp_port or (465 if self.smtp_security == "ssl" else 25))
+        put("smtp_to", tuple(_split_list(d.get("smtp_to"))))
+        # 各通道单独的超时（<通道>_timeout_sec），未设置的通道使用 notify_timeout_sec
+        timeouts = {}
+        for k, v in d.items():
+            if k.endswith("_timeout_sec") and k not in CONFIG_INT_LIMITS and v:
+                try:
+                    timeouts[k[:-len("_timeout_sec")]] = float(v)
+                except Exception:
+                    pass
+        put("channel_timeout_sec", timeouts)
+
+        put("uptime_th", timedelta(hours=self.uptime_hours))
+        put("idle_th", timedelta(minutes=self.idle_minutes))
+        put("idle_sec", self.idle_minutes * 60)
+        put("resume_grace", timedelta(seconds=self.resume_grace_sec))
+        # 提醒模板只在配置变化时编译一次
+        put("remind_tpl", compile_template(self.remind_template, prepend_base_info=True))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Config is read-only; rebuild it from the config dict")
+
+    def __repr__(self):
+        return "Config(%s)" % ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__
+                                        if k not in ("pushplus_token", "smtp_password"))
+
+
+def _split_list(value):
+    """列表或逗号分隔字符串 → 去掉空白项的字符串列表。"""
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(v).strip() for v in value or () if str(v).strip()]
 
 # -----------------------------
-# Idle/Uptime (WinAPI)
+# Platform backend
 # -----------------------------
-class LASTINPUTINFO(ctypes.Structure):
-    _fields_ = [("cbSize", wintypes.UINT), ("dwTime", wintypes.DWORD)]
+_backend = None
+
+def get_backend():
+    """当前平台后端（Win32 / Linux / Fake），首次使用时按平台创建。"""
+    global _backend
+    if _backend is None:
+        from backend import default_backend
+        _backend = default_backend()
+    return _backend
 
-user32.GetLastInputInfo.argtypes = [ctypes.POINTER(LASTINPUTINFO)]
-user32.GetLastInputInfo.restype = wintypes.BOOL
-kernel32.GetTickCount64.argtypes = []
-kernel32.GetTickCount64.restype = ctypes.c_ulonglong
-kernel32.GetTickCount.argtypes = []
-kernel32.GetTickCount.restype = wintypes.DWORD
+def set_backend(backend):
+    global _backend
+    _backend = backend
 
+# -----------------------------
+# Single instance
+# -----------------------------
+def ensure_single_instance(mutex_name: str = r"Local\AutoShutdownReminder_SingleInstance") -> bool:
+    return get_backend().acquire_single_instance(mutex_name)
+
+# -----------------------------
+# Idle/Uptime
+# -----------------------------
 def get_idle_seconds() -> int:
-    lii = LASTINPUTINFO()
-    lii.cbSize = ctypes.sizeof(LASTINPUTINFO)
-    if not user32.GetLastInputInfo(ctypes.byref(lii)):
-        return 0
-    tick = kernel32.GetTickCount()
-    idle_ms = int(tick) - int(lii.dwTime)
-    if idle_ms < 0:
-        idle_ms = 0
-    return idle_ms // 1000
+    return get_backend().idle_seconds()
 
 def get_uptime_seconds() -> int:
-    return int(kernel32.GetTickCount64() // 1000)
+    return get_backend().uptime_seconds()
 
 # -----------------------------
 # Network checks
 # -----------------------------
 def is_online_winapi() -> bool:
     try:
-        flags = wintypes.DWORD(0)
-        return bool(wininet.InternetGetConnectedState(ctypes.byref(flags), 0))
+        return get_backend().is_online()
     except Exception:
         return False
 
-def _parse_host(url: str) -> str:
-    u = (url or "").strip()
-    if "://" in u:
-        u = u.split("://", 1)[1]
-    return u.split("/", 1)[0].strip()
-
-def is_online_two_level(cfg: dict) -> bool:
+def is_online_two_level(conf: Config) -> bool:
     # 1) WinAPI
     if not is_online_winapi():
         return False
 
-    # 2) DNS + lightweight HTTP GET
-    url = str(cfg.get("net_check_url", "https://baidu.com")).strip()
-    timeout = int(cfg.get("net_check_timeout_sec", 2))
-    try:
-        host = _parse_host(url)
-        if not host:
-            return False
-        socket.gethostbyname(host)
-    except Exception:
-        return False
-    try:
-        req = urlrequest.Request(url, method="GET", headers={"User-Agent": "AutoShutdown/1.0"})
-        with urlrequest.urlopen(req, timeout=timeout) as resp:
-            code = getattr(resp, "status", None) or resp.getcode()
-        return int(code) // 100 in (2, 3)
-    except Exception:
-        return False
+    # 2) 各探测目标并发竞速，第一个在线结论即返回
+    from probes import race_probes
+    return race_probes(conf).online
 
 # -----------------------------
 # Pushplus
 # -----------------------------
-def pushplus_send(cfg: dict, title: str, content: str):
-    api = str(cfg.get("pushplus_api", "https://www.pushplus.plus/send")).strip()
+def pushplus_send(conf: Config, title: str, content: str, timeout: float = 8):
+    api = conf.pushplus_api
     payload = {
-        "token": cfg.get("pushplus_token", ""),
+        "token": conf.pushplus_token,
         "title": title,
         "content": content,
-        "topic": cfg.get("pushplus_topic", ""),
+        "topic": conf.pushplus_topic,
         "template": "txt",
         "channel": "wechat"
     }
     try:
+        # 网络相关模块（ssl / http.client）在第一次发送时才导入
+        from httpclient import get_client
         data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-        req = urlrequest.Request(
+        resp = get_client().request(
+            "POST",
             api,
-            data=data,
-            method="POST",
-            headers={"Content-Type": "application/json; charset=utf-8", "User-Agent": "AutoShutdown/1.0"},
+            body=data,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+            timeout=timeout,
         )
-        with urlrequest.urlopen(req, timeout=8) as resp:
-            body = resp.read().decode("utf-8", errors="replace")
-            code = getattr(resp, "status", None) or resp.getcode()
+        body = resp.text()
+        code = resp.status
         if int(code) // 100 != 2:
             return False, f"HTTP {code}\n{body}"
         return True, body
@@ -283,6 +564,7 @@ def pushplus_send(cfg: dict, title: str, content: str):
 
 def _run_subprocess_hidden(args, capture_output=False, text=False, timeout=None, check=False):
     """Run subprocess without showing a console window (Windows)."""
+    import subprocess
     try:
         creationflags = 0
         startupinfo = None
@@ -305,36 +587,8 @@ def _run_subprocess_hidden(args, capture_output=False, text=False, timeout=None,
         # last resort fallback
         return subprocess.run(args, capture_output=capture_output, text=text, timeout=timeout, check=check, shell=False)
 
-# 修改休眠函数，增加备用方法
 def go_hibernate():
-    """
-    尝试多种方法使系统进入休眠状态：
-    1. 首先尝试使用shutdown /h命令
-    2. 如果失败，则尝试使用 rundll32 powrprof.dll,SetSuspendState
-    """
-    try:
-        # 方法1: 使用 shutdown /h 命令
-        result = _run_subprocess_hidden(["shutdown", "/h"], check=False, timeout=10)
-        if result.returncode == 0:
-            return True
-    except Exception:
-        pass
-    
-    try:
-        # 方法2: 使用 rundll32 调用电源管理函数
-        # SetSuspendState(Hibernate, ForceCritical, DisableWakeEvent)
-        result = _run_subprocess_hidden([
-            "rundll32.exe", 
-            "powrprof.dll,SetSuspendState", 
-            "1,1,0"
-        ], check=False, timeout=10)
-        if result.returncode == 0:
-            return True
-    except Exception:
-        pass
-    
-    # 如果以上方法都失败，则返回False
-    return False
+    return get_backend().hibernate()
 
 def run_powercfg(args):
     try:
@@ -373,6 +627,7 @@ def check_hibernate_available_from_powercfg_a(output: str):
 
 def elevate_enable_hibernate_via_uac() -> bool:
     try:
+        from winapi import shell32, HANDLE_T, HWND_T
         shell32.ShellExecuteW.argtypes = [HWND_T, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.LPCWSTR, ctypes.c_int]
         shell32.ShellExecuteW.restype = HANDLE_T
         ret = shell32.ShellExecuteW(None, "runas", "cmd.exe", "/c powercfg /h on", None, 1)
@@ -387,6 +642,9 @@ def elevate_enable_hibernate_via_uac() -> bool:
 
 def get_running_exe_path() -> str:
     """Get current process executable path using WinAPI (works for Nuitka-built exe)."""
+    if os.name != "nt":
+        return os.path.abspath(sys.executable)
+    from winapi import kernel32
     try:
         kernel32.GetModuleFileNameW.argtypes = [wintypes.HMODULE, wintypes.LPWSTR, wintypes.DWORD]
         kernel32.GetModuleFileNameW.restype = wintypes.DWORD
@@ -465,26 +723,6 @@ def get_startup_shortcut_path() -> str:
     return os.path.join(get_startup_folder(), STARTUP_SHORTCUT_NAME)
 
 
-def _ps_escape(s: str) -> str:
-    # Escape for embedding in single-quoted PowerShell string
-    return (s or "").replace("'", "''")
-
-
-def run_powershell(ps: str, timeout_sec: int = 10):
-    """Run a PowerShell snippet (UTF-8 output). Returns (rc, stdout, stderr)."""
-    try:
-        p = _run_subprocess_hidden(
-            ["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-Command", ps],
-            capture_output=True,
-            text=True,
-            timeout=timeout_sec,
-            check=False,
-        )
-        return int(p.returncode), (p.stdout or ""), (p.stderr or "")
-    except Exception as e:
-        return 1, "", repr(e)
-
-
 def build_expected_shortcut_spec():
     """
     Returns (target_path, arguments, icon_location, working_dir).
@@ -511,20 +749,9 @@ def create_startup_shortcut() -> bool:
         ensure_dirs(get_startup_folder())
         lnk = get_startup_shortcut_path()
         target, args, icon_loc, wd = build_expected_shortcut_spec()
-
-        ps = f"""
-$ws = New-Object -ComObject WScript.Shell
-$sc = $ws.CreateShortcut('{_ps_escape(lnk)}')
-$sc.TargetPath = '{_ps_escape(target)}'
-$sc.Arguments = '{_ps_escape(args)}'
-$sc.WorkingDirectory = '{_ps_escape(wd)}'
-$sc.IconLocation = '{_ps_escape(icon_loc)},0'
-# WindowStyle: 7 = Minimized, 1 = Normal. Use 7 to reduce focus stealing.
-$sc.WindowStyle = 7
-$sc.Save()
-"""
-        rc, out, err = run_powershell(ps, timeout_sec=10)
-        return rc == 0 and os.path.exists(lnk)
+        # WindowStyle: 7 = Minimized, 1 = Normal. Use 7 to reduce focus stealing.
+        write_lnk(lnk, ShellLink(target, args, wd, icon_loc, 0, SW_SHOWMINNOACTIVE))
+        return os.path.exists(lnk)
     except Exception as e:
         log_error(e)
         return False
@@ -544,26 +771,15 @@ def delete_startup_shortcut() -> bool:
 def read_startup_shortcut_spec():
     """
     Returns dict: {TargetPath, Arguments, IconLocation, WorkingDirectory} or None if missing/unreadable.
+    Parsed directly from the .lnk file (no PowerShell / COM).
     """
     lnk = get_startup_shortcut_path()
     if not os.path.exists(lnk):
         return None
-    ps = f"""
-$ws = New-Object -ComObject WScript.Shell
-$sc = $ws.CreateShortcut('{_ps_escape(lnk)}')
-@{{
-  TargetPath=$sc.TargetPath;
-  Arguments=$sc.Arguments;
-  IconLocation=$sc.IconLocation;
-  WorkingDirectory=$sc.WorkingDirectory
-}} | ConvertTo-Json -Compress
-"""
-    rc, out, err = run_powershell(ps, timeout_sec=10)
-    if rc != 0:
-        return None
     try:
-        return json.loads(out.strip())
-    except Exception:
+        return read_lnk(lnk).to_spec()
+    except Exception as e:
+        log_error(e)
         return None
 
 
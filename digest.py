@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+SEPARATOR = "\n\n————————\n\n"
+
+# -----------------------------
+# Digest buffer
+# -----------------------------
+class Digest:
+    """
+    合并窗口内的提醒：首条加入时开启窗口，窗口结束时渲染为一条消息发送。
+    只保存各次触发的 base_info，发送时再套用提醒模板（其余占位符按发送时的状态计算）。
+    """
+
+    def __init__(self):
+        self.title = ""
+        self.blocks = []
+        self.opened_at = None
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def add(self, title: str, base_info: str, now=None) -> bool:
+        """加入一条提醒；返回 True 表示这是窗口内的第一条（调用方据此启动定时器）。"""
+        first = not self.blocks
+        if first:
+            self.title = title
+            self.opened_at = now
+        self.blocks.append(base_info)
+        return first
+
+    def render(self, template, ctx):
+        """返回 (title, content)：多条时 {base_info} 替换为按序号拼接的各段信息。"""
+        n = len(self.blocks)
+        if n == 1:
+            joined = self.blocks[0]
+            title = self.title
+        else:
+            joined = SEPARATOR.join(f"【{i}/{n}】\n{b}" for i, b in enumerate(self.blocks, 1))
+            title = f"{self.title}（合并 {n} 条）"
+        return title, template.render(ctx.with_values(base_info=joined))
+
+    def clear(self):
+        self.title = ""
+        self.blocks = []
+        self.opened_at = None
+
+
+def merge_messages(msgs):
+    """合并重发队列中到期的多条消息（已渲染的正文直接拼接）。"""
+    n = len(msgs)
+    title = msgs[0]["title"] if n == 1 else f"{msgs[0]['title']}（合并 {n} 条）"
+    return title, SEPARATOR.join(m["content"] for m in msgs)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+import time
+import socket
+import threading
+
+from core import log_error, log_stats
+
+# -----------------------------
+# Resolver cache
+# -----------------------------
+class Resolver:
+    """
+    进程内 DNS 缓存，联网探测与 HTTP 客户端共用。
+    getaddrinfo 拿不到记录的 TTL，成功结果按 ttl_sec 缓存，解析失败按 negative_ttl_sec 缓存；
+    同一主机的并发解析只发起一次，其余调用者等待同一结果。
+    """
+
+    def __init__(self, ttl_sec: float = 300.0, negative_ttl_sec: float = 30.0, clock=time.monotonic):
+        self.ttl_sec = ttl_sec
+        self.negative_ttl_sec = negative_ttl_sec
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}       # (host, family, type) -> (infos 或异常, expires_at)
+        self._inflight = {}      # key -> threading.Event
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+
+    def configure(self, ttl_sec: float = None, negative_ttl_sec: float = None):
+        with self._lock:
+            if ttl_sec is not None:
+                self.ttl_sec = ttl_sec
+            if negative_ttl_sec is not None:
+                self.negative_ttl_sec = negative_ttl_sec
+            if self.ttl_sec <= 0:
+                self._entries.clear()
+
+    @staticmethod
+    def _is_literal(host: str) -> bool:
+        import ipaddress
+        try:
+            ipaddress.ip_address(host)
+            return True
+        except ValueError:
+            return False
+
+    def getaddrinfo(self, host, port, family=0, type=socket.SOCK_STREAM, proto=0, flags=0, force=False):
+        """与 socket.getaddrinfo 相同的返回值；force=True 时忽略缓存重新解析（结果仍写入缓存）。"""
+        if not host or self.ttl_sec <= 0 or self._is_literal(host):
+            return socket.getaddrinfo(host, port, family, type, proto, flags)
+        key = (host.lower(), family, type)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if not force and entry is not None and entry[1] > self.clock():
+                    value = entry[0]
+                    if isinstance(value, Exception):
+                        self.negative_hits += 1
+                        raise value
+                    self.hits += 1
+                    return _with_port(value, port)
+                waiter = self._inflight.get(key)
+                if waiter is None:
+                    waiter = self._inflight[key] = threading.Event()
+                    break
+            # 其他线程正在解析同一主机
+            waiter.wait()
+            force = False
+
+        try:
+            value = self._resolve(host, family, type, proto, flags)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            waiter.set()
+        if isinstance(value, Exception):
+            raise value
+        return _with_port(value, port)
+
+    def _resolve(self, host, family, type, proto, flags):
+        t0 = time.perf_counter()
+        try:
+            value = socket.getaddrinfo(host, None, family, type, proto, flags)
+            ttl = self.ttl_sec
+        except socket.gaierror as e:
+            value = e
+            ttl = self.negative_ttl_sec
+        except OSError as e:
+            # 超时等临时错误不做负缓存
+            value = e
+            ttl = 0
+        with self._lock:
+            self.misses += 1
+            if ttl > 0:
+                self._entries[(host.lower(), family, type)] = (value, self.clock() + ttl)
+        log_stats("dns", host=host, ok=not isinstance(value, Exception),
+                  ms=round((time.perf_counter() - t0) * 1000.0, 1), **self.stats())
+        return value
+
+    def invalidate(self, host: str = None):
+        """连接失败时丢弃该主机的缓存（地址可能已变），None 表示全部。"""
+        with self._lock:
+            if host is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == host.lower()]:
+                    del self._entries[key]
+
+    def expires_in(self, host: str, family=0, type=socket.SOCK_STREAM):
+        with self._lock:
+            entry = self._entries.get((host.lower(), family, type))
+        return None if entry is None else entry[1] - self.clock()
+
+    def prefetch(self, hosts, within_sec: float = 0.0):
+        """刷新缺失或 within_sec 秒内将过期的条目（在预计触发之前调用）。"""
+        if self.ttl_sec <= 0:
+            return
+        for host in dict.fromkeys(hosts):
+            if not host or self._is_literal(host):
+                continue
+            remaining = self.expires_in(host)
+            if remaining is not None and remaining > within_sec:
+                continue
+            try:
+                self.getaddrinfo(host, None, force=True)
+            except OSError:
+                pass
+            except Exception as e:
+                log_error(e)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "negative_hits": self.negative_hits}
+
+
+def _with_port(infos, port):
+    """缓存的地址不含端口，按调用方的端口填入 sockaddr。"""
+    if port is None:
+        return list(infos)
+    try:
+        port = int(port)
+    except (TypeError, ValueError):
+        port = socket.getservbyname(str(port))
+    return [(fam, typ, proto, canon, (sa[0], port) + tuple(sa[2:])) for fam, typ, proto, canon, sa in infos]
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+def get_resolver() -> Resolver:
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = Resolver()
+        return _resolver
@@ -0,0 +1,572 @@
+# -*- coding: utf-8 -*-
+"""
+共享的 keep-alive HTTP 客户端（基于 http.client）：按 (scheme, host, port, 代理) 复用连接，
+空闲超时自动淘汰，HTTPS 复用 TLS 会话，代理设置按主机缓存，每次请求记录耗时。
+
+    python httpclient.py --bench      # 与 urllib 对比（本地桩服务器）
+"""
+
+import ssl
+import sys
+import time
+import errno
+import functools
+import select
+import socket
+import selectors
+import threading
+import http.client
+from urllib.parse import urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+USER_AGENT = "AutoShutdown/1.0"
+# Happy Eyeballs（RFC 8305）：上一个地址未连上时，间隔多久启动下一个地址族的连接
+HAPPY_EYEBALLS_DELAY = 0.25
+
+# 复用的连接在发送前已被服务端关闭时，这些异常表示需要换新连接重试一次
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                 ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+# 请求已完整发出后才出错时，服务端可能已经处理过：只有这些方法可以安全重发
+_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+# 带 cancel 的请求在等待应答时按此间隔检查是否已被放弃
+_CANCEL_POLL_SEC = 0.05
+
+
+# -----------------------------
+# Happy Eyeballs connect
+# -----------------------------
+# 非阻塞 connect 进行中（Windows 为 WSAEWOULDBLOCK）
+_CONNECT_IN_PROGRESS = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN, 10035}
+
+
+def _interleave_families(infos):
+    """按 RFC 8305 交替排列地址族：首个地址的地址族优先，其后 IPv6 / IPv4 轮流。"""
+    if not infos:
+        return []
+    first = infos[0][0]
+    a = [i for i in infos if i[0] == first]
+    b = [i for i in infos if i[0] != first]
+    out = []
+    for i in range(max(len(a), len(b))):
+        out.extend(x[i] for x in (a, b) if i < len(x))
+    return out
+
+
+def happy_eyeballs_connect(address, timeout=None, source_address=None, delay: float = HAPPY_EYEBALLS_DELAY,
+                           cancel=None):
+    """
+    与 socket.create_connection 参数兼容：IPv6 / IPv4 地址交替、间隔 delay 秒依次发起非阻塞连接，
+    先连上的胜出并关闭其余连接。cancel（threading.Event）被置位时放弃连接。
+    """
+    # core 依赖本模块，DNS 缓存（依赖 core）在使用时再导入
+    from dnscache import get_resolver
+
+    host, port = address
+    deadline = None if timeout is None else time.monotonic() + timeout
+    resolver = get_resolver()
+    infos = _interleave_families(resolver.getaddrinfo(host, port, 0, socket.SOCK_STREAM))
+    if not infos:
+        raise OSError(f"getaddrinfo returned no addresses for {host!r}")
+
+    sel = selectors.DefaultSelector()
+    pending = []
+    errors = []
+    winner = None
+    idx = 0
+    next_start = time.monotonic()
+    try:
+        while winner is None:
+            now = time.monotonic()
+            if cancel is not None and cancel.is_set():
+                raise ConnectionAbortedError("connect cancelled")
+            if deadline is not None and now >= deadline:
+                raise socket.timeout("timed out")
+
+            if idx < len(infos) and (now >= next_start or not pending):
+                family, type_, proto, _, sa = infos[idx]
+                idx += 1
+                sock = None
+                try:
+                    sock = socket.socket(family, type_, proto)
+                    sock.setblocking(False)
+                    if source_address:
+                        sock.bind(source_address)
+                    err = sock.connect_ex(sa)
+                    if err not in _CONNECT_IN_PROGRESS:
+                        raise OSError(err, f"connect {sa!r} failed")
+                    if err == 0:
+                        winner = sock
+                        break
+                    sel.register(sock, selectors.EVENT_WRITE)
+                    pending.append(sock)
+                except OSError as e:
+                    errors.append(e)
+                    if sock is not None:
+                        sock.close()
+                    continue
+                next_start = now + delay
+                continue
+
+            if not pending:
+                # 所有地址都连不上：缓存的地址可能已过时
+                resolver.invalidate(host)
+                raise errors[-1]
+
+            waits = [0.05] if cancel is not None else []
+            if deadline is not None:
+                waits.append(deadline - now)
+            if idx < len(infos):
+                waits.append(next_start - now)
+            for key, _ in sel.select(max(0.0, min(waits)) if waits else None):
+                sock = key.fileobj
+                sel.unregister(sock)
+                pending.remove(sock)
+                err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if err == 0:
+                    winner = sock
+                    break
+                errors.append(OSError(err, f"connect failed: {err}"))
+                sock.close()
+                # 当前地址失败，立即尝试下一个
+                next_start = now
+    finally:
+        for sock in pending:
+            if sock is not winner:
+                sock.close()
+        sel.close()
+
+    winner.setblocking(True)
+    winner.settimeout(timeout)
+    return winner
+
+
+class HttpResponse:
+    __slots__ = ("status", "reason", "headers", "body", "timing")
+
+    def __init__(self, status, reason, headers, body, timing):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.timing = timing
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return (self.body or b"").decode(encoding, errors="replace")
+
+
+class ProbeResponse:
+    __slots__ = ("status", "reason", "timing")
+
+    def __init__(self, status, reason, timing):
+        self.status = status
+        self.reason = reason
+        self.timing = timing
+
+
+class _HTTPSConnection(http.client.HTTPSConnection):
+    """握手时带上同一主机上次的 TLS 会话，实现会话复用。"""
+
+    def __init__(self, *args, session_cache=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._session_cache = session_cache if session_cache is not None else {}
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        server_hostname = self._tunnel_host or self.host
+        session = self._session_cache.get(server_hostname)
+        try:
+            self.sock = self._context.wrap_socket(self.sock, server_hostname=server_hostname, session=session)
+        except ssl.SSLError:
+            if session is None:
+                raise
+            # 会话失效：不带会话重新握手
+            self._session_cache.pop(server_hostname, None)
+            http.client.HTTPConnection.connect(self)
+            self.sock = self._context.wrap_socket(self.sock, server_hostname=server_hostname)
+        self.remember_session()
+
+    def remember_session(self):
+        # TLS 1.3 的会话票据在首个响应之后才到达，读完响应后再记录一次
+        try:
+            session = self.sock.session if self.sock is not None else None
+        except Exception:
+            session = None
+        if session is not None:
+            self._session_cache[self._tunnel_host or self.host] = session
+
+    @property
+    def session_reused(self) -> bool:
+        try:
+            return bool(self.sock.session_reused)
+        except Exception:
+            return False
+
+
+class HttpClient:
+    def __init__(self, max_idle_sec: float = 60.0, max_per_host: int = 2, ssl_context=None,
+                 user_agent: str = USER_AGENT, use_proxies: bool = True):
+        self.max_idle_sec = max_idle_sec
+        self.max_per_host = max_per_host
+        self.ssl_context = ssl_context or ssl.create_default_context()
+        self.user_agent = user_agent
+        self.use_proxies = use_proxies
+        self._lock = threading.Lock()
+        self._idle = {}          # key -> [(conn, last_used)]
+        self._tls_sessions = {}
+        self._proxies = None
+        self._proxy_for_host = {}
+
+    # -----------------------------
+    # Proxies
+    # -----------------------------
+    def _proxy(self, scheme: str, host: str):
+        if not self.use_proxies:
+            return None
+        key = (scheme, host)
+        with self._lock:
+            if key in self._proxy_for_host:
+                return self._proxy_for_host[key]
+            if self._proxies is None:
+                self._proxies = getproxies()
+            proxies = self._proxies
+        proxy = proxies.get(scheme)
+        if proxy:
+            try:
+                if proxy_bypass(host):
+                    proxy = None
+            except Exception:
+                pass
+        parsed = None
+        if proxy:
+            p = urlsplit(proxy if "://" in proxy else "http://" + proxy)
+            parsed = (p.hostname, p.port or 80)
+        with self._lock:
+            self._proxy_for_host[key] = parsed
+        return parsed
+
+    # -----------------------------
+    # Pool
+    # -----------------------------
+    def _new_conn(self, scheme, host, port, proxy, timeout, cancel=None):
+        if proxy:
+            if scheme == "https":
+                conn = _HTTPSConnection(proxy[0], proxy[1], timeout=timeout, context=self.ssl_context,
+                                        session_cache=self._tls_sessions)
+                conn.set_tunnel(host, port)
+            else:
+                conn = http.client.HTTPConnection(proxy[0], proxy[1], timeout=timeout)
+        elif scheme == "https":
+            conn = _HTTPSConnection(host, port, timeout=timeout, context=self.ssl_context,
+                                    session_cache=self._tls_sessions)
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        # 双栈主机上 IPv6 不通时不必等到超时才退回 IPv4
+        conn._create_connection = (happy_eyeballs_connect if cancel is None
+                                   else functools.partial(happy_eyeballs_connect, cancel=cancel))
+        return conn
+
+    def _checkout(self, key):
+        now = time.monotonic()
+        with self._lock:
+            conns = self._idle.get(key)
+            while conns:
+                conn, last_used = conns.pop()
+                if now - last_used <= self.max_idle_sec:
+                    return conn
+                conn.close()
+        return None
+
+    def _checkin(self, key, conn):
+        with self._lock:
+            conns = self._idle.setdefault(key, [])
+            if len(conns) >= self.max_per_host:
+                conn.close()
+                return
+            conns.append((conn, time.monotonic()))
+
+    def warm(self, url: str, timeout: float = 8.0) -> bool:
+        """
+        预先建立到 url 所在主机的连接（TCP + TLS 握手）并放入空闲池，随后的请求直接复用。
+        池中已有可用连接时不重复建立，返回 False。
+        """
+        u = urlsplit(url)
+        scheme = (u.scheme or "http").lower()
+        if scheme not in ("http", "https") or not u.hostname:
+            raise ValueError(f"unsupported url: {url!r}")
+        host = u.hostname
+        port = u.port or (443 if scheme == "https" else 80)
+        proxy = self._proxy(scheme, host)
+        key = (scheme, host, port, proxy)
+        self.evict_idle()
+        with self._lock:
+            if self._idle.get(key):
+                return False
+        conn = self._new_conn(scheme, host, port, proxy, timeout)
+        try:
+            conn.connect()
+            conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except Exception:
+            conn.close()
+            raise
+        self._checkin(key, conn)
+        return True
+
+    def evict_idle(self):
+        now = time.monotonic()
+        with self._lock:
+            for key, conns in list(self._idle.items()):
+                keep = []
+                for conn, last_used in conns:
+                    if now - last_used <= self.max_idle_sec:
+                        keep.append((conn, last_used))
+                    else:
+                        conn.close()
+                if keep:
+                    self._idle[key] = keep
+                else:
+                    del self._idle[key]
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn, _ in conns:
+                    conn.close()
+            self._idle.clear()
+
+    # -----------------------------
+    # Requests
+    # -----------------------------
+    def request(self, method: str, url: str, body: bytes = None, headers: dict = None,
+                timeout: float = 8.0, cancel=None) -> HttpResponse:
+        """cancel（threading.Event）被置位时，在连接中或请求发出后、读取应答前放弃（ConnectionAbortedError）。"""
+        u = urlsplit(url)
+        scheme = (u.scheme or "http").lower()
+        if scheme not in ("http", "https") or not u.hostname:
+            raise ValueError(f"unsupported url: {url!r}")
+        host = u.hostname
+        port = u.port or (443 if scheme == "https" else 80)
+        proxy = self._proxy(scheme, host)
+        key = (scheme, host, port, proxy)
+
+        path = u.path or "/"
+        if u.query:
+            path += "?" + u.query
+        if proxy and scheme == "http":
+            path = f"http://{u.netloc}{path}"
+
+        hdrs = {"User-Agent": self.user_agent}
+        hdrs.update(headers or {})
+
+        self.evict_idle()
+        for attempt in (0, 1):
+            conn = self._checkout(key) if attempt == 0 else None
+            reused = conn is not None
+            if conn is None:
+                conn = self._new_conn(scheme, host, port, proxy, timeout, cancel)
+            else:
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+
+            t0 = time.perf_counter()
+            connect_ms = 0.0
+            sent = False
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                    connect_ms = (time.perf_counter() - t0) * 1000.0
+                    # 长连接上的小请求不等待 Nagle 合并
+                    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                t1 = time.perf_counter()
+                conn.request(method, path, body=body, headers=hdrs)
+                sent = True
+                self._wait_readable(conn.sock, time.perf_counter() + timeout, cancel)
+                resp = conn.getresponse()
+                ttfb_ms = (time.perf_counter() - t1) * 1000.0
+                data = resp.read() if method != "HEAD" else b""
+            except _STALE_ERRORS:
+                conn.close()
+                # POST 等请求发出后断开（RemoteDisconnected 等）时不重发，交给重发队列（带去重）处理，避免重复送达
+                cancelled = cancel is not None and cancel.is_set()
+                if reused and not cancelled and (not sent or method.upper() in _IDEMPOTENT_METHODS):
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            timing = {
+                "reused": reused,
+                "connect_ms": round(connect_ms, 2),
+                "ttfb_ms": round(ttfb_ms, 2),
+                "total_ms": round((time.perf_counter() - t0) * 1000.0, 2),
+                "tls_resumed": bool(getattr(conn, "session_reused", False)) and not reused,
+                "body_bytes": len(data),
+            }
+            if isinstance(conn, _HTTPSConnection):
+                conn.remember_session()
+            if resp.will_close:
+                conn.close()
+            else:
+                self._checkin(key, conn)
+            return HttpResponse(resp.status, resp.reason, dict(resp.getheaders()), data, timing)
+        raise http.client.RemoteDisconnected("connection closed")
+
+    def probe(self, url: str, method: str = "HEAD", timeout: float = 2.0, cancel=None) -> ProbeResponse:
+        """
+        联网探测用的最小请求：新建连接（经代理时同样走隧道），发送 Connection: close 的请求，
+        只读取状态行即关闭，不读响应头与正文。timing 中记录收发字节数与首字节时间。
+        cancel（threading.Event）被置位时立即关闭连接并抛出 ConnectionAbortedError。
+        """
+        u = urlsplit(url)
+        scheme = (u.scheme or "http").lower()
+        if scheme not in ("http", "https") or not u.hostname:
+            raise ValueError(f"unsupported url: {url!r}")
+        host = u.hostname
+        port = u.port or (443 if scheme == "https" else 80)
+        proxy = self._proxy(scheme, host)
+        netloc = u.netloc.rsplit("@", 1)[-1]
+        path = u.path or "/"
+        if u.query:
+            path += "?" + u.query
+        if proxy and scheme == "http":
+            path = f"http://{netloc}{path}"
+        req = (f"{method} {path} HTTP/1.1\r\nHost: {netloc}\r\nUser-Agent: {self.user_agent}\r\n"
+               f"Accept: */*\r\nConnection: close\r\n\r\n").encode("latin-1")
+
+        conn = self._new_conn(scheme, host, port, proxy, timeout, cancel)
+        t0 = time.perf_counter()
+        try:
+            conn.connect()
+            connect_ms = (time.perf_counter() - t0) * 1000.0
+            sock = conn.sock
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            t1 = time.perf_counter()
+            sock.sendall(req)
+            deadline = time.perf_counter() + timeout
+            buf = b""
+            ttfb_ms = None
+            while b"\r\n" not in buf and len(buf) < 1024:
+                self._wait_readable(sock, deadline, cancel)
+                chunk = sock.recv(256)
+                if ttfb_ms is None:
+                    ttfb_ms = (time.perf_counter() - t1) * 1000.0
+                if not chunk:
+                    break
+                buf += chunk
+            tls_resumed = bool(getattr(conn, "session_reused", False))
+            if isinstance(conn, _HTTPSConnection):
+                conn.remember_session()
+        finally:
+            conn.close()
+
+        line = buf.split(b"\r\n", 1)[0].decode("latin-1", errors="replace")
+        parts = line.split(" ", 2)
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            raise http.client.BadStatusLine(line)
+        timing = {
+            "connect_ms": round(connect_ms, 2),
+            "ttfb_ms": round(ttfb_ms or 0.0, 2),
+            "total_ms": round((time.perf_counter() - t0) * 1000.0, 2),
+            "bytes_sent": len(req),
+            "bytes_received": len(buf),
+            "tls_resumed": tls_resumed,
+        }
+        return ProbeResponse(int(parts[1]), parts[2] if len(parts) > 2 else "", timing)
+
+    @staticmethod
+    def _wait_readable(sock, deadline: float, cancel):
+        """
+        有 cancel 时分段等待应答可读，被放弃的请求不必等到超时才释放连接；
+        到截止时间仍不可读则返回，由随后的读取按套接字超时报错。
+        """
+        if cancel is None:
+            return
+        while True:
+            if cancel.is_set():
+                raise ConnectionAbortedError("request cancelled")
+            pending = getattr(sock, "pending", None)
+            if pending is not None and pending():
+                return
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            readable, _, _ = select.select([sock], [], [], min(_CANCEL_POLL_SEC, remaining))
+            if readable:
+                return
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> HttpClient:
+    """进程内共享的客户端（pushplus 与联网检测共用连接池）。"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+def _bench(n: int = 200):
+    import json
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    from urllib import request as urlrequest
+
+    class Stub(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        wbufsize = -1  # 响应头与正文一次写出
+
+        def _reply(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            body = b'{"code":200,"msg":"ok"}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        do_GET = _reply
+        do_POST = _reply
+
+        def log_message(self, *args):
+            pass
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{srv.server_address[1]}/send"
+    payload = json.dumps({"title": "bench", "content": "x" * 256}).encode("utf-8")
+    headers = {"Content-Type": "application/json; charset=utf-8", "User-Agent": USER_AGENT}
+
+    opener = urlrequest.build_opener(urlrequest.ProxyHandler({}))
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with opener.open(urlrequest.Request(url, data=payload, method="POST", headers=headers), timeout=5) as r:
+            r.read()
+    t_urllib = time.perf_counter() - t0
+
+    client = HttpClient(use_proxies=False)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        client.request("POST", url, body=payload, headers=headers, timeout=5)
+    t_pool = time.perf_counter() - t0
+    client.close()
+    srv.shutdown()
+
+    print(json.dumps({
+        "requests": n,
+        "urllib_ms_per_req": round(t_urllib * 1000.0 / n, 3),
+        "pooled_ms_per_req": round(t_pool * 1000.0 / n, 3),
+        "speedup": round(t_urllib / t_pool, 2) if t_pool else None,
+    }))
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        _bench()
+    else:
+        print(__doc__.strip())
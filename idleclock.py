@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+from core import log_stats
+
+# GetTickCount / LASTINPUTINFO.dwTime 为 32 位毫秒计数，约 49.7 天回绕一次
+TICK_WRAP = 1 << 32
+TICK_MASK = TICK_WRAP - 1
+
+# -----------------------------
+# 64-bit idle clock
+# -----------------------------
+class IdleClock:
+    """
+    把 32 位的最后输入时刻（dwTime）还原到 64 位的开机毫秒数（GetTickCount64）上：
+    取与当前时刻同一回绕周期的值，若比当前时刻晚则属于上一周期。
+    dwTime 不变时沿用上次还原的结果，因此只要两次采样间隔小于一个回绕周期，
+    空闲时长可以超过 49.7 天。线程安全（活动日志采样线程也会读取）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._raw = None
+        self._last_input = None
+        self._epoch = None
+
+    def last_input_ms(self, raw_tick: int, now_ms: int) -> int:
+        """raw_tick 为 32 位最后输入时刻，now_ms 为 64 位当前时刻，返回 64 位最后输入时刻。"""
+        raw_tick = int(raw_tick) & TICK_MASK
+        now_ms = int(now_ms)
+        with self._lock:
+            if raw_tick == self._raw and self._last_input is not None and self._last_input <= now_ms:
+                last = self._last_input
+            else:
+                last = (now_ms & ~TICK_MASK) | raw_tick
+                if last > now_ms:
+                    # 输入发生在本次回绕之前
+                    last -= TICK_WRAP
+                if last < 0:
+                    # 开机不足一个周期却晚于当前时刻：数据无效，按刚有输入处理
+                    last = now_ms
+                self._raw = raw_tick
+                self._last_input = last
+            epoch = now_ms >> 32
+            wrapped = self._epoch is not None and epoch != self._epoch
+            self._epoch = epoch
+        if wrapped:
+            log_stats("tick_wrap", epoch=epoch, idle_ms=now_ms - last)
+        return last
+
+    def idle_ms(self, raw_tick: int, now_ms: int) -> int:
+        return max(0, int(now_ms) - self.last_input_ms(raw_tick, now_ms))
+
+    def reset(self):
+        """重新开机（tick 从 0 开始）后丢弃缓存的还原结果。"""
+        with self._lock:
+            self._raw = None
+            self._last_input = None
+            self._epoch = None
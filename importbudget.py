@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+启动导入耗时预算：用 python -X importtime 多次测量 `import app` 的累计耗时（取中位数），
+与 importtime.json 中按版本（APP_VERSION）和平台记录的基准比较；超出容差或启动时导入了
+应延迟加载的模块（ssl / http.client / smtplib 等）时返回 1。
+
+    python importbudget.py              # 检查
+    python importbudget.py --record     # 发布前记录当前版本的基准
+"""
+
+import os
+import sys
+import json
+import tempfile
+import argparse
+import statistics
+import subprocess
+
+from constants import APP_VERSION
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RECORD_PATH = os.path.join(HERE, "importtime.json")
+
+# 只在第一次联网检测 / 发送 / 调用外部命令时才需要的模块，启动阶段不应导入
+DEFERRED_MODULES = (
+    "ssl", "http.client", "urllib.request", "smtplib", "email", "subprocess", "concurrent.futures",
+    "hashlib", "ipaddress", "httpclient", "probes", "ratelimit",
+)
+
+# -----------------------------
+# Measurement
+# -----------------------------
+def measure_once(module: str = "app"):
+    """返回 (module 的累计导入耗时 ms, {模块名: 累计 ms})。"""
+    env = dict(os.environ, APPDATA=tempfile.mkdtemp(prefix="importbudget-"))
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                       cwd=HERE, env=env, capture_output=True, text=True, check=False)
+    if r.returncode != 0:
+        raise RuntimeError(r.stderr.strip().splitlines()[-1] if r.stderr.strip() else f"exit {r.returncode}")
+    total = None
+    modules = {}
+    for ln in r.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not ln.startswith("import time:") or "|" not in ln:
+            continue
+        parts = ln[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        cumulative_ms = int(parts[1]) / 1000.0
+        modules[name] = cumulative_ms
+        if parts[2].rstrip() == " " + module:
+            total = cumulative_ms
+    if total is None:
+        raise RuntimeError(f"no importtime entry for {module}")
+    return total, modules
+
+
+def measure(runs: int = 5, module: str = "app"):
+    """多次测量取中位数（第一次通常包含 .pyc 编译，单独丢弃）。"""
+    measure_once(module)
+    totals = []
+    modules = {}
+    for _ in range(max(1, runs)):
+        total, modules = measure_once(module)
+        totals.append(total)
+    return statistics.median(totals), modules
+
+
+def eager_deferred(modules) -> list:
+    return sorted(m for m in modules
+                  if any(m == d or m.startswith(d + ".") for d in DEFERRED_MODULES))
+
+# -----------------------------
+# Records
+# -----------------------------
+def load_records(path: str = RECORD_PATH) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _version_key(v: str):
+    return tuple(int(x) if x.isdigit() else 0 for x in str(v).split("."))
+
+
+def baseline(records: dict, version: str = APP_VERSION, platform: str = sys.platform):
+    """当前版本的基准；没有时取最近一个记录了该平台的版本。返回 (版本, 记录) 或 (None, None)。"""
+    if platform in records.get(version, {}):
+        return version, records[version][platform]
+    for v in sorted(records, key=_version_key, reverse=True):
+        if platform in records[v]:
+            return v, records[v][platform]
+    return None, None
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="AutoShutdown startup import-time budget")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown over the baseline (fraction)")
+    ap.add_argument("--record", action="store_true", help=f"record the measurement for version {APP_VERSION}")
+    ap.add_argument("--top", type=int, default=10, help="print the N slowest modules")
+    args = ap.parse_args(argv)
+
+    total, modules = measure(args.runs)
+    eager = eager_deferred(modules)
+    slowest = sorted(((ms, name) for name, ms in modules.items() if name != "app"), reverse=True)[:args.top]
+    print(json.dumps({"version": APP_VERSION, "platform": sys.platform, "app_ms": round(total, 1),
+                      "eager_deferred": eager,
+                      "slowest": [[name, round(ms, 1)] for ms, name in slowest]}, ensure_ascii=False))
+
+    if eager:
+        print(f"FAIL: imported at startup: {', '.join(eager)}", file=sys.stderr)
+        return 1
+
+    records = load_records()
+    if args.record:
+        records.setdefault(APP_VERSION, {})[sys.platform] = {
+            "app_ms": round(total, 1),
+            "python": "%d.%d.%d" % sys.version_info[:3],
+            "modules": len(modules),
+        }
+        with open(RECORD_PATH, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"recorded {APP_VERSION}/{sys.platform}: {total:.1f} ms", file=sys.stderr)
+        return 0
+
+    version, base = baseline(records)
+    if base is None:
+        print(f"no baseline for {sys.platform}; run with --record", file=sys.stderr)
+        return 0
+    budget = base["app_ms"] * (1.0 + args.tolerance)
+    if total > budget:
+        print(f"FAIL: import app {total:.1f} ms > budget {budget:.1f} ms (baseline {version}: {base['app_ms']} ms)",
+              file=sys.stderr)
+        return 1
+    print(f"OK: import app {total:.1f} ms <= budget {budget:.1f} ms (baseline {version})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
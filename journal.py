@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+import os
+import mmap
+import time
+import struct
+import threading
+
+from core import ensure_dirs, log_error, APPDATA_DIR
+
+# -----------------------------
+# Record layout
+# -----------------------------
+JOURNAL_PATH = os.path.join(APPDATA_DIR, "activity.bin")
+
+MAGIC = b"ASJ1"
+VERSION = 1
+# magic, version, record_size, capacity, reserved, count(累计写入条数)
+_HEADER = struct.Struct("<4sHHIIQ")
+_COUNT_OFFSET = 16
+HEADER_SIZE = 32
+# 时间戳(epoch 秒)、空闲秒、开机秒、联网(-1 未知/0/1)、事件类型
+RECORD = struct.Struct("<dIIbB2x")
+
+OUTCOME_SAMPLE = 0
+OUTCOME_REMIND_OK = 1
+OUTCOME_REMIND_FAIL = 2
+OUTCOME_COUNTDOWN = 3
+OUTCOME_HIBERNATE = 4
+OUTCOME_CANCEL = 5
+OUTCOME_RESUME = 6
+OUTCOME_OFFLINE = 7
+
+OUTCOME_NAMES = {
+    OUTCOME_SAMPLE: "sample",
+    OUTCOME_REMIND_OK: "remind_ok",
+    OUTCOME_REMIND_FAIL: "remind_fail",
+    OUTCOME_COUNTDOWN: "countdown",
+    OUTCOME_HIBERNATE: "hibernate",
+    OUTCOME_CANCEL: "cancel",
+    OUTCOME_RESUME: "resume",
+    OUTCOME_OFFLINE: "offline",
+}
+
+# -----------------------------
+# Ring file
+# -----------------------------
+class ActivityJournal:
+    """
+    定长环形记录文件（内存映射）。写入为 pack_into 到映射区，不分配新对象；
+    容量固定，写满后覆盖最旧记录，文件大小始终为 HEADER_SIZE + capacity * RECORD.size。
+    """
+
+    def __init__(self, path: str = JOURNAL_PATH, capacity: int = 131072, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        # views() 交出的 memoryview：close() 前统一释放，否则映射无法关闭
+        self._views = []
+        capacity = max(16, int(capacity))
+
+        if readonly:
+            self._f = open(path, "rb")
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._load_header()
+            return
+
+        ensure_dirs(os.path.dirname(path))
+        size = HEADER_SIZE + capacity * RECORD.size
+        fresh = not os.path.exists(path) or os.path.getsize(path) != size
+        self._f = open(path, "r+b" if not fresh else "w+b")
+        if fresh:
+            self._f.truncate(size)
+        self._mm = mmap.mmap(self._f.fileno(), size)
+        try:
+            self._load_header()
+            if self.capacity != capacity or self.record_size != RECORD.size:
+                raise ValueError("journal layout changed")
+        except ValueError:
+            self.capacity = capacity
+            self.record_size = RECORD.size
+            self.count = 0
+            _HEADER.pack_into(self._mm, 0, MAGIC, VERSION, RECORD.size, capacity, 0, 0)
+
+    def _load_header(self):
+        magic, version, rec_size, capacity, _r, count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or rec_size != RECORD.size or capacity <= 0:
+            raise ValueError("not an activity journal")
+        self.record_size = rec_size
+        self.capacity = capacity
+        self.count = count
+
+    def append(self, idle_sec: int, uptime_sec: int, online: int = -1, outcome: int = OUTCOME_SAMPLE, ts: float = None):
+        with self._lock:
+            idx = self.count % self.capacity
+            RECORD.pack_into(
+                self._mm, HEADER_SIZE + idx * RECORD.size,
+                time.time() if ts is None else ts,
+                max(0, min(int(idle_sec), 0xFFFFFFFF)),
+                max(0, min(int(uptime_sec), 0xFFFFFFFF)),
+                int(online), int(outcome),
+            )
+            self.count += 1
+            struct.pack_into("<Q", self._mm, _COUNT_OFFSET, self.count)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def views(self):
+        """按时间顺序返回最多两段 memoryview（零拷贝），可直接交给 struct.iter_unpack 或 numpy.frombuffer。"""
+        if self.readonly:
+            self._load_header()
+        with memoryview(self._mm) as whole:
+            mv = whole[HEADER_SIZE:HEADER_SIZE + self.capacity * RECORD.size]
+        n = len(self)
+        if self.count <= self.capacity:
+            views = [mv[:n * RECORD.size]]
+        else:
+            head = (self.count % self.capacity) * RECORD.size
+            views = [mv[head:], mv[:head]]
+        mv.release()
+        with self._lock:
+            self._views = [v for v in self._views if not _released(v)] + views
+        return views
+
+    def records(self):
+        views = self.views()
+        try:
+            for view in views:
+                yield from RECORD.iter_unpack(view)
+        finally:
+            _release(views)
+
+    def to_trace(self):
+        """提取周期采样记录为 (t, idle, uptime)，供 whatif 分析使用。"""
+        t, idle, uptime = [], [], []
+        for ts, i, u, _online, outcome in self.records():
+            if outcome == OUTCOME_SAMPLE:
+                t.append(ts)
+                idle.append(i)
+                uptime.append(u)
+        return t, idle, uptime
+
+    def flush(self):
+        try:
+            self._mm.flush()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._lock:
+            views, self._views = self._views, []
+        _release(views)
+        try:
+            if not self.readonly:
+                self._mm.flush()
+            self._mm.close()
+        except BufferError as e:
+            # 仍有调用方持有映射区的缓冲（如 numpy.frombuffer 的结果）：映射保持打开，记录下来
+            log_error(e)
+        except (OSError, ValueError):
+            pass
+        self._f.close()
+
+
+def _released(view: memoryview) -> bool:
+    try:
+        view.nbytes
+    except ValueError:
+        return True
+    return False
+
+
+def _release(views):
+    for view in views:
+        try:
+            view.release()
+        except BufferError as e:
+            log_error(e)
+
+# -----------------------------
+# Sampler
+# -----------------------------
+class JournalSampler:
+    """
+    后台线程记录空闲/开机时长与最近一次联网判断。用户离开时按 interval_sec 采样；
+    用户在电脑前（空闲不足一个间隔）时间隔逐次加倍，最长 max_interval_sec，减少唤醒——
+    记录中的空闲秒数已能还原最后输入时刻，稀疏采样不丢失信息。kick() 立即采样并恢复基础间隔。
+    """
+
+    def __init__(self, journal: ActivityJournal, backend, interval_sec: int = 60, online_getter=None,
+                 max_interval_sec: int = None):
+        self.journal = journal
+        self.backend = backend
+        self.interval_sec = max(5, int(interval_sec))
+        self.max_interval_sec = max(self.interval_sec, int(max_interval_sec or 16 * self.interval_sec))
+        self.online_getter = online_getter or (lambda: -1)
+        self._stop = threading.Event()
+        self._kick = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="AutoShutdownJournal", daemon=True)
+        self._thread.start()
+
+    def kick(self):
+        """用户回到电脑前等事件：立即采样一次。"""
+        self._kick.set()
+
+    def sample(self):
+        """记录一次采样，返回空闲秒数（失败时 None）。"""
+        try:
+            idle = self.backend.idle_seconds()
+            self.journal.append(idle, self.backend.uptime_seconds(),
+                                self.online_getter(), OUTCOME_SAMPLE, ts=self.backend.now().timestamp())
+            return idle
+        except Exception as e:
+            log_error(e)
+            return None
+
+    def next_wait(self, wait: float, idle, kicked: bool = False) -> float:
+        if kicked or idle is None or idle >= self.interval_sec:
+            return self.interval_sec
+        return min(self.max_interval_sec, wait * 2)
+
+    def _run(self):
+        wait = self.interval_sec
+        while True:
+            kicked = self._kick.wait(wait)
+            if self._stop.is_set():
+                return
+            self._kick.clear()
+            wait = self.next_wait(wait, self.sample(), kicked)
+
+    def stop(self, timeout: float = 2.0) -> bool:
+        """停止并等待采样线程退出（最多 timeout 秒）；返回 False 时线程仍在写入，不应关闭日志文件。"""
+        self._stop.set()
+        self._kick.set()
+        thread = self._thread
+        if thread is None or thread is threading.current_thread():
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
@@ -0,0 +1,343 @@
+# -*- coding: utf-8 -*-
+"""
+纯 Python 的 Windows 快捷方式（.lnk，MS-SHLLINK）读写。
+
+只覆盖自启检查需要的字段：TargetPath / Arguments / WorkingDirectory / IconLocation，
+读取时按 EnvironmentVariableDataBlock → LinkInfo → LinkTargetIDList 的顺序解析目标路径，
+写入时生成仅含 LinkInfo 的最小快捷方式（与 WScript.Shell 创建的快捷方式行为一致）；
+UNC 目标（\\\\server\\share\\...）写为 CommonNetworkRelativeLink，设备路径（\\\\?\\、\\\\.\\）不支持。
+"""
+
+import os
+import codecs
+import struct
+
+# -----------------------------
+# Constants
+# -----------------------------
+HEADER_SIZE = 0x4C
+LINK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+
+HAS_LINK_TARGET_IDLIST = 0x00000001
+HAS_LINK_INFO = 0x00000002
+HAS_NAME = 0x00000004
+HAS_RELATIVE_PATH = 0x00000008
+HAS_WORKING_DIR = 0x00000010
+HAS_ARGUMENTS = 0x00000020
+HAS_ICON_LOCATION = 0x00000040
+IS_UNICODE = 0x00000080
+HAS_EXP_STRING = 0x00000200
+
+VOLUME_ID_AND_LOCAL_BASE_PATH = 0x00000001
+COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX = 0x00000002
+
+ENVIRONMENT_VARIABLE_BLOCK = 0xA0000001
+ICON_ENVIRONMENT_BLOCK = 0xA0000007
+
+FILE_ATTRIBUTE_ARCHIVE = 0x00000020
+DRIVE_FIXED = 3
+SW_SHOWMINNOACTIVE = 7
+
+_HEADER = struct.Struct("<I16sIIQQQIiIHHII")
+
+
+class LnkError(ValueError):
+    pass
+
+
+class ShellLink:
+    __slots__ = ("target_path", "arguments", "working_dir", "icon_location", "icon_index",
+                 "show_command", "description")
+
+    def __init__(self, target_path="", arguments="", working_dir="", icon_location="",
+                 icon_index=0, show_command=SW_SHOWMINNOACTIVE, description=""):
+        self.target_path = target_path
+        self.arguments = arguments
+        self.working_dir = working_dir
+        self.icon_location = icon_location
+        self.icon_index = icon_index
+        self.show_command = show_command
+        self.description = description
+
+    def to_spec(self) -> dict:
+        """与 WScript.Shell 的属性同名，IconLocation 为 "路径,索引"。"""
+        return {
+            "TargetPath": self.target_path,
+            "Arguments": self.arguments,
+            "IconLocation": f"{self.icon_location},{self.icon_index}",
+            "WorkingDirectory": self.working_dir,
+        }
+
+
+def _ansi_codec() -> str:
+    try:
+        codecs.lookup("mbcs")
+        return "mbcs"
+    except LookupError:
+        return "latin-1"
+
+
+def _expand_env(s: str) -> str:
+    return os.path.expandvars(s) if "%" in (s or "") else (s or "")
+
+# -----------------------------
+# Reader
+# -----------------------------
+def _cstr(data: bytes, off: int) -> str:
+    end = data.find(b"\x00", off)
+    if end < 0:
+        end = len(data)
+    return data[off:end].decode(_ansi_codec(), errors="replace")
+
+
+def _wstr(data: bytes, off: int) -> str:
+    end = off
+    while end + 1 < len(data) and data[end:end + 2] != b"\x00\x00":
+        end += 2
+    return data[off:end].decode("utf-16-le", errors="replace")
+
+
+def _parse_link_info(info: bytes) -> str:
+    if len(info) < 0x1C:
+        return ""
+    (_size, hdr_size, flags, _vol_off, base_off, net_off, suffix_off) = struct.unpack_from("<7I", info, 0)
+    base_u_off = suffix_u_off = 0
+    if hdr_size >= 0x24:
+        base_u_off, suffix_u_off = struct.unpack_from("<2I", info, 0x1C)
+
+    suffix = _wstr(info, suffix_u_off) if suffix_u_off else (_cstr(info, suffix_off) if suffix_off else "")
+
+    if flags & VOLUME_ID_AND_LOCAL_BASE_PATH:
+        base = _wstr(info, base_u_off) if base_u_off else _cstr(info, base_off)
+        if base and suffix and not base.endswith("\\"):
+            return base + "\\" + suffix
+        return base + suffix
+
+    if flags & COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX and net_off:
+        (_nsize, _nflags, name_off, _dev_off, _prov) = struct.unpack_from("<5I", info, net_off)
+        if name_off > 0x14:
+            (name_u_off,) = struct.unpack_from("<I", info, net_off + 0x14)
+            net_name = _wstr(info, net_off + name_u_off)
+        else:
+            net_name = _cstr(info, net_off + name_off)
+        return net_name + "\\" + suffix if suffix else net_name
+    return ""
+
+
+def _parse_idlist(idlist: bytes) -> str:
+    """尽力从 Shell item 列表（根目录/卷/文件项）还原路径；无法识别的项将被忽略。"""
+    parts = []
+    off = 0
+    while off + 2 <= len(idlist):
+        (size,) = struct.unpack_from("<H", idlist, off)
+        if size < 2:
+            break
+        item = idlist[off:off + size]
+        off += size
+        if len(item) < 3:
+            continue
+        kind = item[2]
+        if kind & 0x70 == 0x20:
+            # Volume item: "C:\"
+            drive = _cstr(item, 3)
+            if drive:
+                parts = [drive.rstrip("\\")]
+        elif kind & 0x70 == 0x30 and len(item) > 14:
+            name = _wstr(item, 14) if kind & 0x04 else _cstr(item, 14)
+            long_name = _parse_beef0004(item)
+            parts.append(long_name or name)
+    return "\\".join(parts)
+
+
+def _parse_beef0004(item: bytes) -> str:
+    try:
+        (ext_off,) = struct.unpack_from("<H", item, len(item) - 2)
+        if ext_off < 14 or ext_off + 8 > len(item):
+            return ""
+        _esize, version, sig = struct.unpack_from("<HHI", item, ext_off)
+        if sig != 0xBEEF0004:
+            return ""
+        if version >= 9:
+            name_off = 46
+        elif version == 8:
+            name_off = 42
+        elif version == 7:
+            name_off = 38
+        else:
+            name_off = 18
+        return _wstr(item, ext_off + name_off)
+    except struct.error:
+        return ""
+
+
+def parse_lnk(data: bytes) -> ShellLink:
+    if len(data) < HEADER_SIZE:
+        raise LnkError("file too short")
+    (hdr_size, clsid, flags, _attrs, _ctime, _atime, _wtime, _fsize,
+     icon_index, show_cmd, _hotkey, _r1, _r2, _r3) = _HEADER.unpack_from(data, 0)
+    if hdr_size != HEADER_SIZE or clsid != LINK_CLSID:
+        raise LnkError("not a shell link")
+
+    try:
+        off = HEADER_SIZE
+        idlist_path = ""
+        if flags & HAS_LINK_TARGET_IDLIST:
+            (idlist_size,) = struct.unpack_from("<H", data, off)
+            idlist_path = _parse_idlist(data[off + 2:off + 2 + idlist_size])
+            off += 2 + idlist_size
+
+        info_path = ""
+        if flags & HAS_LINK_INFO:
+            (info_size,) = struct.unpack_from("<I", data, off)
+            info_path = _parse_link_info(data[off:off + info_size])
+            off += info_size
+
+        unicode = bool(flags & IS_UNICODE)
+        strings = {}
+        for flag in (HAS_NAME, HAS_RELATIVE_PATH, HAS_WORKING_DIR, HAS_ARGUMENTS, HAS_ICON_LOCATION):
+            if not flags & flag:
+                continue
+            (count,) = struct.unpack_from("<H", data, off)
+            off += 2
+            nbytes = count * 2 if unicode else count
+            raw = data[off:off + nbytes]
+            off += nbytes
+            strings[flag] = raw.decode("utf-16-le" if unicode else _ansi_codec(), errors="replace")
+
+        env_target = ""
+        env_icon = ""
+        while off + 8 <= len(data):
+            block_size, sig = struct.unpack_from("<II", data, off)
+            if block_size < 8:
+                break
+            if sig in (ENVIRONMENT_VARIABLE_BLOCK, ICON_ENVIRONMENT_BLOCK) and block_size >= 8 + 260 + 520:
+                value = _wstr(data, off + 8 + 260) or _cstr(data, off + 8)
+                if sig == ENVIRONMENT_VARIABLE_BLOCK:
+                    env_target = _expand_env(value)
+                else:
+                    env_icon = _expand_env(value)
+            off += block_size
+    except struct.error as e:
+        raise LnkError(f"truncated shell link: {e}") from e
+
+    target = env_target or info_path or idlist_path
+    icon = env_icon or _expand_env(strings.get(HAS_ICON_LOCATION, ""))
+    return ShellLink(
+        target_path=target,
+        arguments=strings.get(HAS_ARGUMENTS, ""),
+        working_dir=_expand_env(strings.get(HAS_WORKING_DIR, "")),
+        icon_location=icon,
+        icon_index=icon_index,
+        show_command=show_cmd,
+        description=strings.get(HAS_NAME, ""),
+    )
+
+
+def read_lnk(path: str) -> ShellLink:
+    with open(path, "rb") as f:
+        return parse_lnk(f.read())
+
+# -----------------------------
+# Writer
+# -----------------------------
+def _split_unc(target: str):
+    r"""\\server\share\rest → ("\\server\share", "rest")；设备路径（\\?\、\\.\）与不完整的 UNC 路径报错。"""
+    parts = target[2:].split("\\", 2)
+    if parts[0] in ("?", ".") or len(parts) < 2 or not parts[0] or not parts[1]:
+        raise LnkError(f"unsupported UNC target: {target!r}")
+    return "\\\\" + parts[0] + "\\" + parts[1], parts[2] if len(parts) > 2 else ""
+
+
+def _pack_link_info(flags: int, vol: bytes, base: str, net: bytes, suffix: str) -> bytes:
+    """按 [VolumeID][LocalBasePath][CommonNetworkRelativeLink][后缀][Unicode 路径] 的顺序排布 LinkInfo。"""
+    hdr_size = 0x24
+    base_ansi = base.encode(_ansi_codec(), errors="replace") + b"\x00" if vol else b""
+    suffix_ansi = suffix.encode(_ansi_codec(), errors="replace") + b"\x00"
+    base_u = base.encode("utf-16-le") + b"\x00\x00" if vol else b""
+    suffix_u = suffix.encode("utf-16-le") + b"\x00\x00"
+
+    vol_off = hdr_size if vol else 0
+    base_off = hdr_size + len(vol) if vol else 0
+    net_off = hdr_size + len(vol) + len(base_ansi) if net else 0
+    suffix_off = hdr_size + len(vol) + len(base_ansi) + len(net)
+    base_u_off = suffix_off + len(suffix_ansi)
+    if base_u_off % 2:
+        base_u_off += 1
+    suffix_u_off = base_u_off + len(base_u)
+    total = suffix_u_off + len(suffix_u)
+
+    buf = bytearray(total)
+    struct.pack_into("<9I", buf, 0, total, hdr_size, flags, vol_off, base_off, net_off, suffix_off,
+                     base_u_off if vol else 0, suffix_u_off)
+    buf[vol_off:vol_off + len(vol)] = vol
+    buf[base_off:base_off + len(base_ansi)] = base_ansi
+    buf[net_off:net_off + len(net)] = net
+    buf[suffix_off:suffix_off + len(suffix_ansi)] = suffix_ansi
+    buf[base_u_off:base_u_off + len(base_u)] = base_u
+    buf[suffix_u_off:suffix_u_off + len(suffix_u)] = suffix_u
+    return bytes(buf)
+
+
+def _build_network_link(net_name: str) -> bytes:
+    # CommonNetworkRelativeLink：不带盘符映射与网络类型（Flags=0），共享名同时写 ANSI 与 Unicode
+    name_ansi = net_name.encode(_ansi_codec(), errors="replace") + b"\x00"
+    name_u = net_name.encode("utf-16-le") + b"\x00\x00"
+    name_off = 0x1C
+    name_u_off = name_off + len(name_ansi)
+    if name_u_off % 2:
+        name_u_off += 1
+    size = name_u_off + len(name_u)
+    buf = bytearray(size)
+    struct.pack_into("<7I", buf, 0, size, 0, name_off, 0, 0, name_u_off, 0)
+    buf[name_off:name_off + len(name_ansi)] = name_ansi
+    buf[name_u_off:name_u_off + len(name_u)] = name_u
+    return bytes(buf)
+
+
+def _build_link_info(target: str) -> bytes:
+    if target.startswith("\\\\"):
+        # UNC 路径写为网络共享 + 路径后缀，而不是伪装成本地固定磁盘
+        net_name, suffix = _split_unc(target)
+        return _pack_link_info(COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX, b"", "",
+                               _build_network_link(net_name), suffix)
+    # 卷信息：固定磁盘、序列号 0、空卷标；Windows 解析时以路径为准
+    volume_id = struct.pack("<4I", 0x11, DRIVE_FIXED, 0, 0x10) + b"\x00"
+    return _pack_link_info(VOLUME_ID_AND_LOCAL_BASE_PATH, volume_id, target, b"", "")
+
+
+def _string_data(s: str) -> bytes:
+    raw = s.encode("utf-16-le")
+    return struct.pack("<H", len(raw) // 2) + raw
+
+
+def build_lnk(link: ShellLink) -> bytes:
+    if not link.target_path:
+        raise LnkError("target path is required")
+
+    flags = HAS_LINK_INFO | IS_UNICODE
+    strings = b""
+    for flag, value in (
+        (HAS_NAME, link.description),
+        (HAS_WORKING_DIR, link.working_dir),
+        (HAS_ARGUMENTS, link.arguments),
+        (HAS_ICON_LOCATION, link.icon_location),
+    ):
+        if value:
+            flags |= flag
+            strings += _string_data(value)
+
+    header = _HEADER.pack(
+        HEADER_SIZE, LINK_CLSID, flags, FILE_ATTRIBUTE_ARCHIVE,
+        0, 0, 0, 0,
+        int(link.icon_index), int(link.show_command), 0, 0, 0, 0,
+    )
+    terminal = struct.pack("<I", 0)
+    return header + _build_link_info(link.target_path) + strings + terminal
+
+
+def write_lnk(path: str, link: ShellLink):
+    data = build_lnk(link)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
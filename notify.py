@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+
+import json
+import time
+import socket
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from core import log_error, log_stats, pushplus_send, Config
+
+# 单个通道的结果；ok 为 None 表示通道未配置，已跳过；retry_after 非空表示本次被推迟（未尝试发送）
+# suppressed：通道判定无需实际发送（视为送达，但没有经过网络）
+ChannelResult = namedtuple("ChannelResult", "name ok detail ms retry_after suppressed", defaults=(None, False))
+# 与 pushplus_send 的 (ok, detail) 兼容：result[0] 为整体是否送达
+NotifyResult = namedtuple("NotifyResult", "ok detail channels")
+
+class Deferred(Exception):
+    """通道主动推迟发送（如超出限流配额），retry_after 秒后再试。"""
+
+    def __init__(self, retry_after: float, reason: str = ""):
+        super().__init__(reason)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class Suppressed(Exception):
+    """通道无需发送（如相同内容在去重窗口内已送达）：计为送达，但不代表本次联网成功。"""
+
+# -----------------------------
+# Channels
+# -----------------------------
+CHANNELS = {}
+
+def register_channel(cls):
+    CHANNELS[cls.name] = cls()
+    return cls
+
+
+class Channel:
+    name = ""
+    # 送达即可证明联网（本地管道/套接字不算）
+    network = True
+
+    def configured(self, conf: Config) -> bool:
+        return True
+
+    def timeout(self, conf: Config) -> float:
+        return conf.channel_timeout_sec.get(self.name, conf.notify_timeout_sec)
+
+    def send(self, conf: Config, title: str, content: str, timeout: float):
+        raise NotImplementedError
+
+    def warm_url(self, conf: Config):
+        """发送前可预先建立连接的 HTTP 地址；None 表示不需要。"""
+        return None
+
+
+@register_channel
+class PushplusChannel(Channel):
+    name = "pushplus"
+
+    def configured(self, conf: Config) -> bool:
+        return bool(conf.pushplus_token)
+
+    def warm_url(self, conf: Config):
+        return conf.pushplus_api or None
+
+    def send(self, conf, title, content, timeout):
+        # 同一 token/topic 的多台机器共享 pushplus 配额：先过本地令牌桶与内容去重
+        from ratelimit import get_limiter, DUPLICATE, LIMITED
+        limiter = get_limiter()
+        key = limiter.key_for(conf.pushplus_token, conf.pushplus_topic)
+        verdict, wait = limiter.acquire(
+            key, title, content,
+            rate_per_hour=conf.pushplus_rate_per_hour,
+            burst=conf.pushplus_burst,
+            dedup_sec=conf.pushplus_dedup_sec,
+        )
+        if verdict == DUPLICATE:
+            raise Suppressed("duplicate")
+        if verdict == LIMITED:
+            raise Deferred(wait, "rate limited")
+        ok, detail = pushplus_send(conf, title, content, timeout=timeout)
+        if ok:
+            limiter.mark_sent(key, title, content)
+        return ok, detail
+
+
+@register_channel
+class WebhookChannel(Channel):
+    """通用 JSON webhook：POST {"title", "content", "host", "time"}。"""
+    name = "webhook"
+
+    def configured(self, conf: Config) -> bool:
+        return bool(conf.webhook_url)
+
+    def warm_url(self, conf: Config):
+        return conf.webhook_url
+
+    def send(self, conf, title, content, timeout):
+        from httpclient import get_client
+        payload = {
+            "title": title,
+            "content": content,
+            "host": socket.gethostname(),
+            "time": datetime.now().isoformat(timespec="seconds"),
+        }
+        resp = get_client().request(
+            "POST",
+            conf.webhook_url,
+            body=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json; charset=utf-8"},
+            timeout=timeout,
+        )
+        if resp.status // 100 != 2:
+            return False, f"HTTP {resp.status}\n{resp.text()}"
+        return True, resp.text()
+
+
+@register_channel
+class SmtpChannel(Channel):
+    name = "smtp"
+
+    def configured(self, conf: Config) -> bool:
+        return bool(conf.smtp_host and conf.smtp_to)
+
+    def send(self, conf, title, content, timeout):
+        # smtplib / email 较重，只在配置了 SMTP 通道并实际发送时导入
+        import smtplib
+        from email.header import Header
+        from email.mime.text import MIMEText
+        security = conf.smtp_security
+        sender = conf.smtp_from or conf.smtp_user or "autoshutdown@localhost"
+        rcpts = list(conf.smtp_to)
+
+        msg = MIMEText(content, "plain", "utf-8")
+        msg["Subject"] = Header(title, "utf-8")
+        msg["From"] = sender
+        msg["To"] = ", ".join(rcpts)
+
+        cls = smtplib.SMTP_SSL if security == "ssl" else smtplib.SMTP
+        with cls(conf.smtp_host, conf.smtp_port, timeout=timeout) as smtp:
+            if security == "starttls":
+                smtp.starttls()
+            if conf.smtp_user:
+                smtp.login(conf.smtp_user, conf.smtp_password)
+            refused = smtp.sendmail(sender, rcpts, msg.as_string())
+        if refused:
+            return False, f"refused: {', '.join(refused)}"
+        return True, f"sent to {len(rcpts)} recipient(s)"
+
+
+@register_channel
+class LocalSinkChannel(Channel):
+    r"""本地接收端：Windows 命名管道（\\.\pipe\name）或 Unix 套接字，每条消息一行 JSON。"""
+    name = "local"
+    network = False
+
+    def configured(self, conf: Config) -> bool:
+        return bool(conf.local_sink_path)
+
+    def send(self, conf, title, content, timeout):
+        path = conf.local_sink_path
+        line = json.dumps({"title": title, "content": content,
+                           "time": datetime.now().isoformat(timespec="seconds")}, ensure_ascii=False) + "\n"
+        data = line.encode("utf-8")
+        if hasattr(socket, "AF_UNIX") and not path.startswith("\\\\"):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                s.settimeout(timeout)
+                s.connect(path)
+                s.sendall(data)
+        else:
+            # 命名管道以文件方式打开；服务端未创建时 open 失败
+            with open(path, "wb", buffering=0) as f:
+                f.write(data)
+        return True, path
+
+# -----------------------------
+# Fan-out
+# -----------------------------
+class Notifier:
+    """
+    一条消息并发投递到所有已启用通道，每个通道有独立超时，
+    总耗时取决于最慢的通道而不是各通道之和。
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        # 线程池（及 concurrent.futures）在第一次发送时才创建
+        with self._lock:
+            if self._pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="AutoShutdownNotify")
+            return self._pool
+
+    def channels_for(self, conf: Config, only=None):
+        names = only if only else conf.notify_channels
+        return [CHANNELS[n] for n in names if n in CHANNELS]
+
+    @staticmethod
+    def _run(channel: Channel, conf: Config, title: str, content: str, timeout: float):
+        t0 = time.perf_counter()
+        try:
+            ok, detail = channel.send(conf, title, content, timeout)
+        except Deferred as d:
+            return ChannelResult(channel.name, False, f"deferred: {d.reason}", 0.0, d.retry_after)
+        except Suppressed as e:
+            return ChannelResult(channel.name, True, f"suppressed: {e}", 0.0, suppressed=True)
+        except Exception as e:
+            ok, detail = False, repr(e)
+        return ChannelResult(channel.name, bool(ok), detail, round((time.perf_counter() - t0) * 1000.0, 1))
+
+    def send(self, conf: Config, title: str, content: str, only=None) -> NotifyResult:
+        from concurrent.futures import TimeoutError as FutureTimeout
+        t0 = time.perf_counter()
+        pending = []
+        results = []
+        for ch in self.channels_for(conf, only):
+            if not ch.configured(conf):
+                results.append(ChannelResult(ch.name, None, "not configured", 0.0))
+                continue
+            timeout = ch.timeout(conf)
+            pending.append((ch, timeout, self._executor().submit(self._run, ch, conf, title, content, timeout)))
+
+        for ch, timeout, fut in pending:
+            # 各通道的截止时间都从同一起点算起
+            remaining = t0 + timeout + 1.0 - time.perf_counter()
+            try:
+                results.append(fut.result(timeout=max(0.0, remaining)))
+            except FutureTimeout:
+                results.append(ChannelResult(ch.name, False, "timeout", round(timeout * 1000.0, 1)))
+            except Exception as e:
+                log_error(e)
+                results.append(ChannelResult(ch.name, False, repr(e), 0.0))
+
+        ok = delivered(results, conf.notify_require)
+        detail = "\n".join(f"[{r.name}] {_status_text(r)} {r.detail}" for r in results)
+        log_stats("notify", ok=ok, total_ms=round((time.perf_counter() - t0) * 1000.0, 1),
+                  channels={r.name: [r.ok, r.ms] for r in results})
+        return NotifyResult(ok, detail, results)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        try:
+            pool.shutdown(wait=False, cancel_futures=True)
+        except Exception:
+            pass
+
+
+def _status_text(r: ChannelResult) -> str:
+    if r.ok:
+        return "跳过（已发送）" if r.suppressed else "OK"
+    if r.ok is None:
+        return "跳过"
+    return "推迟" if r.retry_after is not None else "失败"
+
+
+def delivered(results, require: str = "any") -> bool:
+    """按 notify_require 汇总：any=任一通道送达；all=所有已配置通道都送达。"""
+    attempted = [r for r in results if r.ok is not None]
+    if not attempted:
+        return False
+    if require == "all":
+        return all(r.ok for r in attempted)
+    return any(r.ok for r in attempted)
+
+
+def failed_channels(result) -> list:
+    return [r.name for r in getattr(result, "channels", None) or () if r.ok is False]
+
+
+def reached_network(result) -> bool:
+    """是否有联网通道送达（可用于刷新联网判断）。"""
+    channels = getattr(result, "channels", None)
+    if channels is None:
+        return bool(result and result[0])
+    return any(r.ok and not r.suppressed and CHANNELS[r.name].network for r in channels if r.name in CHANNELS)
+
+
+def deferred_only(result) -> bool:
+    """没有通道送达，且未送达的通道都是主动推迟（而不是发送失败）。"""
+    channels = getattr(result, "channels", None) or ()
+    failed = [r for r in channels if r.ok is False]
+    return bool(failed) and not any(r.ok for r in channels) and all(r.retry_after is not None for r in failed)
+
+
+def retry_after(result):
+    """被推迟通道中最长的等待秒数；没有推迟的通道时为 None。"""
+    waits = [r.retry_after for r in getattr(result, "channels", None) or () if r.retry_after is not None]
+    return max(waits) if waits else None
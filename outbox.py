@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import random
+import threading
+import itertools
+
+from core import ensure_dirs, log_error, log_stats, write_file_atomic, APPDATA_DIR
+from notify import failed_channels, retry_after
+
+OUTBOX_PATH = os.path.join(APPDATA_DIR, "outbox.log")
+
+# -----------------------------
+# Outbox log
+# -----------------------------
+class Outbox:
+    """
+    待发送通知的持久化队列。每次变更追加一行 JSON（add / retry / done / drop），
+    启动时按顺序重放得到待发送消息；失效记录过多时整体改写（compact）为只含待发送消息。
+    """
+
+    def __init__(self, path: str = OUTBOX_PATH, max_age_sec: float = 24 * 3600, clock=time.time):
+        self.path = path
+        self.max_age_sec = max_age_sec
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._records = 0
+        self._ids = itertools.count(1)
+        self._load()
+
+    def _load(self):
+        ensure_dirs(os.path.dirname(self.path))
+        max_id = 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for ln in f:
+                    try:
+                        rec = json.loads(ln)
+                    except ValueError:
+                        # 崩溃时可能留下不完整的最后一行
+                        continue
+                    self._records += 1
+                    self._apply(rec)
+                    max_id = max(max_id, int(rec.get("id", 0)))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log_error(e)
+        self._ids = itertools.count(max_id + 1)
+        now = self.clock()
+        for msg in self._pending.values():
+            # 上次退出时仍在首发中的消息，启动后立即重试
+            if msg.get("next_at") is None:
+                msg["next_at"] = now
+        self._compact_if_needed(force=True)
+
+    def _apply(self, rec: dict):
+        op = rec.get("op")
+        mid = rec.get("id")
+        if op == "add":
+            self._pending[mid] = {
+                "id": mid,
+                "title": rec.get("title", ""),
+                "content": rec.get("content", ""),
+                "created": rec.get("created", 0),
+                "attempts": rec.get("attempts", 0),
+                "next_at": rec.get("next_at"),
+                "channels": rec.get("channels"),
+            }
+        elif op == "retry" and mid in self._pending:
+            self._pending[mid]["attempts"] = rec.get("attempts", 0)
+            self._pending[mid]["next_at"] = rec.get("next_at")
+            self._pending[mid]["channels"] = rec.get("channels")
+        elif op in ("done", "drop"):
+            self._pending.pop(mid, None)
+
+    def _append(self, rec: dict):
+        self._apply(rec)
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._records += 1
+        except Exception as e:
+            log_error(e)
+        self._compact_if_needed()
+
+    def _compact_if_needed(self, force: bool = False):
+        if not force and self._records <= 2 * len(self._pending) + 64:
+            return
+        lines = [json.dumps(dict(msg, op="add"), ensure_ascii=False) + "\n"
+                 for msg in sorted(self._pending.values(), key=lambda m: m["id"])]
+        try:
+            write_file_atomic(self.path, "".join(lines))
+            self._records = len(lines)
+        except Exception as e:
+            log_error(e)
+
+    def add(self, title: str, content: str) -> int:
+        """加入一条消息；next_at 为空表示调用方正在首发，调度器暂不处理。"""
+        with self._lock:
+            mid = next(self._ids)
+            self._append({"op": "add", "id": mid, "title": title, "content": content,
+                          "created": self.clock(), "attempts": 0, "next_at": None})
+            return mid
+
+    def done(self, mid: int):
+        with self._lock:
+            if mid in self._pending:
+                self._append({"op": "done", "id": mid})
+
+    def retry_later(self, mid: int, delay_sec: float = None, channels=None):
+        """安排重发；channels 为仅需重发的通道（其余通道已送达），None 表示全部。"""
+        with self._lock:
+            msg = self._pending.get(mid)
+            if msg is None:
+                return
+            attempts = msg["attempts"] + 1
+            if delay_sec is None:
+                delay_sec = backoff_delay(attempts)
+            self._append({"op": "retry", "id": mid, "attempts": attempts,
+                          "next_at": self.clock() + delay_sec, "channels": channels or msg.get("channels")})
+
+    def settle(self, mid: int, result) -> bool:
+        """按一次发送结果更新消息：全部送达则移出队列，否则只对失败通道安排重发。"""
+        ok = bool(result and result[0])
+        failed = failed_channels(result)
+        if ok and not failed:
+            self.done(mid)
+            return True
+        # 被限流推迟的通道按限流器给出的等待时间重试，其余按指数退避
+        self.retry_later(mid, delay_sec=retry_after(result), channels=failed or None)
+        return False
+
+    def due(self, limit: int):
+        """到期待重发的消息（按加入顺序）；过期消息直接丢弃。"""
+        now = self.clock()
+        with self._lock:
+            expired = [m["id"] for m in self._pending.values() if now - m["created"] > self.max_age_sec]
+            for mid in expired:
+                self._append({"op": "drop", "id": mid})
+            ready = [dict(m) for m in self._pending.values()
+                     if m["next_at"] is not None and m["next_at"] <= now]
+        if expired:
+            log_stats("outbox_expired", count=len(expired))
+        ready.sort(key=lambda m: m["id"])
+        return ready[:limit]
+
+    def next_due_at(self):
+        with self._lock:
+            times = [m["next_at"] for m in self._pending.values() if m["next_at"] is not None]
+        return min(times) if times else None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+
+class MemoryOutbox:
+    """
+    重发队列打开之前（启动延迟期间）使用的内存队列，接口与 Outbox 相同，只在 UI 线程使用。
+    transfer() 把尚未送达的消息转入 Outbox；之后对旧 id 的操作转发给 Outbox，
+    转移时仍在首发中的消息也能按发送结果正确结算。
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._target = None
+        self._moved = {}
+
+    def add(self, title: str, content: str) -> int:
+        mid = next(self._ids)
+        if self._target is not None:
+            self._moved[mid] = self._target.add(title, content)
+        else:
+            self._pending[mid] = {"title": title, "content": content, "retry": False, "channels": None}
+        return mid
+
+    def done(self, mid: int):
+        if mid in self._moved:
+            self._target.done(self._moved[mid])
+        else:
+            self._pending.pop(mid, None)
+
+    def retry_later(self, mid: int, delay_sec: float = None, channels=None):
+        if mid in self._moved:
+            self._target.retry_later(self._moved[mid], delay_sec, channels)
+            return
+        msg = self._pending.get(mid)
+        if msg is not None:
+            msg["retry"] = True
+            msg["channels"] = channels or msg["channels"]
+
+    settle = Outbox.settle
+
+    def transfer(self, outbox: Outbox) -> int:
+        """转入 outbox：首发中的消息保持首发状态，等待重发的消息立即到期。返回转入的条数。"""
+        for mid, msg in sorted(self._pending.items()):
+            new_id = outbox.add(msg["title"], msg["content"])
+            if msg["retry"]:
+                outbox.retry_later(new_id, delay_sec=0, channels=msg["channels"])
+            self._moved[mid] = new_id
+        count = len(self._pending)
+        self._pending.clear()
+        self._target = outbox
+        return count
+
+    def __len__(self):
+        return len(self._pending)
+
+# -----------------------------
+# Dispatcher
+# -----------------------------
+def backoff_delay(attempts: int, base: float = 30.0, cap: float = 1800.0, jitter: float = 0.2) -> float:
+    """指数退避：base * 2^(attempts-1)，上限 cap，再乘以 ±jitter 的随机因子。"""
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(1.0 - jitter, 1.0 + jitter)
+
+
+class OutboxDispatcher:
+    """
+    后台线程按退避时间重发队列中的消息。每轮先确认联网，再按批次依次发送，
+    遇到失败即停止本批；kick() 在联网恢复或有新失败消息时提前唤醒。
+    """
+
+    def __init__(self, outbox: Outbox, send, online_check=None, batch_size: int = 5,
+                 idle_poll_sec: float = 300.0, merge=None):
+        self.outbox = outbox
+        self.send = send
+        self.online_check = online_check or (lambda: True)
+        # merge(msgs) -> (title, content)：非空时同一批到期消息合并为一条发送
+        self.merge = merge
+        self.batch_size = batch_size
+        self.idle_poll_sec = idle_poll_sec
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="AutoShutdownOutbox", daemon=True)
+        self._thread.start()
+
+    def kick(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.dispatch_once()
+            except Exception as e:
+                log_error(e)
+            due = self.outbox.next_due_at()
+            wait = self.idle_poll_sec if due is None else max(0.5, min(self.idle_poll_sec, due - self.outbox.clock()))
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def dispatch_once(self) -> int:
+        batch = self.outbox.due(self.batch_size)
+        if not batch:
+            return 0
+        if not self.online_check():
+            for msg in batch:
+                self.outbox.retry_later(msg["id"])
+            return 0
+        sent = 0
+        for group in self._groups(batch):
+            if len(group) > 1:
+                title, content = self.merge(group)
+                log_stats("outbox_merged", ids=[m["id"] for m in group])
+            else:
+                title, content = group[0]["title"], group[0]["content"]
+            try:
+                result = self.send(title, content, group[0].get("channels"))
+            except Exception as e:
+                log_error(e)
+                result = None
+            # 合并发送的消息共用一次结果
+            if not all([self.outbox.settle(msg["id"], result) for msg in group]):
+                break
+            for msg in group:
+                sent += 1
+                log_stats("outbox_delivered", id=msg["id"], attempts=msg["attempts"] + 1,
+                          delay_sec=round(self.outbox.clock() - msg["created"], 1))
+        return sent
+
+    def _groups(self, batch):
+        """未启用合并时逐条发送；启用时按待发送通道分组（各组只发往相同的通道）。"""
+        if self.merge is None:
+            return [[msg] for msg in batch]
+        groups = {}
+        for msg in batch:
+            groups.setdefault(tuple(msg.get("channels") or ()), []).append(msg)
+        return list(groups.values())
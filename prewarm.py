@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import time
+
+from core import log_error, log_stats, Config
+from dnscache import get_resolver
+
+# -----------------------------
+# Pre-warm
+# -----------------------------
+class Prewarmer:
+    """
+    解析探测与通知主机的域名、刷新联网判断、预先建立通知通道的连接（TCP + TLS），
+    触发时只剩一次 HTTP 请求。
+    由宿主在预计触发时刻前 lead_sec 秒调用 prewarm()（在后台线程执行）；
+    ready() 返回 False（如用户已回到电脑前）时跳过本次预热。
+    """
+
+    def __init__(self, connectivity, notifier, ready=None):
+        self.connectivity = connectivity
+        self.notifier = notifier
+        self.ready = ready or (lambda lead_sec: True)
+
+    def prewarm(self, conf: Config, lead_sec: float):
+        try:
+            if self.ready(lead_sec):
+                return self.run(conf, lead_sec)
+        except Exception as e:
+            log_error(e)
+        return None
+
+    def run(self, conf: Config, lead_sec: float) -> dict:
+        from httpclient import get_client
+        from probes import trigger_hosts
+        timings = {}
+        t0 = time.perf_counter()
+        get_resolver().prefetch(trigger_hosts(conf), within_sec=2 * lead_sec)
+        timings["dns_ms"] = round((time.perf_counter() - t0) * 1000.0, 1)
+
+        # 缓存的联网判断在触发前就会过期时提前重新检测
+        t1 = time.perf_counter()
+        age = self.connectivity.age()
+        ttl = conf.net_cache_ttl_sec
+        online = self.connectivity.verdict
+        if ttl > 0 and (age is None or age + 2 * lead_sec >= ttl or not self.connectivity.fresh(conf)):
+            online = self.connectivity.check(conf, force=True)
+        timings["probe_ms"] = round((time.perf_counter() - t1) * 1000.0, 1)
+
+        t2 = time.perf_counter()
+        warmed = []
+        if online is not False:
+            client = get_client()
+            for ch in self.notifier.channels_for(conf):
+                url = ch.warm_url(conf) if ch.configured(conf) else None
+                if not url:
+                    continue
+                try:
+                    if client.warm(url, timeout=ch.timeout(conf)):
+                        warmed.append(ch.name)
+                except Exception:
+                    pass
+        timings["connect_ms"] = round((time.perf_counter() - t2) * 1000.0, 1)
+        log_stats("prewarm", online=online, warmed=warmed, lead_sec=lead_sec, **timings)
+        return timings
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import time
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+
+from core import log_stats, Config, PROBE_METHODS
+from httpclient import get_client, happy_eyeballs_connect
+from dnscache import get_resolver
+
+# 一轮竞速的结果：winner 为最先给出在线结论的目标；
+# results 为 {目标: [ok, 耗时ms, 收发字节数, 首字节ms]}，未完成的 ok 为 None；bytes 为本轮 HTTP 收发字节合计
+RaceResult = namedtuple("RaceResult", "online winner latency_ms bound_ms results bytes")
+
+# 超过截止时间仍未返回的探测直接放弃，结果不再等待
+_GRACE_SEC = 0.5
+
+# 探测线程池在第一次竞速时创建，导入本模块不启动线程
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="AutoShutdownProbe")
+        return _pool
+
+# -----------------------------
+# Targets
+# -----------------------------
+def trigger_hosts(conf: Config):
+    """
+    一次触发会访问的主机：各探测目标与通知通道（用于 DNS 预取）。
+    探测目标（conf.net_check_targets）的写法：
+      http(s)://...        HTTP 请求，2xx/3xx 视为在线
+      tcp://host:port      TCP 连接成功视为在线（IPv4/IPv6 竞速）
+      dns://host           域名解析成功视为在线
+    """
+    hosts = []
+    for url in conf.net_check_targets + (conf.pushplus_api, conf.webhook_url):
+        if url:
+            host = urlsplit(url if "://" in url else "https://" + url).hostname
+            if host:
+                hosts.append(host)
+    return hosts
+
+
+def _probe(target: str, method: str, timeout: float, cancel: threading.Event):
+    """返回 (是否在线, 收发字节数, 首字节ms)；非 HTTP 目标没有字节与首字节统计。"""
+    u = urlsplit(target if "://" in target else "https://" + target)
+    scheme = u.scheme.lower()
+    if scheme in ("http", "https"):
+        url = target if "://" in target else "https://" + target
+        if method == "GET":
+            resp = get_client().request("GET", url, timeout=timeout, cancel=cancel)
+            return int(resp.status) // 100 in (2, 3), len(resp.body or b""), resp.timing["ttfb_ms"]
+        resp = get_client().probe(url, method="GET" if method == "204" else "HEAD", timeout=timeout,
+                                  cancel=cancel)
+        t = resp.timing
+        if method == "204":
+            # 门户页（强制登录的 Wi-Fi）会返回 200/302，只有 204 说明真正联网
+            ok = resp.status == 204
+        else:
+            # 405/501：服务器不支持 HEAD，但已经应答
+            ok = resp.status // 100 in (2, 3) or resp.status in (405, 501)
+        return ok, t["bytes_sent"] + t["bytes_received"], t["ttfb_ms"]
+    if scheme == "tcp":
+        sock = happy_eyeballs_connect((u.hostname, u.port or 443), timeout=timeout, cancel=cancel)
+        sock.close()
+        return True, 0, None
+    if scheme == "dns":
+        # 强制重新解析（缓存的结果不能说明当前联网），结果留给随后的 HTTP 请求复用
+        return bool(get_resolver().getaddrinfo(u.hostname, None, force=True)), 0, None
+    raise ValueError(f"unsupported probe target: {target!r}")
+
+
+def _run(target: str, method: str, timeout: float, cancel: threading.Event):
+    t0 = time.perf_counter()
+    try:
+        ok, nbytes, ttfb_ms = _probe(target, method, timeout, cancel)
+    except Exception:
+        ok, nbytes, ttfb_ms = False, 0, None
+    return [bool(ok), round((time.perf_counter() - t0) * 1000.0, 1), nbytes, ttfb_ms]
+
+# -----------------------------
+# Race
+# -----------------------------
+def race_probes(conf: Config, targets=None) -> RaceResult:
+    """
+    所有目标并发探测，第一个在线结论立即返回并通知其余探测放弃；
+    全部失败才判定离线。总耗时不超过 net_check_timeout_sec（另加少量余量）。
+    """
+    targets = targets or conf.net_check_targets
+    method = conf.net_check_method
+    timeout = conf.net_check_timeout_sec
+    bound = timeout + _GRACE_SEC
+    cancel = threading.Event()
+    t0 = time.perf_counter()
+
+    pool = _get_pool()
+    futures = {pool.submit(_run, t, method, timeout, cancel): t for t in targets}
+    pending = set(futures)
+    results = {}
+    winner = None
+    while pending and winner is None:
+        remaining = t0 + bound - time.perf_counter()
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for fut in done:
+            results[futures[fut]] = fut.result()
+            if results[futures[fut]][0] and winner is None:
+                winner = futures[fut]
+
+    # 其余探测收到 cancel 后关闭连接（连接、发送后与等待应答时都会检查），这里不再等待
+    cancel.set()
+    for fut in pending:
+        fut.cancel()
+        results[futures[fut]] = [None, None, None, None]
+
+    latency_ms = round((time.perf_counter() - t0) * 1000.0, 1)
+    nbytes = sum(r[2] or 0 for r in results.values())
+    result = RaceResult(winner is not None, winner, latency_ms, round(bound * 1000.0), results, nbytes)
+    log_stats("probe_race", online=result.online, winner=winner, method=method, latency_ms=latency_ms,
+              bound_ms=result.bound_ms, bytes=nbytes, results=results)
+    return result
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+from core import ensure_dirs, log_error, log_stats, write_file_atomic, APPDATA_DIR
+
+RATELIMIT_PATH = os.path.join(APPDATA_DIR, "ratelimit.json")
+
+# acquire() 的结果
+ALLOW = "allow"
+DUPLICATE = "duplicate"
+LIMITED = "limited"
+
+# -----------------------------
+# Token bucket
+# -----------------------------
+class TokenBucket:
+    """容量 burst、每小时补充 rate_per_hour 个令牌；时间用墙钟，重启后按离线时长补足。"""
+    __slots__ = ("rate_per_hour", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate_per_hour: float, burst: float, tokens: float = None, updated_at: float = None):
+        self.rate_per_hour = float(rate_per_hour)
+        self.burst = float(burst)
+        self.tokens = self.burst if tokens is None else float(tokens)
+        self.updated_at = time.time() if updated_at is None else float(updated_at)
+
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate_per_hour / 3600.0)
+        self.updated_at = now
+
+    def take(self, now: float):
+        """取一个令牌；成功返回 0，否则返回需要等待的秒数。"""
+        self._refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        if self.rate_per_hour <= 0:
+            return float("inf")
+        return (1.0 - self.tokens) * 3600.0 / self.rate_per_hour
+
+# -----------------------------
+# Limiter
+# -----------------------------
+class SendLimiter:
+    """
+    按 (token, topic) 限流并对相同内容去重，状态持久化到 ratelimit.json。
+    键为哈希值，不在磁盘上保存 token 明文。
+    """
+
+    def __init__(self, path: str = RATELIMIT_PATH, clock=time.time):
+        self.path = path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._sent = {}
+        self.allowed = 0
+        self.limited = 0
+        self.duplicates = 0
+        self._load()
+
+    @staticmethod
+    def key_for(*parts) -> str:
+        return hashlib.sha1("\x00".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def content_hash(key: str, title: str, content: str) -> str:
+        return hashlib.sha1(f"{key}\x00{title}\x00{content}".encode("utf-8")).hexdigest()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._buckets = {k: tuple(v) for k, v in (data.get("buckets") or {}).items()}
+            self._sent = dict(data.get("sent") or {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log_error(e)
+
+    def _save(self):
+        try:
+            ensure_dirs(os.path.dirname(self.path))
+            write_file_atomic(self.path, json.dumps({"buckets": self._buckets, "sent": self._sent}))
+        except Exception as e:
+            log_error(e)
+
+    def acquire(self, key: str, title: str, content: str, rate_per_hour: float, burst: float,
+                dedup_sec: float):
+        """返回 (结果, 需等待秒数)：ALLOW 已占用一个令牌；DUPLICATE 窗口内已送达过相同内容；LIMITED 超出配额。"""
+        now = self.clock()
+        digest = self.content_hash(key, title, content)
+        with self._lock:
+            # 清理过期的去重记录
+            self._sent = {h: t for h, t in self._sent.items() if now - t < dedup_sec}
+            if digest in self._sent:
+                self.duplicates += 1
+                verdict, wait = DUPLICATE, 0.0
+            else:
+                tokens, updated_at = self._buckets.get(key, (None, None))
+                bucket = TokenBucket(rate_per_hour, burst, tokens, updated_at if tokens is not None else now)
+                wait = bucket.take(now)
+                self._buckets[key] = (round(bucket.tokens, 4), bucket.updated_at)
+                if wait > 0:
+                    self.limited += 1
+                    verdict = LIMITED
+                else:
+                    self.allowed += 1
+                    verdict = ALLOW
+            self._save()
+        log_stats("ratelimit", key=key, verdict=verdict, wait_sec=round(min(wait, 1e9), 1), **self.stats(key))
+        return verdict, wait
+
+    def mark_sent(self, key: str, title: str, content: str):
+        with self._lock:
+            self._sent[self.content_hash(key, title, content)] = self.clock()
+            self._save()
+
+    def stats(self, key: str = None) -> dict:
+        out = {"allowed": self.allowed, "limited": self.limited, "duplicates": self.duplicates}
+        if key is not None and key in self._buckets:
+            out["tokens"] = self._buckets[key][0]
+        return out
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_limiter() -> SendLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = SendLimiter()
+        return _limiter
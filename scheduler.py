@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+import itertools
+
+from core import log_error, log_stats
+
+# 超过该值的延迟写入 stats.log
+LATE_REPORT_SEC = 1.0
+# 系统定时器的最长间隔（USER_TIMER_MAXIMUM 约 24.8 天），更远的截止时间分段等待
+MAX_ARM_MS = 0x7FFFFFFF
+# 提前这么多以内的截止时间视为已到期（系统定时器按毫秒取整）
+_EPSILON = 0.001
+# run_due() 后系统定时器的状态未知（SetTimer 为周期定时器，不 kill 会继续触发）
+_EXPIRED = object()
+
+# -----------------------------
+# Deadline scheduler
+# -----------------------------
+class Scheduler:
+    """
+    按单调时钟截止时间排序的定时任务队列，与平台无关。
+    同名任务只保留最新的一次计划；任何时刻只为最早的截止时间设置一个系统定时器（arm），
+    到期后由宿主调用 run_due() 执行所有到期任务并重新设置定时器。
+    """
+
+    def __init__(self, clock, arm, disarm=None):
+        self.clock = clock
+        self._arm = arm
+        self._disarm = disarm or (lambda: None)
+        self._heap = []               # (deadline, seq, name)
+        self._entries = {}            # name -> (deadline, seq, callback, period)
+        self._seq = itertools.count()
+        self._armed_for = None
+        self.lateness = {}            # name -> 最近一次触发的延迟（秒）
+        self.fired = 0
+
+    def schedule(self, name: str, delay_sec: float, callback, period: float = None):
+        """delay_sec 秒后执行 callback；period 非空时按周期重复。"""
+        self.schedule_at(name, self.clock() + max(0.0, float(delay_sec)), callback, period)
+
+    def schedule_at(self, name: str, deadline: float, callback, period: float = None):
+        seq = next(self._seq)
+        self._entries[name] = (float(deadline), seq, callback, period)
+        heapq.heappush(self._heap, (float(deadline), seq, name))
+        self._rearm()
+
+    def cancel(self, name: str):
+        if self._entries.pop(name, None) is not None:
+            self._rearm()
+
+    def deadline(self, name: str):
+        entry = self._entries.get(name)
+        return None if entry is None else entry[0]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def _peek(self):
+        """最早的有效条目（顺带丢弃已被替换或取消的堆元素）。"""
+        while self._heap:
+            deadline, seq, name = self._heap[0]
+            entry = self._entries.get(name)
+            if entry is not None and entry[1] == seq:
+                return deadline, name
+            heapq.heappop(self._heap)
+        return None
+
+    def next_deadline(self):
+        top = self._peek()
+        return None if top is None else top[0]
+
+    def _rearm(self):
+        deadline = self.next_deadline()
+        if self._armed_for is not _EXPIRED and deadline == self._armed_for:
+            return
+        self._armed_for = deadline
+        if deadline is None:
+            self._disarm()
+            return
+        delay_ms = (deadline - self.clock()) * 1000.0
+        # 向上取整，避免定时器早于截止时间触发
+        self._arm(max(1, min(MAX_ARM_MS, int(delay_ms) + (0 if delay_ms == int(delay_ms) else 1))))
+
+    def run_due(self):
+        """执行所有已到期任务，返回 [(名称, 延迟秒数)]。"""
+        fired = []
+        # 系统定时器已触发，无论是否有任务到期都需要重新设置（或在队列为空时取消）
+        self._armed_for = _EXPIRED
+        while True:
+            now = self.clock()
+            top = self._peek()
+            if top is None or top[0] > now + _EPSILON:
+                break
+            deadline, name = top
+            heapq.heappop(self._heap)
+            _, _, callback, period = self._entries.pop(name)
+            late = max(0.0, now - deadline)
+            self.lateness[name] = late
+            self.fired += 1
+            fired.append((name, late))
+            if late > LATE_REPORT_SEC:
+                log_stats("timer_late", name=name, late_sec=round(late, 3))
+            if period:
+                # 周期任务错过多个周期时只补执行一次
+                nxt = deadline + period
+                if nxt <= now:
+                    nxt = now + period
+                seq = next(self._seq)
+                self._entries[name] = (nxt, seq, callback, period)
+                heapq.heappush(self._heap, (nxt, seq, name))
+            try:
+                callback()
+            except Exception as e:
+                log_error(e)
+        self._rearm()
+        return fired
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+虚拟时钟模拟：用脚本化的用户活动/开机轨迹驱动 App.tick / should_trigger / apply_main_timer，
+直接跳到下一次定时器到期时刻，不做真实等待。用于调参（uptime_hours、idle_minutes、
+online_remind_times、resume_grace_sec），一个月的行为可在一秒内回放。
+
+    python simulate.py --days 30 --idle-minutes 45 --remind-times 2
+"""
+
+import sys
+import json
+import time
+import bisect
+import random
+import argparse
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from constants import TIMER_MAIN
+from core import DEFAULT_CONFIG, Config, set_stats_sink
+from backend import FakeBackend
+from worker import InlineWorker
+from app import App
+
+# -----------------------------
+# Traces
+# -----------------------------
+class ActivityTrace:
+    """用户活动区间 [start, end)（秒，相对模拟起点）与开机时刻；活动期间视为持续有输入。"""
+
+    def __init__(self, active_intervals, boots=(0.0,)):
+        spans = sorted((float(a), float(b)) for a, b in active_intervals if b > a)
+        self.starts = [a for a, _ in spans]
+        self.ends = [b for _, b in spans]
+        self.boots = sorted(float(b) for b in boots) or [0.0]
+
+    def last_input(self, t: float) -> float:
+        i = bisect.bisect_right(self.starts, t) - 1
+        if i < 0:
+            return float("-inf")
+        return min(t, self.ends[i])
+
+    def is_active(self, t: float) -> bool:
+        i = bisect.bisect_right(self.starts, t) - 1
+        return i >= 0 and t < self.ends[i]
+
+    def next_active(self, t: float):
+        """t 之后（含 t 所在的活动区间）用户最早出现的时刻；没有则返回 None。"""
+        if self.is_active(t):
+            return t
+        i = bisect.bisect_right(self.starts, t)
+        return self.starts[i] if i < len(self.starts) else None
+
+    def boot_time(self, t: float) -> float:
+        i = bisect.bisect_right(self.boots, t) - 1
+        return self.boots[max(0, i)]
+
+    @classmethod
+    def office_hours(cls, days: int, start: datetime):
+        """工作日 09:00-12:00、13:30-18:00 在岗，周末不在；机器一直开着。"""
+        spans = []
+        day0 = datetime(start.year, start.month, start.day)
+        for d in range(days):
+            day = day0 + timedelta(days=d)
+            if day.weekday() >= 5:
+                continue
+            for (h1, m1), (h2, m2) in (((9, 0), (12, 0)), ((13, 30), (18, 0))):
+                a = (day.replace(hour=h1, minute=m1) - start).total_seconds()
+                b = (day.replace(hour=h2, minute=m2) - start).total_seconds()
+                if b > 0:
+                    spans.append((max(0.0, a), b))
+        return cls(spans)
+
+    @classmethod
+    def from_csv(cls, path: str):
+        """每行 "start,end"（秒）表示一个活动区间；以 "boot," 开头的行表示开机时刻。"""
+        spans, boots = [], []
+        with open(path, "r", encoding="utf-8") as f:
+            for ln in f:
+                ln = ln.strip()
+                if not ln or ln.startswith("#"):
+                    continue
+                a, b = [x.strip() for x in ln.split(",", 1)]
+                if a == "boot":
+                    boots.append(float(b))
+                else:
+                    spans.append((float(a), float(b)))
+        return cls(spans, boots or (0.0,))
+
+
+class TraceBackend(FakeBackend):
+    """按活动轨迹计算空闲/开机时长的 FakeBackend。"""
+
+    def __init__(self, trace: ActivityTrace, start: datetime):
+        super().__init__(start=start)
+        self.trace = trace
+
+    def idle_seconds(self) -> int:
+        boot = self.trace.boot_time(self.mono)
+        return max(0, int(self.mono - max(self.trace.last_input(self.mono), boot)))
+
+    def uptime_seconds(self) -> int:
+        return max(0, int(self.mono - self.trace.boot_time(self.mono)))
+
+# -----------------------------
+# Simulated app
+# -----------------------------
+SimEvent = namedtuple("SimEvent", "t when kind detail")
+
+
+class _SimCountdown:
+    def __init__(self, opened: float, deadline: float):
+        self.opened = opened
+        self.deadline = deadline
+
+
+class SimApp(App):
+    """替换 UI、网络与持久化：联网与发送结果来自脚本，倒计时由模拟器推进。"""
+
+    def __init__(self, sim, cfg: dict):
+        super().__init__(cfg=cfg, backend=sim.backend, worker=InlineWorker())
+        self.sim = sim
+
+    def tray_info(self, title: str, msg: str, level=0):
+        self.sim.emit("tray", msg)
+
+    def probe_online(self, conf: Config) -> bool:
+        online = bool(self.sim.online(self.backend.mono))
+        self.sim.emit("probe", {"online": online})
+        return online
+
+    def send_message(self, conf: Config, title: str, content: str, channels=None):
+        ok = bool(self.sim.send_ok(self.backend.mono))
+        self.sim.emit("remind", {"ok": ok, "index": self.online_remind_count + 1})
+        return ok, ("ok" if ok else "simulated failure")
+
+    def show_countdown(self, countdown: int, detail: str):
+        now = self.backend.mono
+        self.sim.emit("countdown", {"seconds": countdown})
+        return _SimCountdown(now, now + max(1, int(countdown)))
+
+    def persist_config(self, flush: bool = False):
+        pass
+
+    def prewarm(self, deadline: float):
+        pass
+
+# -----------------------------
+# Simulator
+# -----------------------------
+class Simulator:
+    def __init__(self, cfg: dict, trace: ActivityTrace, start: datetime = datetime(2024, 1, 1),
+                 online=None, send_ok=None, user_cancels_on_return: bool = True, stats_sink=None):
+        self.backend = TraceBackend(trace, start)
+        self.trace = trace
+        self.online = online or (lambda t: True)
+        self.send_ok = send_ok or (lambda t: True)
+        self.user_cancels_on_return = user_cancels_on_return
+        # 模拟期间的 log_stats 记录（默认丢弃），不写入真实的 stats.log
+        self.stats_sink = stats_sink or (lambda rec: None)
+        self._events = []
+        self.app = SimApp(self, dict(DEFAULT_CONFIG, **(cfg or {})))
+
+    def emit(self, kind: str, detail=None):
+        b = self.backend
+        self._events.append(SimEvent(b.mono, b.now(), kind, detail))
+
+    def _drain(self):
+        events, self._events = self._events, []
+        return events
+
+    def _resolve_countdown(self, dlg: _SimCountdown):
+        b = self.backend
+        app = self.app
+        back = self.trace.next_active(dlg.opened) if self.user_cancels_on_return else None
+        app.active_dialog = None
+        if back is not None and back < dlg.deadline:
+            b.mono = back
+            self.emit("cancel")
+            return
+
+        b.mono = dlg.deadline
+        marked = app.mark_hibernate_time()
+        if not b.hibernate():
+            app.revert_hibernate_time(*marked)
+            self.emit("hibernate_failed")
+            return
+        self.emit("hibernate")
+
+        # 休眠期间定时器不触发；用户回来时唤醒
+        wake = self.trace.next_active(b.mono)
+        if wake is None:
+            b.mono = float("inf")
+            return
+        b.mono = wake
+        self.emit("resume")
+        app.on_resume_event()
+
+    def run(self, duration_sec: float):
+        """推进到 duration_sec 为止，逐个产出 SimEvent。"""
+        prev_sink = set_stats_sink(self.stats_sink)
+        try:
+            yield from self._run(duration_sec)
+        finally:
+            set_stats_sink(prev_sink)
+
+    def _run(self, duration_sec: float):
+        b = self.backend
+        app = self.app
+        app.apply_main_timer()
+        while True:
+            if isinstance(app.active_dialog, _SimCountdown):
+                self._resolve_countdown(app.active_dialog)
+                yield from self._drain()
+                if b.mono > duration_sec:
+                    return
+                continue
+
+            deadline = b.timers.get(TIMER_MAIN)
+            if deadline is None or deadline > duration_sec:
+                return
+            b.mono = deadline
+            # 与 WM_TIMER 相同：由调度器执行所有到期任务并重新设置定时器
+            app.on_timer()
+            yield from self._drain()
+
+# -----------------------------
+# CLI
+# -----------------------------
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="AutoShutdown virtual-clock simulation")
+    ap.add_argument("--days", type=float, default=30)
+    ap.add_argument("--trace", help="CSV activity trace (start,end seconds per line)")
+    ap.add_argument("--uptime-hours", type=int, default=DEFAULT_CONFIG["uptime_hours"])
+    ap.add_argument("--idle-minutes", type=int, default=DEFAULT_CONFIG["idle_minutes"])
+    ap.add_argument("--remind-times", type=int, default=DEFAULT_CONFIG["online_remind_times"])
+    ap.add_argument("--resume-grace", type=int, default=DEFAULT_CONFIG["resume_grace_sec"])
+    ap.add_argument("--countdown", type=int, default=DEFAULT_CONFIG["pre_hibernate_countdown_sec"])
+    ap.add_argument("--offline-rate", type=float, default=0.0, help="probability a probe reports offline")
+    ap.add_argument("--send-fail-rate", type=float, default=0.0, help="probability a send fails")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--kinds", default="remind,countdown,cancel,hibernate,resume",
+                    help="comma separated event kinds to print ('all' for everything)")
+    args = ap.parse_args(argv)
+
+    start = datetime(2024, 1, 1)
+    trace = ActivityTrace.from_csv(args.trace) if args.trace else ActivityTrace.office_hours(int(args.days) + 1, start)
+    rng = random.Random(args.seed)
+    cfg = {
+        "uptime_hours": args.uptime_hours,
+        "idle_minutes": args.idle_minutes,
+        "online_remind_times": args.remind_times,
+        "resume_grace_sec": args.resume_grace,
+        "pre_hibernate_countdown_sec": args.countdown,
+    }
+    sim = Simulator(
+        cfg, trace, start=start,
+        online=lambda t: rng.random() >= args.offline_rate,
+        send_ok=lambda t: rng.random() >= args.send_fail_rate,
+    )
+
+    kinds = None if args.kinds == "all" else set(args.kinds.split(","))
+    counts = {}
+    t0 = time.perf_counter()
+    for ev in sim.run(args.days * 86400):
+        counts[ev.kind] = counts.get(ev.kind, 0) + 1
+        if kinds is None or ev.kind in kinds:
+            print(json.dumps({"t": ev.t, "time": ev.when.isoformat(timespec="seconds"),
+                              "kind": ev.kind, "detail": ev.detail}, ensure_ascii=False))
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({"summary": counts, "simulated_days": args.days, "elapsed_sec": round(elapsed, 4)},
+                     ensure_ascii=False), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
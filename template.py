@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import re
+import socket
+
+# 提醒模板支持的占位符；其他 {xxx} 按原文保留
+PLACEHOLDERS = (
+    "base_info", "hostname", "uptime", "idle", "time", "ip", "battery", "last_hibernate", "remind_index",
+)
+
+BASE_INFO_TEMPLATE = "电脑已运行：{uptime}\n空闲时间：{idle}\n时间：{time}"
+
+_FIELD_RE = re.compile(r"\{(\w+)\}")
+
+# -----------------------------
+# Compiled template
+# -----------------------------
+class CompiledTemplate:
+    """
+    模板在配置加载时编译为片段列表：字符串片段原样输出，占位符片段渲染时从上下文取值。
+    fields 为模板实际用到的占位符，未用到的值不会被计算。
+    """
+    __slots__ = ("source", "segments", "fields")
+
+    def __init__(self, source: str, segments, fields):
+        self.source = source
+        self.segments = segments
+        self.fields = fields
+
+    def render(self, ctx) -> str:
+        out = []
+        for is_field, value in self.segments:
+            out.append(str(ctx[value]) if is_field else value)
+        return "".join(out)
+
+    def __repr__(self):
+        return f"CompiledTemplate({self.source!r})"
+
+
+def compile_template(source: str, prepend_base_info: bool = False) -> CompiledTemplate:
+    """
+    prepend_base_info：模板中没有任何占位符时，在前面加上 {base_info}（兼容旧模板的行为）。
+    """
+    source = source or ""
+    segments = []
+    fields = set()
+    pos = 0
+    for m in _FIELD_RE.finditer(source):
+        name = m.group(1)
+        if name not in PLACEHOLDERS:
+            continue
+        if m.start() > pos:
+            segments.append((False, source[pos:m.start()]))
+        segments.append((True, name))
+        fields.add(name)
+        pos = m.end()
+    if pos < len(source):
+        segments.append((False, source[pos:]))
+    if prepend_base_info and not fields:
+        segments[:0] = [(True, "base_info"), (False, "\n\n")]
+        fields.add("base_info")
+    return CompiledTemplate(source, tuple(segments), frozenset(fields))
+
+
+BASE_INFO = compile_template(BASE_INFO_TEMPLATE)
+
+# -----------------------------
+# Lazy context
+# -----------------------------
+class TemplateContext:
+    """
+    占位符的值按需计算并缓存：resolvers 为 {名称: fn(ctx)}，values 为已知值（优先于 resolver）。
+    计算失败的占位符渲染为空字符串。
+    """
+
+    def __init__(self, resolvers: dict, **values):
+        self._resolvers = resolvers
+        self._values = values
+
+    def __getitem__(self, name: str):
+        if name not in self._values:
+            fn = self._resolvers.get(name)
+            try:
+                self._values[name] = fn(self) if fn else ""
+            except Exception:
+                self._values[name] = ""
+        return self._values[name]
+
+    def computed(self):
+        return sorted(self._values)
+
+    def with_values(self, **values):
+        """派生一个上下文：覆盖部分值，其余仍按需计算（已算出的值沿用）。"""
+        return TemplateContext(self._resolvers, **dict(self._values, **values))
+
+# -----------------------------
+# Value helpers
+# -----------------------------
+def local_ip() -> str:
+    """默认路由所在网卡的地址；UDP connect 不发送数据包。"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.connect(("223.5.5.5", 53))
+        return s.getsockname()[0]
+
+
+def format_battery(status) -> str:
+    """status 为 (百分比, 是否接通电源) 或 None（无电池/未知）。"""
+    if not status or status[0] is None:
+        return "无电池"
+    percent, plugged = status
+    return f"{int(percent)}%" + ("（充电中）" if plugged else "")
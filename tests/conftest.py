@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import tempfile
+
+# core 在导入时根据 APPDATA 确定配置 / 日志目录，测试不应写入真实的 stats.log
+os.environ["APPDATA"] = tempfile.mkdtemp(prefix="autoshutdown-tests-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
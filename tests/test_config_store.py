@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from backend import FakeBackend
+from core import DEFAULT_CONFIG, ConfigStore
+from worker import InlineWorker
+
+
+class BusyOnceWorker(InlineWorker):
+    """第一次提交时同 key 的任务仍在执行（返回 False），之后同步执行。"""
+
+    def __init__(self):
+        self.rejected = 0
+
+    def submit(self, fn, callback=None, key=None, low_priority: bool = False) -> bool:
+        if key == "config_save" and not self.rejected:
+            self.rejected += 1
+            return False
+        return super().submit(fn, callback, key, low_priority)
+
+
+def make_app(worker):
+    from app import App
+
+    class QuietApp(App):
+        def tray_info(self, *args, **kwargs):
+            pass
+
+    return QuietApp(cfg=dict(DEFAULT_CONFIG), backend=FakeBackend(), worker=worker)
+
+
+def run_timers(app, seconds: float):
+    end = app.backend.monotonic() + seconds
+    while app.scheduler.next_deadline() is not None and app.scheduler.next_deadline() <= end:
+        app.backend.advance(max(0.0, app.scheduler.next_deadline() - app.backend.monotonic()))
+        app.scheduler.run_due()
+
+
+def test_save_written_when_previous_flush_still_running(tmp_path):
+    worker = BusyOnceWorker()
+    app = make_app(worker)
+    store = ConfigStore(str(tmp_path / "config.json"))
+    store.use_scheduler(app._schedule_config_flush)
+    store.save({"idle_minutes": 30})
+    assert store.pending()
+    run_timers(app, 5)
+    assert worker.rejected == 1
+    assert not store.pending()
+    with open(store.path, encoding="utf-8") as f:
+        assert json.load(f) == {"idle_minutes": 30}
+
+
+def test_save_coalesced_and_owned(tmp_path):
+    app = make_app(InlineWorker())
+    store = ConfigStore(str(tmp_path / "config.json"))
+    store.use_scheduler(app._schedule_config_flush)
+    store.save({"a": 1})
+    store.save({"a": 2})
+    assert "config_save" in app.scheduler
+    run_timers(app, 5)
+    with open(store.path, encoding="utf-8") as f:
+        text = f.read()
+    assert json.loads(text) == {"a": 2}
+    assert store.owns(text) and not store.pending()
+
+
+def test_ui_calls_not_blocked_by_disk_write(tmp_path, monkeypatch):
+    import threading
+    import core
+
+    entered = threading.Event()
+    release = threading.Event()
+    real_write = core.write_file_atomic
+
+    def slow_write(path, text):
+        entered.set()
+        assert release.wait(5)
+        real_write(path, text)
+
+    monkeypatch.setattr(core, "write_file_atomic", slow_write)
+    store = ConfigStore(str(tmp_path / "config.json"), delay_sec=3600)
+    store.save({"a": 1})
+    writer = threading.Thread(target=store.flush)
+    writer.start()
+    try:
+        assert entered.wait(5)
+        # 写盘期间：正在写出的内容仍算“未落盘”，也属于本进程
+        done = threading.Event()
+
+        def ui():
+            assert store.pending()
+            assert store.owns(json.dumps({"a": 1}, ensure_ascii=False, indent=2))
+            store.save({"a": 1})          # 与正在写出的内容相同：不再排队
+            assert store._pending is None
+            store.save({"a": 2})
+            done.set()
+
+        t = threading.Thread(target=ui)
+        t.start()
+        assert done.wait(1.0), "UI thread blocked by the disk write"
+        t.join()
+    finally:
+        release.set()
+        writer.join(5)
+    store.flush()
+    with open(store.path, encoding="utf-8") as f:
+        assert json.load(f) == {"a": 2}
+    assert not store.pending()
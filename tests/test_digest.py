@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+import pytest
+
+from backend import FakeBackend
+from core import DEFAULT_CONFIG
+from worker import InlineWorker
+
+
+@pytest.fixture
+def make_app():
+    from app import App
+
+    class DigestApp(App):
+        def __init__(self, cfg, results):
+            super().__init__(cfg=dict(DEFAULT_CONFIG, **cfg), backend=FakeBackend(), worker=InlineWorker())
+            self.results = list(results)
+            self.sent = []
+            self.countdowns = []
+            self.connectivity.check = lambda conf, force=False: True
+
+        def tray_info(self, *args, **kwargs):
+            pass
+
+        def send_message(self, cfg, title, content, channels=None):
+            self.sent.append(title)
+            return self.results.pop(0)
+
+        def show_countdown(self, countdown, detail):
+            self.countdowns.append(detail)
+            return object()
+
+    return DigestApp
+
+
+def trigger(app, base_info="info"):
+    app.on_probe_result(True, "title", "content", base_info, timedelta(minutes=60))
+
+
+def test_queued_reminder_is_not_counted_until_delivered(make_app):
+    app = make_app({"digest_window_sec": 600, "online_remind_times": 1}, [(True, "ok")])
+    trigger(app)
+    assert app.sent == [] and len(app.digest) == 1
+    assert app.online_remind_count == 0 and app.countdowns == []
+    app.flush_digest()
+    assert app.sent == ["title"]
+    # 送达后达到 online_remind_times：进入休眠倒计时
+    assert len(app.countdowns) == 1
+
+
+def test_merged_reminders_count_each_entry(make_app):
+    app = make_app({"digest_window_sec": 600, "online_remind_times": 3}, [(True, "ok")])
+    trigger(app, "a")
+    trigger(app, "b")
+    app.flush_digest()
+    assert app.online_remind_count == 2 and app.countdowns == []
+
+
+def test_failed_digest_counts_toward_send_fail_hibernate_after(make_app):
+    app = make_app({"digest_window_sec": 600, "online_remind_times": 0, "send_fail_hibernate_after": 2},
+                   [(False, "HTTP 500"), (False, "HTTP 500")])
+    trigger(app)
+    app.flush_digest()
+    assert app.send_fail_streak == 1 and app.countdowns == []
+    trigger(app)
+    app.flush_digest()
+    assert len(app.countdowns) == 1
+    assert app.online_remind_count == 0
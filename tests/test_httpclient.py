@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+import http.client
+import socket
+import threading
+import time
+
+import pytest
+
+from httpclient import HttpClient
+
+
+class DroppingServer:
+    """
+    本地 HTTP/1.1 桩服务器：每个连接上的第一个请求正常应答（keep-alive），
+    之后的请求读完后不应答直接断开——模拟服务端已收到请求、响应前连接被关闭。
+    """
+
+    def __init__(self):
+        self.requests = []
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(8)
+        self.port = self._sock.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        f = conn.makefile("rb")
+        try:
+            for n in range(2):
+                line = f.readline()
+                if not line:
+                    return
+                length = 0
+                while True:
+                    h = f.readline()
+                    if h in (b"\r\n", b""):
+                        break
+                    name, _, value = h.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                body = f.read(length) if length else b""
+                self.requests.append((line.split()[0].decode(), body))
+                if n == 0:
+                    conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: keep-alive\r\n\r\nok")
+        finally:
+            f.close()
+            conn.close()
+
+    def close(self):
+        self._sock.close()
+
+
+@pytest.fixture
+def server():
+    s = DroppingServer()
+    yield s
+    s.close()
+
+
+def test_post_not_resent_after_disconnect_on_reused_connection(server):
+    client = HttpClient(use_proxies=False)
+    url = f"http://127.0.0.1:{server.port}/send"
+    assert client.request("POST", url, body=b"first", timeout=2).status == 200
+    with pytest.raises((http.client.RemoteDisconnected, ConnectionResetError)):
+        client.request("POST", url, body=b"second", timeout=2)
+    # 服务端可能已处理第二个请求：不能再发一次
+    assert [b for _, b in server.requests] == [b"first", b"second"]
+
+
+def test_get_retried_on_fresh_connection(server):
+    client = HttpClient(use_proxies=False)
+    url = f"http://127.0.0.1:{server.port}/check"
+    assert client.request("GET", url, timeout=2).status == 200
+    resp = client.request("GET", url, timeout=2)
+    assert resp.status == 200 and resp.body == b"ok"
+    assert [m for m, _ in server.requests] == ["GET", "GET", "GET"]
+    assert resp.timing["reused"] is False
+
+
+@pytest.mark.parametrize("method", ["HEAD", "GET"])
+def test_cancelled_probe_stops_waiting_for_response(method):
+    # 连接成功但始终不应答：竞速已有结论后，落败的探测应随 cancel 放弃而不是等到超时
+    silent = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    silent.bind(("127.0.0.1", 0))
+    silent.listen(4)
+    port = silent.getsockname()[1]
+    client = HttpClient(use_proxies=False)
+    cancel = threading.Event()
+    threading.Timer(0.2, cancel.set).start()
+    url = f"http://127.0.0.1:{port}/generate_204"
+    t0 = time.monotonic()
+    try:
+        with pytest.raises(ConnectionAbortedError):
+            if method == "GET":
+                client.request("GET", url, timeout=5, cancel=cancel)
+            else:
+                client.probe(url, method="HEAD", timeout=5, cancel=cancel)
+    finally:
+        silent.close()
+    assert time.monotonic() - t0 < 2
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+from backend import FakeBackend
+from idleclock import IdleClock, TICK_MASK, TICK_WRAP
+
+DAY_MS = 24 * 3600 * 1000
+SEED = 20260923
+
+
+def sample(clock, last_input, now):
+    """按 GetLastInputInfo 的方式把 64 位最后输入时刻截断为 32 位再交给 IdleClock。"""
+    return clock.idle_ms(last_input & TICK_MASK, now)
+
+
+def test_random_uptimes_within_one_wrap():
+    rng = random.Random(SEED)
+    for _ in range(5000):
+        now = rng.randrange(0, 1 << 64)
+        idle = rng.randrange(0, min(now + 1, TICK_WRAP))
+        assert sample(IdleClock(), now - idle, now) == idle
+
+
+def test_input_before_wrap_now_after():
+    rng = random.Random(SEED + 1)
+    for _ in range(2000):
+        epoch = rng.randrange(1, 1 << 20)
+        boundary = epoch * TICK_WRAP
+        last_input = boundary - rng.randrange(1, 10 * DAY_MS)
+        now = boundary + rng.randrange(0, 10 * DAY_MS)
+        assert sample(IdleClock(), last_input, now) == now - last_input
+
+
+def test_idle_longer_than_one_wrap_with_regular_sampling():
+    rng = random.Random(SEED + 2)
+    for _ in range(50):
+        clock = IdleClock()
+        last_input = rng.randrange(0, 1 << 40)
+        now = last_input
+        # 空闲约 50~200 天，采样间隔不超过一个回绕周期
+        end = last_input + rng.randrange(50 * DAY_MS, 200 * DAY_MS)
+        while now < end:
+            now = min(end, now + rng.randrange(1, TICK_WRAP))
+            assert sample(clock, last_input, now) == now - last_input
+
+
+def test_new_input_after_long_idle():
+    clock = IdleClock()
+    last_input = 3 * TICK_WRAP - 1000
+    for now in range(last_input, last_input + 3 * TICK_WRAP, DAY_MS):
+        assert sample(clock, last_input, now) == now - last_input
+    # 长时间空闲后的新输入
+    last_input = now + 1234
+    now = last_input + 5000
+    assert sample(clock, last_input, now) == 5000
+
+
+def test_reset_after_reboot():
+    rng = random.Random(SEED + 3)
+    for _ in range(500):
+        clock = IdleClock()
+        last_input = rng.randrange(TICK_WRAP, 1 << 40)
+        now = last_input + rng.randrange(0, 30 * DAY_MS)
+        assert sample(clock, last_input, now) == now - last_input
+        clock.reset()
+        # 重新开机后 tick 从 0 开始
+        now = rng.randrange(0, 30 * DAY_MS)
+        last_input = rng.randrange(0, now + 1)
+        assert sample(clock, last_input, now) == now - last_input
+
+
+def test_never_negative_for_inconsistent_samples():
+    rng = random.Random(SEED + 4)
+    for _ in range(2000):
+        now = rng.randrange(0, TICK_WRAP)
+        raw = rng.randrange(0, TICK_WRAP)
+        assert IdleClock().idle_ms(raw, now) >= 0
+
+
+# -----------------------------
+# FakeBackend
+# -----------------------------
+WRAP_SEC = TICK_WRAP / 1000.0
+
+
+def test_backend_idle_across_tick_wrap():
+    # 开机约 49.7 天：最后输入在回绕前 30 秒，之后 32 位 tick 回绕到 0 附近
+    backend = FakeBackend(uptime_sec=WRAP_SEC - 30)
+    backend.user_input()
+    prev = 0
+    for elapsed in (10, 29, 31, 90, 3600):
+        backend.advance(elapsed - prev)
+        prev = elapsed
+        assert backend.idle_seconds() == elapsed
+    assert backend.tick64() > TICK_WRAP
+    assert backend.last_input_tick() > backend.tick64() & TICK_MASK
+
+
+def test_backend_input_after_tick_wrap():
+    backend = FakeBackend(uptime_sec=WRAP_SEC - 5)
+    backend.user_input()
+    backend.advance(20)
+    assert backend.idle_seconds() == 20
+    backend.user_input()
+    backend.advance(7)
+    assert backend.idle_seconds() == 7
+    assert backend.last_input_tick() < backend.tick64() & TICK_MASK
+
+
+def test_backend_idle_longer_than_one_wrap():
+    # 每天采样一次（远小于回绕周期），空闲 120 天仍连续累计
+    backend = FakeBackend(uptime_sec=WRAP_SEC - 3600)
+    backend.user_input()
+    for day in range(1, 121):
+        backend.advance(24 * 3600)
+        assert backend.idle_seconds() == day * 24 * 3600
+    assert backend.uptime_seconds() > 2 * WRAP_SEC
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+import struct
+import threading
+
+import pytest
+
+import journal as journal_mod
+from backend import FakeBackend
+from journal import ActivityJournal, JournalSampler, OUTCOME_SAMPLE, RECORD
+
+
+def make_sampler(tmp_path, backend=None, **kw):
+    journal = ActivityJournal(str(tmp_path / "activity.bin"), capacity=64)
+    return journal, JournalSampler(journal, backend or FakeBackend(uptime_sec=3600), **kw)
+
+
+def test_backs_off_while_user_active(tmp_path):
+    journal, sampler = make_sampler(tmp_path, interval_sec=60)
+    waits = [60]
+    for _ in range(6):
+        waits.append(sampler.next_wait(waits[-1], idle=3))
+    assert waits == [60, 120, 240, 480, 960, 960, 960]
+    # 用户离开（空闲达到一个间隔）或事件唤醒时恢复基础间隔
+    assert sampler.next_wait(960, idle=60) == 60
+    assert sampler.next_wait(960, idle=3, kicked=True) == 60
+    assert sampler.next_wait(960, idle=None) == 60
+    journal.close()
+
+
+def test_sample_records_idle_and_uptime(tmp_path):
+    backend = FakeBackend(uptime_sec=7200)
+    backend.advance(90)
+    journal, sampler = make_sampler(tmp_path, backend)
+    assert sampler.sample() == backend.idle_seconds()
+    (_ts, idle, uptime, online, outcome), = list(journal.records())
+    assert (idle, uptime, online, outcome) == (backend.idle_seconds(), backend.uptime_seconds(), -1, OUTCOME_SAMPLE)
+    journal.close()
+
+
+def test_kick_samples_immediately_and_stop_joins(tmp_path):
+    journal, sampler = make_sampler(tmp_path, interval_sec=3600)
+    sampler.start()
+    sampler.kick()
+    for _ in range(200):
+        if len(journal):
+            break
+        threading.Event().wait(0.01)
+    assert len(journal) == 1
+    assert sampler.stop(timeout=2.0)
+    assert not sampler._thread.is_alive()
+    journal.close()
+
+
+def test_stop_reports_stuck_thread(tmp_path):
+    release = threading.Event()
+    entered = threading.Event()
+
+    class SlowBackend(FakeBackend):
+        def idle_seconds(self):
+            entered.set()
+            release.wait(5)
+            return 0
+
+    journal, sampler = make_sampler(tmp_path, SlowBackend(), interval_sec=3600)
+    sampler.start()
+    sampler.kick()
+    assert entered.wait(5)
+    # 采样线程仍在读取时不能关闭日志文件
+    assert not sampler.stop(timeout=0.05)
+    release.set()
+    sampler._thread.join(5)
+    journal.close()
+
+
+def test_close_releases_views_and_unmaps(tmp_path):
+    journal = ActivityJournal(str(tmp_path / "activity.bin"), capacity=16)
+    for i in range(20):
+        journal.append(i, i)
+    views = journal.views()
+    assert sum(len(v) for v in views) == 16 * RECORD.size
+    assert len(list(journal.records())) == 16
+    journal.close()
+    assert journal._mm.closed
+    with pytest.raises(ValueError):
+        views[0].tobytes()
+
+
+def test_close_logs_buffer_still_in_use(tmp_path, monkeypatch):
+    errors = []
+    monkeypatch.setattr(journal_mod, "log_error", errors.append)
+    journal = ActivityJournal(str(tmp_path / "activity.bin"), capacity=16)
+    journal.append(1, 2)
+    # 未读完的迭代器仍持有缓冲：close 不能静默吞掉，映射保持打开
+    held = struct.iter_unpack(RECORD.format, journal.views()[0])
+    journal.close()
+    assert errors and all(isinstance(e, BufferError) for e in errors)
+    assert not journal._mm.closed
+    del held
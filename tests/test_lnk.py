@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+import os
+import random
+import struct
+
+import pytest
+
+from lnk import (
+    COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX, HEADER_SIZE, HAS_ARGUMENTS, LnkError, ShellLink,
+    SW_SHOWMINNOACTIVE, build_lnk, parse_lnk, read_lnk, write_lnk,
+)
+
+SAMPLES = [
+    ShellLink(target_path=r"C:\Program Files\AutoShutdown\AutoShutdown.exe"),
+    ShellLink(target_path=r"C:\Program Files\AutoShutdown\AutoShutdown.exe", arguments="--autostart",
+              working_dir=r"C:\Program Files\AutoShutdown",
+              icon_location=r"C:\Program Files\AutoShutdown\AutoShutdown.exe", icon_index=0),
+    ShellLink(target_path=r"D:\工具\自动关机\AutoShutdown.exe", arguments="--配置 \"a b\"",
+              working_dir=r"D:\工具\自动关机", icon_location=r"D:\工具\图标.ico", icon_index=3,
+              description="自动关机"),
+    # 非 BMP 字符（UTF-16 代理对）：长度按 UTF-16 码元计算
+    ShellLink(target_path="C:\\Users\\\U0001F600\\\U00020000app.exe", arguments="--tag \U0001F680",
+              working_dir="C:\\Users\\\U0001F600", icon_location="C:\\\U0001F4BE.ico", icon_index=-2,
+              description="\U0001F600"),
+    ShellLink(target_path="\\\\server\\share\\app.exe", arguments="x" * 1000, show_command=1),
+    ShellLink(target_path="\\\\文件服务器\\共享\\工具\\AutoShutdown.exe", working_dir="\\\\文件服务器\\共享"),
+]
+
+
+def fields(link: ShellLink):
+    return tuple(getattr(link, name) for name in ShellLink.__slots__)
+
+
+@pytest.mark.parametrize("link", SAMPLES)
+def test_build_parse_round_trip(link):
+    assert fields(parse_lnk(build_lnk(link))) == fields(link)
+
+
+@pytest.mark.parametrize("link", SAMPLES)
+def test_write_read_round_trip(tmp_path, link):
+    path = str(tmp_path / "AutoShutdown.lnk")
+    write_lnk(path, link)
+    assert fields(read_lnk(path)) == fields(link)
+    assert not os.path.exists(path + ".tmp")
+    assert read_lnk(path).to_spec() == link.to_spec()
+
+
+def test_defaults_and_spec():
+    link = parse_lnk(build_lnk(ShellLink(target_path=r"C:\a.exe", icon_location=r"C:\a.exe")))
+    assert link.show_command == SW_SHOWMINNOACTIVE
+    assert link.to_spec() == {"TargetPath": r"C:\a.exe", "Arguments": "", "IconLocation": r"C:\a.exe,0",
+                              "WorkingDirectory": ""}
+
+
+def test_target_required():
+    with pytest.raises(LnkError):
+        build_lnk(ShellLink())
+
+
+def test_unc_target_written_as_network_link():
+    data = build_lnk(ShellLink(target_path="\\\\server\\share\\dir\\app.exe"))
+    info = data[HEADER_SIZE:]
+    (_size, _hdr, flags, vol_off, base_off, net_off, suffix_off) = struct.unpack_from("<7I", info, 0)
+    # 网络共享不写卷信息（否则会被当作序列号为 0 的本地固定磁盘）
+    assert flags == COMMON_NETWORK_RELATIVE_LINK_AND_PATH_SUFFIX
+    assert vol_off == base_off == 0 and net_off
+    name_off = struct.unpack_from("<I", info, net_off + 8)[0]
+    assert info[net_off + name_off:].split(b"\x00", 1)[0] == b"\\\\server\\share"
+    assert info[suffix_off:].split(b"\x00", 1)[0] == b"dir\\app.exe"
+    assert parse_lnk(data).target_path == "\\\\server\\share\\dir\\app.exe"
+
+
+@pytest.mark.parametrize("target", ["\\\\server", "\\\\server\\", "\\\\?\\C:\\a.exe", "\\\\.\\pipe\\x"])
+def test_unsupported_unc_target_rejected(target):
+    with pytest.raises(LnkError):
+        build_lnk(ShellLink(target_path=target))
+
+
+def test_short_or_foreign_header_rejected():
+    data = build_lnk(SAMPLES[1])
+    for n in range(HEADER_SIZE):
+        with pytest.raises(LnkError):
+            parse_lnk(data[:n])
+    with pytest.raises(LnkError):
+        parse_lnk(b"\x00" * 4 + data[4:])
+    with pytest.raises(LnkError):
+        parse_lnk(data[:4] + bytes(16) + data[20:])
+
+
+def test_truncated_input_never_raises_other_errors():
+    for link in SAMPLES:
+        data = build_lnk(link)
+        for n in range(HEADER_SIZE, len(data)):
+            try:
+                parse_lnk(data[:n])
+            except LnkError:
+                pass
+
+
+def test_truncated_strings_are_accepted():
+    # 当前行为：字符串数据被截断时不报错，返回截断后的内容（自启检查随后会因不一致而提示修复）
+    link = ShellLink(target_path=r"C:\a.exe", arguments="--autostart --minimized")
+    data = build_lnk(link)
+    raw = "--autostart --minimized".encode("utf-16-le")
+    cut = data.index(raw) + 2 * len("--autostart")
+    parsed = parse_lnk(data[:cut])
+    assert parsed.target_path == r"C:\a.exe"
+    assert parsed.arguments == "--autostart"
+    # 缺少结尾的 TerminalBlock 也照常解析
+    assert fields(parse_lnk(data[:-4])) == fields(link)
+
+
+def test_truncated_before_string_count_is_rejected():
+    link = ShellLink(target_path=r"C:\a.exe", arguments="--autostart")
+    data = build_lnk(link)
+    (flags,) = struct.unpack_from("<I", data, 0x14)
+    assert flags & HAS_ARGUMENTS
+    count_off = data.index("--autostart".encode("utf-16-le")) - 2
+    with pytest.raises(LnkError):
+        parse_lnk(data[:count_off + 1])
+
+
+def test_corrupt_input_raises_only_lnk_error():
+    rng = random.Random(2)
+    for link in SAMPLES:
+        data = build_lnk(link)
+        for _ in range(400):
+            buf = bytearray(data)
+            for _ in range(rng.randrange(1, 8)):
+                # 保留文件头的大小与 CLSID，其余位置随机破坏
+                pos = rng.randrange(0x14, len(buf))
+                buf[pos] = rng.randrange(256)
+            try:
+                parsed = parse_lnk(bytes(buf))
+            except LnkError:
+                continue
+            assert isinstance(parsed.target_path, str)
+            assert isinstance(parsed.arguments, str)
+
+
+def test_random_garbage_after_header():
+    rng = random.Random(3)
+    header = build_lnk(SAMPLES[0])[:HEADER_SIZE]
+    for _ in range(500):
+        tail = bytes(rng.randrange(256) for _ in range(rng.randrange(0, 200)))
+        try:
+            parse_lnk(header[:0x14] + struct.pack("<I", rng.randrange(1 << 32)) + header[0x18:] + tail)
+        except LnkError:
+            pass
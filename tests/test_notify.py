@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+import notify
+import ratelimit
+from core import Config
+from notify import Notifier, deferred_only, reached_network
+
+CFG = {"notify_channels": ["pushplus"], "pushplus_token": "t", "pushplus_topic": "g",
+       "pushplus_rate_per_hour": 60, "pushplus_burst": 5, "pushplus_dedup_sec": 600}
+CONF = Config(CFG)
+
+
+@pytest.fixture
+def pushplus(tmp_path, monkeypatch):
+    sent = []
+    monkeypatch.setattr(ratelimit, "_limiter", ratelimit.SendLimiter(str(tmp_path / "ratelimit.json")))
+    monkeypatch.setattr(notify, "pushplus_send",
+                        lambda conf, title, content, timeout: (sent.append(title), (True, "ok"))[1])
+    notifier = Notifier()
+    yield notifier, sent
+    notifier.shutdown()
+
+
+def test_duplicate_is_delivered_but_not_network(pushplus):
+    notifier, sent = pushplus
+    first = notifier.send(CONF, "title", "content")
+    assert first.ok and reached_network(first)
+    second = notifier.send(CONF, "title", "content")
+    assert sent == ["title"]
+    # 去重跳过：计为送达（不进入重发），但没有联网，不能刷新联网判断
+    assert second.ok
+    assert second.channels[0].suppressed
+    assert not reached_network(second)
+    assert not deferred_only(second)
+
+
+def test_rate_limited_is_deferred(pushplus):
+    notifier, sent = pushplus
+    conf = Config(dict(CFG, pushplus_burst=1, pushplus_rate_per_hour=1))
+    assert notifier.send(conf, "a", "1").ok
+    limited = notifier.send(conf, "b", "2")
+    assert not limited.ok
+    assert deferred_only(limited)
+    assert not reached_network(limited)
+    assert sent == ["a"]
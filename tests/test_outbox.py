@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+import pytest
+
+import outbox as outbox_mod
+from backend import FakeBackend
+from core import DEFAULT_CONFIG
+from outbox import Outbox
+from worker import InlineWorker
+
+TIMEOUT = 5.0
+
+
+class _App:
+    """App 的最小子类工厂（导入 app 较重，只在用到时导入）。"""
+
+    @staticmethod
+    def make():
+        from app import App
+
+        class QuietApp(App):
+            def tray_info(self, *args, **kwargs):
+                pass
+
+        return QuietApp(cfg=dict(DEFAULT_CONFIG), backend=FakeBackend(), worker=InlineWorker())
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # 首次重试的退避缩短到 0.3 秒；调度器空闲时的等待仍为 300 秒
+    monkeypatch.setattr(outbox_mod, "backoff_delay", lambda attempts, **kw: 0.3)
+    a = _App.make()
+    sent = []
+    delivered = threading.Event()
+
+    def send_message(cfg, title, content, channels=None):
+        sent.append((time.monotonic(), title))
+        delivered.set()
+        return True, "ok"
+
+    a.send_message = send_message
+    # 不做真实的联网探测
+    a.connectivity.check = lambda conf, force=False: True
+    a.attach_outbox(Outbox(str(tmp_path / "outbox.log")))
+    a.sent, a.delivered = sent, delivered
+    yield a
+    a.outbox_dispatcher.stop()
+
+
+def test_failed_send_retried_at_backoff_not_next_poll(app):
+    # 调度器已进入空闲等待（队列为空）
+    time.sleep(0.2)
+    assert app.sent == []
+    msg = app.outbox_add("remind", "content")
+    t0 = time.monotonic()
+    app.on_send_result((False, "HTTP 500"), "info", 0, msg)
+    assert app.delivered.wait(TIMEOUT)
+    (at, title), = app.sent
+    assert title == "remind"
+    # 重试在退避时间附近（调度器最短等待 0.5 秒），而不是 idle_poll_sec 之后
+    assert at - t0 < 2.0
+    for _ in range(100):
+        if not len(app.outbox):
+            break
+        time.sleep(0.01)
+    assert len(app.outbox) == 0
+
+
+def test_digest_submit_failure_kicks_dispatcher(app, monkeypatch):
+    time.sleep(0.2)
+    monkeypatch.setattr(app.worker, "submit", lambda *a, **kw: False)
+    app.digest.add("remind", "info", now=app.backend.now())
+    t0 = time.monotonic()
+    app.flush_digest()
+    assert app.delivered.wait(TIMEOUT)
+    assert app.sent[0][0] - t0 < 2.0
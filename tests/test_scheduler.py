@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+import scheduler as scheduler_mod
+from scheduler import Scheduler, LATE_REPORT_SEC, MAX_ARM_MS
+
+
+class FakeTimer:
+    """虚拟单调时钟 + 单个系统定时器（记录 arm / disarm）。"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.armed = None          # (arm 时刻, 毫秒)
+        self.arm_calls = 0
+
+    def clock(self):
+        return self.now
+
+    def arm(self, ms):
+        assert isinstance(ms, int) and 1 <= ms <= MAX_ARM_MS
+        self.armed = (self.now, ms)
+        self.arm_calls += 1
+
+    def disarm(self):
+        self.armed = None
+
+    def fire_at(self):
+        return None if self.armed is None else self.armed[0] + self.armed[1] / 1000.0
+
+    def make(self):
+        return Scheduler(self.clock, self.arm, self.disarm)
+
+
+def assert_armed_for_earliest(timer, sched):
+    deadline = sched.next_deadline()
+    if deadline is None:
+        assert timer.armed is None
+        return
+    assert timer.armed is not None
+    at, ms = timer.armed
+    delay_ms = (deadline - at) * 1000.0
+    if delay_ms >= MAX_ARM_MS:
+        assert ms == MAX_ARM_MS
+    else:
+        # 向上取整到毫秒：不早于截止时间，也不晚 1 毫秒以上
+        assert ms >= 1 and delay_ms - 1e-6 <= ms < max(delay_ms, 0) + 1 + 1e-6
+
+
+def test_single_timer_tracks_earliest_deadline():
+    rng = random.Random(21)
+    timer = FakeTimer()
+    sched = timer.make()
+    names = ["a", "b", "c", "d", "e"]
+    expected = {}
+    fired = []
+    for _ in range(3000):
+        op = rng.random()
+        name = rng.choice(names)
+        if op < 0.4:
+            delay = rng.choice([0.0, 0.5, rng.uniform(0, 120), rng.uniform(0, 5)])
+            sched.schedule(name, delay, lambda n=name: fired.append((n, timer.now)))
+            expected[name] = timer.now + delay
+        elif op < 0.55:
+            deadline = timer.now + rng.uniform(-5, 60)
+            sched.schedule_at(name, deadline, lambda n=name: fired.append((n, timer.now)))
+            expected[name] = deadline
+        elif op < 0.7:
+            sched.cancel(name)
+            expected.pop(name, None)
+        else:
+            at = timer.fire_at()
+            if at is None:
+                continue
+            timer.now = max(timer.now, at)
+            start = len(fired)
+            for n, _ in sched.run_due():
+                expected.pop(n)
+            # 只执行到期的任务，且不早于截止时间
+            for n, t in fired[start:]:
+                assert n not in sched
+        for n, deadline in expected.items():
+            assert sched.deadline(n) == deadline
+        assert sched.next_deadline() == (min(expected.values()) if expected else None)
+        assert_armed_for_earliest(timer, sched)
+
+
+def test_never_fires_early_and_in_deadline_order():
+    rng = random.Random(22)
+    timer = FakeTimer()
+    sched = timer.make()
+    fired = []
+    deadlines = {}
+    for i in range(200):
+        name = f"t{i}"
+        deadlines[name] = timer.now + rng.uniform(0, 3600)
+        sched.schedule_at(name, deadlines[name], lambda n=name: fired.append((n, timer.now)))
+    while sched.next_deadline() is not None:
+        timer.now = timer.fire_at()
+        sched.run_due()
+    assert [n for n, _ in fired] == sorted(deadlines, key=deadlines.get)
+    for n, t in fired:
+        assert t >= deadlines[n] - 0.001
+
+
+def test_cancel_and_reschedule():
+    timer = FakeTimer(0.0)
+    sched = timer.make()
+    calls = []
+    sched.schedule("a", 10, lambda: calls.append("a1"))
+    sched.schedule("b", 20, lambda: calls.append("b"))
+    assert timer.armed == (0.0, 10000)
+    # 同名任务只保留最新的计划
+    sched.schedule("a", 30, lambda: calls.append("a2"))
+    assert timer.armed == (0.0, 20000)
+    sched.cancel("b")
+    assert timer.armed == (0.0, 30000)
+    sched.cancel("a")
+    assert timer.armed is None and sched.next_deadline() is None
+    sched.cancel("a")
+    sched.schedule("a", 5, lambda: calls.append("a3"))
+    timer.now = 5.0
+    assert sched.run_due() == [("a", 0.0)]
+    assert calls == ["a3"]
+    assert "a" not in sched and timer.armed is None
+
+
+def test_periodic_catch_up_runs_once():
+    timer = FakeTimer(0.0)
+    sched = timer.make()
+    calls = []
+    sched.schedule("p", 10, lambda: calls.append(timer.now), period=10)
+    timer.now = 10.0
+    sched.run_due()
+    assert sched.deadline("p") == 20.0
+    # 错过多个周期（如系统休眠）：只补执行一次，下一次从当前时刻起算
+    timer.now = 75.0
+    assert sched.run_due() == [("p", 55.0)]
+    assert calls == [10.0, 75.0]
+    assert sched.deadline("p") == 85.0
+    # 延迟不足一个周期时保持原来的节拍
+    timer.now = 88.0
+    sched.run_due()
+    assert sched.deadline("p") == 95.0
+    assert_armed_for_earliest(timer, sched)
+
+
+def test_lateness_and_timer_late_report(monkeypatch):
+    reported = []
+    monkeypatch.setattr(scheduler_mod, "log_stats", lambda kind, **fields: reported.append((kind, fields)))
+    timer = FakeTimer(0.0)
+    sched = timer.make()
+    sched.schedule("on_time", 1, lambda: None)
+    sched.schedule("slightly", 2, lambda: None)
+    sched.schedule("late", 3, lambda: None)
+    timer.now = 1.0
+    sched.run_due()
+    timer.now = 2.0 + LATE_REPORT_SEC / 2
+    sched.run_due()
+    timer.now = 3.0 + LATE_REPORT_SEC + 2.5
+    fired = sched.run_due()
+    assert fired == [("late", LATE_REPORT_SEC + 2.5)]
+    assert sched.lateness == {"on_time": 0.0, "slightly": LATE_REPORT_SEC / 2, "late": LATE_REPORT_SEC + 2.5}
+    assert sched.fired == 3
+    assert reported == [("timer_late", {"name": "late", "late_sec": round(LATE_REPORT_SEC + 2.5, 3)})]
+
+
+def test_callback_error_does_not_stop_others(monkeypatch):
+    errors = []
+    monkeypatch.setattr(scheduler_mod, "log_error", errors.append)
+    timer = FakeTimer(0.0)
+    sched = timer.make()
+    calls = []
+    sched.schedule("bad", 1, lambda: 1 / 0)
+    sched.schedule("good", 1, lambda: calls.append("good"))
+    timer.now = 1.0
+    assert [n for n, _ in sched.run_due()] == ["bad", "good"]
+    assert calls == ["good"] and len(errors) == 1
+
+
+def test_far_deadline_is_clamped_and_rearmed():
+    timer = FakeTimer(0.0)
+    sched = timer.make()
+    calls = []
+    far = 40 * 24 * 3600.0
+    sched.schedule("far", far, lambda: calls.append(timer.now))
+    assert timer.armed == (0.0, MAX_ARM_MS)
+    # 分段等待：定时器到期但任务未到期时不执行，按剩余时间重新设置
+    timer.now = timer.fire_at()
+    assert sched.run_due() == []
+    assert calls == []
+    assert_armed_for_earliest(timer, sched)
+    while not calls:
+        timer.now = timer.fire_at()
+        sched.run_due()
+    assert calls == [far]
+
+
+def test_sub_millisecond_delay_rounds_up():
+    timer = FakeTimer(0.0)
+    sched = timer.make()
+    sched.schedule("a", 0.0001, lambda: None)
+    assert timer.armed == (0.0, 1)
+    sched.schedule("a", 1.0005, lambda: None)
+    assert timer.armed == (0.0, 1001)
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+
+import os
+from datetime import datetime
+
+import core
+from simulate import ActivityTrace, Simulator
+
+
+def test_simulation_does_not_write_stats_log():
+    before = os.path.getsize(core.STATS_LOG) if os.path.exists(core.STATS_LOG) else None
+    recs = []
+    sim = Simulator({"digest_window_sec": 600, "online_remind_times": 3},
+                    ActivityTrace.office_hours(3, datetime(2024, 1, 1)), stats_sink=recs.append)
+    events = list(sim.run(3 * 86400))
+    assert events
+    assert "digest" in {r["kind"] for r in recs}
+    after = os.path.getsize(core.STATS_LOG) if os.path.exists(core.STATS_LOG) else None
+    assert after == before
+    # 模拟结束后恢复写文件
+    assert core.set_stats_sink(None) is None
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+import pytest
+
+import worker as worker_mod
+from worker import BackgroundWorker, InlineWorker
+
+TIMEOUT = 5.0
+
+
+@pytest.fixture
+def errors(monkeypatch):
+    logged = []
+    monkeypatch.setattr(worker_mod, "log_error", logged.append)
+    return logged
+
+
+class Posted:
+    """代替 PostMessageW：记录通知次数，可等待。"""
+
+    def __init__(self):
+        self.count = 0
+        self._cond = threading.Condition()
+
+    def __call__(self):
+        with self._cond:
+            self.count += 1
+            self._cond.notify_all()
+
+    def wait(self, n: int = 1):
+        with self._cond:
+            assert self._cond.wait_for(lambda: self.count >= n, TIMEOUT)
+
+
+def make_worker(**kw):
+    posted = Posted()
+    w = BackgroundWorker(posted, **kw)
+    return w, posted
+
+
+def test_callbacks_run_only_in_drain_on_caller_thread():
+    w, posted = make_worker()
+    results = []
+    try:
+        assert w.submit(lambda: threading.get_ident(), lambda r: results.append((r, threading.get_ident())))
+        posted.wait()
+        assert results == []
+        w.drain()
+        (worker_ident, callback_ident), = results
+        assert worker_ident != threading.get_ident()
+        assert callback_ident == threading.get_ident()
+        # 队列已空时 drain 不做任何事
+        w.drain()
+        assert len(results) == 1
+    finally:
+        w.shutdown()
+
+
+def test_duplicate_key_rejected_until_drained():
+    w, posted = make_worker()
+    release = threading.Event()
+    results = []
+    try:
+        assert w.submit(lambda: release.wait(TIMEOUT) and "first", results.append, key="net")
+        assert w.busy("net")
+        assert not w.submit(lambda: "second", results.append, key="net")
+        # 其他 key 与无 key 的任务不受影响
+        assert w.submit(lambda: "other", results.append, key="send")
+        assert w.submit(lambda: "anon", results.append)
+        release.set()
+        posted.wait(3)
+        # 结果已出队列但回调未执行前仍视为进行中
+        assert w.busy("net")
+        assert not w.submit(lambda: "third", results.append, key="net")
+        w.drain()
+        assert sorted(results) == ["anon", "first", "other"]
+        assert not w.busy("net")
+        assert w.submit(lambda: "again", results.append, key="net")
+        posted.wait(4)
+        w.drain()
+        assert results[-1] == "again"
+    finally:
+        release.set()
+        w.shutdown()
+
+
+def test_task_error_logged_and_callback_gets_none(errors):
+    w, posted = make_worker()
+    results = []
+    try:
+        assert w.submit(lambda: 1 / 0, results.append, key="bad")
+        posted.wait()
+        w.drain()
+        assert results == [None]
+        assert len(errors) == 1 and isinstance(errors[0], ZeroDivisionError)
+        assert not w.busy("bad")
+    finally:
+        w.shutdown()
+
+
+def test_callback_error_does_not_stop_drain(errors):
+    w, posted = make_worker(max_workers=1)
+    results = []
+    try:
+        w.submit(lambda: 1, lambda r: 1 / 0)
+        w.submit(lambda: 2, results.append)
+        posted.wait(2)
+        w.drain()
+        assert results == [2]
+        assert len(errors) == 1
+    finally:
+        w.shutdown()
+
+
+def test_low_priority_lane_initialized_once():
+    inits = []
+    w, posted = make_worker(low_priority_init=lambda: inits.append(threading.get_ident()))
+    idents = []
+    try:
+        for _ in range(3):
+            assert w.submit(lambda: threading.get_ident(), idents.append, low_priority=True)
+        posted.wait(3)
+        w.drain()
+        # 单个低优先级线程依次执行，线程启动时调用一次 low_priority_init
+        assert len(set(idents)) == 1
+        assert inits == idents[:1]
+        w.submit(lambda: threading.get_ident(), idents.append)
+        posted.wait(4)
+        w.drain()
+        assert idents[-1] != idents[0]
+        assert len(inits) == 1
+    finally:
+        w.shutdown()
+
+
+def test_submit_after_shutdown_recreates_pools():
+    w, posted = make_worker()
+    results = []
+    w.shutdown()
+    try:
+        assert w.submit(lambda: "ok", results.append, key="k")
+        posted.wait()
+        w.drain()
+        assert results == ["ok"]
+    finally:
+        w.shutdown()
+
+
+def test_inline_worker_runs_synchronously(errors):
+    w = InlineWorker()
+    results = []
+    assert w.submit(lambda: threading.get_ident(), results.append, key="k")
+    assert results == [threading.get_ident()]
+    # 同步执行，不存在进行中的任务
+    assert not w.busy("k")
+    assert w.submit(lambda: "again", results.append, key="k")
+    assert w.submit(lambda: 1 / 0, results.append, low_priority=True)
+    assert results[1:] == ["again", None]
+    assert len(errors) == 1
+    w.drain()
+    w.shutdown()
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import os
+import math
 import ctypes
 from ctypes import wintypes
 from datetime import datetime
@@ -14,6 +15,8 @@ from constants import (
     WM_RBUTTONUP,
     WM_SETFONT,
     WM_POWERBROADCAST,
+    WM_INPUT,
+    WM_WTSSESSION_CHANGE,
     PBT_APMRESUMECRITICAL,
     PBT_APMRESUMESUSPEND,
     PBT_APMRESUMEAUTOMATIC,
@@ -60,8 +63,10 @@ from constants import (
     NIIF_ERROR,
     TIMER_MAIN,
     TIMER_SETTINGS_DELAYCHECK,
-    TIMER_COUNTDOWN,
     TRAY_CALLBACK_MSG,
+    WM_WORKER_DONE,
+    WM_USER_ACTIVE,
+    MID_SETTINGS,
     SID_TOKEN,
     SID_TOPIC,
     SID_API,
@@ -87,6 +92,7 @@ from winapi import (
     kernel32,
     shell32,
     comctl32,
+    get_export,
     gdi32,
     HANDLE_T,
     HWND_T,
@@ -108,13 +114,16 @@ from core import (
     log_error,
     DEFAULT_REMIND_TEMPLATE,
     pushplus_send,
+    Config,
     run_powercfg,
     check_hibernate_available_from_powercfg_a,
     elevate_enable_hibernate_via_uac,
     save_config,
+    clamp_config_int,
     resource_path,
     go_hibernate,
 )
+from journal import OUTCOME_CANCEL
 
 # -----------------------------
 # DPI awareness / scaling / fonts
@@ -122,7 +131,7 @@ from core import (
 def set_dpi_awareness():
     # Per-monitor v2 preferred
     try:
-        fn = getattr(user32, "SetProcessDpiAwarenessContext", None)
+        fn = get_export(user32, "SetProcessDpiAwarenessContext")
         if fn:
             fn.argtypes = [HANDLE_T]
             fn.restype = wintypes.BOOL
@@ -141,7 +150,7 @@ def set_dpi_awareness():
         pass
     # system aware fallback
     try:
-        fn2 = getattr(user32, "SetProcessDPIAware", None)
+        fn2 = get_export(user32, "SetProcessDPIAware")
         if fn2:
             fn2.argtypes = []
             fn2.restype = wintypes.BOOL
@@ -151,7 +160,7 @@ def set_dpi_awareness():
 
 def get_system_dpi() -> int:
     try:
-        fn = getattr(user32, "GetDpiForSystem", None)
+        fn = get_export(user32, "GetDpiForSystem")
         if fn:
             fn.argtypes = []
             fn.restype = wintypes.UINT
@@ -266,9 +275,9 @@ TDF_POSITION_RELATIVE_TO_WINDOW = 0x00001000
 def task_dialog_3choice(hwnd_parent, title: str, instruction: str, content: str,
                         b1_text="修复", b2_text="关闭", b3_text="忽略",
                         default_id=101):
-    try:
-        TaskDialogIndirect = comctl32.TaskDialogIndirect
-    except Exception:
+    # comctl32 v5（无 v6 清单）没有 TaskDialogIndirect：返回 None，由调用方降级为 MessageBox
+    TaskDialogIndirect = get_export(comctl32, "TaskDialogIndirect")
+    if TaskDialogIndirect is None:
         return None
 
     TaskDialogIndirect.argtypes = [
@@ -299,7 +308,11 @@ def task_dialog_3choice(hwnd_parent, title: str, instruction: str, content: str,
     cfg.nDefaultButton = int(default_id)
 
     pressed = ctypes.c_int(0)
-    hr = TaskDialogIndirect(ctypes.byref(cfg), ctypes.byref(pressed), None, None)
+    try:
+        hr = TaskDialogIndirect(ctypes.byref(cfg), ctypes.byref(pressed), None, None)
+    except Exception as e:
+        log_error(e)
+        return None
     if hr != 0:
         return None
     return int(pressed.value)
@@ -421,6 +434,7 @@ class CountdownDialog:
         self.owner_hwnd = owner_hwnd
         self.app = app
         self.remaining = max(1, int(seconds))
+        self.deadline = None
         self.cancelled = False
         self.accepted = False
         self.detail_text = detail_text
@@ -462,15 +476,20 @@ class CountdownDialog:
         apply_font_to_all_children(self.hwnd, self.hfont)
 
         self._update_label()
-        user32.SetTimer(self.hwnd, UINT_PTR_T(TIMER_COUNTDOWN), 1000, None)
+        # 到期时间按单调时钟计算，消息循环卡顿不会拖长倒计时；标签每秒刷新
+        sched = self.app.scheduler
+        self.deadline = sched.clock() + self.remaining
+        sched.schedule_at("countdown", self.deadline, self.on_expire)
+        sched.schedule("countdown_label", 1, self.on_timer, period=1)
 
         if self.owner_hwnd:
             user32.EnableWindow(self.owner_hwnd, False)
 
     def close(self):
         try:
+            self.app.scheduler.cancel("countdown")
+            self.app.scheduler.cancel("countdown_label")
             if self.hwnd:
-                user32.KillTimer(self.hwnd, UINT_PTR_T(TIMER_COUNTDOWN))
                 user32.DestroyWindow(self.hwnd)
         except Exception:
             pass
@@ -488,13 +507,13 @@ class CountdownDialog:
             pass
 
     def on_timer(self):
-        if self.remaining <= 1:
-            self.accepted = True
-            self.close()
-            return
-        self.remaining -= 1
+        self.remaining = max(1, math.ceil(self.deadline - self.app.scheduler.clock()))
         self._update_label()
 
+    def on_expire(self):
+        self.accepted = True
+        self.close()
+
     def on_cancel(self):
         self.cancelled = True
         self.close()
@@ -567,23 +586,23 @@ class SettingsWindow:
             y0 += row_h
 
 
-        cfg = self.app.cfg
-        add_row("pushplus token：", SID_TOKEN, str(cfg.get("pushplus_token", "")))
-        add_row("群组 topic：", SID_TOPIC, str(cfg.get("pushplus_topic", "")))
-        add_row("pushplus API：", SID_API, str(cfg.get("pushplus_api", "https://www.pushplus.plus/send")))
+        conf = self.app.conf
+        add_row("pushplus token：", SID_TOKEN, conf.pushplus_token)
+        add_row("群组 topic：", SID_TOPIC, conf.pushplus_topic)
+        add_row("pushplus API：", SID_API, conf.pushplus_api)
 
         y0 += S(10)
-        add_row("开机时长阈值（小时）：", SID_UPTIME_H, str(int(cfg.get("uptime_hours", 1))), True)
-        add_row("空闲阈值（分钟）：", SID_IDLE_M, str(int(cfg.get("idle_minutes", 1))), True)
-        add_row("休眠倒计时（秒）：", SID_COUNTDOWN_S, str(int(cfg.get("pre_hibernate_countdown_sec", 60))), True)
-        add_row("二级网络校验 URL：", SID_NET_URL, str(cfg.get("net_check_url", "https://baidu.com")))
-        add_row("二级网络校验超时（秒）：", SID_NET_TIMEOUT, str(int(cfg.get("net_check_timeout_sec", 2))), True)
-        add_row("联网提醒后休眠次数（0=仅提醒）：", SID_ONLINE_POLICY, str(int(cfg.get("online_remind_times", 0))), True)
-
-        # 自定义提醒内容（支持 {base_info} 占位符）
-        create_ctrl(self.hwnd, "STATIC", "提醒内容（可用 {base_info}加入电脑已运行时间、空闲时间和当前时间）：", left_label_x, y0 + S(6), label_w + edit_w, S(22), 0, SS_LEFT)
+        add_row("开机时长阈值（小时）：", SID_UPTIME_H, str(conf.uptime_hours), True)
+        add_row("空闲阈值（分钟）：", SID_IDLE_M, str(conf.idle_minutes), True)
+        add_row("休眠倒计时（秒）：", SID_COUNTDOWN_S, str(conf.pre_hibernate_countdown_sec), True)
+        add_row("二级网络校验 URL：", SID_NET_URL, conf.net_check_url)
+        add_row("二级网络校验超时（秒）：", SID_NET_TIMEOUT, str(conf.net_check_timeout_sec), True)
+        add_row("联网提醒后休眠次数（0=仅提醒）：", SID_ONLINE_POLICY, str(conf.online_remind_times), True)
+
+        # 自定义提醒内容（支持 {base_info} / {hostname} / {ip} 等占位符）
+        create_ctrl(self.hwnd, "STATIC", "提醒内容（可用 {base_info} {hostname} {uptime} {idle} {ip} {battery} 等占位符）：", left_label_x, y0 + S(6), label_w + edit_w, S(22), 0, SS_LEFT)
         y0 += S(28)
-        tpl_default = str(cfg.get("remind_template", DEFAULT_REMIND_TEMPLATE))
+        tpl_default = conf.remind_template
         h_tpl = create_ctrl(
             self.hwnd,
             "EDIT",
@@ -630,28 +649,21 @@ class SettingsWindow:
         def s(cid):
             return get_text(self.controls[cid]).strip()
 
-        def i(cid, default, minv=None, maxv=None):
-            try:
-                v = int(s(cid))
-            except Exception:
-                v = int(default)
-            if minv is not None:
-                v = max(minv, v)
-            if maxv is not None:
-                v = min(maxv, v)
-            return v
+        def i(cid, key):
+            # 非法输入保留当前值；范围与 Config 一致
+            return clamp_config_int(key, s(cid), cfg.get(key))
 
         cfg["pushplus_token"] = s(SID_TOKEN)
         cfg["pushplus_topic"] = s(SID_TOPIC)
         cfg["pushplus_api"] = s(SID_API) or "https://www.pushplus.plus/send"
 
-        cfg["uptime_hours"] = i(SID_UPTIME_H, cfg.get("uptime_hours", 2), 0, 168)
-        cfg["idle_minutes"] = i(SID_IDLE_M, cfg.get("idle_minutes", 60), 0, 24*60)
-        cfg["pre_hibernate_countdown_sec"] = i(SID_COUNTDOWN_S, cfg.get("pre_hibernate_countdown_sec", 60), 1, 3600)
+        cfg["uptime_hours"] = i(SID_UPTIME_H, "uptime_hours")
+        cfg["idle_minutes"] = i(SID_IDLE_M, "idle_minutes")
+        cfg["pre_hibernate_countdown_sec"] = i(SID_COUNTDOWN_S, "pre_hibernate_countdown_sec")
         cfg["net_check_url"] = s(SID_NET_URL) or "https://baidu.com"
-        cfg["net_check_timeout_sec"] = i(SID_NET_TIMEOUT, cfg.get("net_check_timeout_sec", 2), 1, 10)
+        cfg["net_check_timeout_sec"] = i(SID_NET_TIMEOUT, "net_check_timeout_sec")
 
-        cfg["online_remind_times"] = i(SID_ONLINE_POLICY, cfg.get("online_remind_times", 0), 0, 99)
+        cfg["online_remind_times"] = i(SID_ONLINE_POLICY, "online_remind_times")
 
         # 自定义提醒内容模板
         tpl = get_text(self.controls[SID_REMIND_TEMPLATE])
@@ -660,7 +672,7 @@ class SettingsWindow:
 
 
         # autostart enabled is controlled by tray; keep current
-        cfg["autostart_enabled"] = bool(self.app.cfg.get("autostart_enabled", False))
+        cfg["autostart_enabled"] = self.app.conf.autostart_enabled
         return cfg
 
     def on_check_hibernate(self):
@@ -704,8 +716,16 @@ class SettingsWindow:
             return
         title = "AutoShutdown 测试消息"
         content = "这是一条测试群组消息。\n时间：%s\ntopic：%s" % (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), cfg.get("pushplus_topic"))
-        ok, detail = pushplus_send(cfg, title, content)
-        message_box(self.hwnd, ("发送成功。\n\n" if ok else "发送失败。\n\n") + (detail or ""), "测试消息发送",
+        # 发送在后台线程进行，避免阻塞设置窗口
+        conf = Config(cfg)
+        self.app.worker.submit(lambda: pushplus_send(conf, title, content), self._on_test_msg_result, key="test_msg")
+
+    def _on_test_msg_result(self, result):
+        ok, detail = result if result else (False, "")
+        if not ok:
+            self.app.connectivity.invalidate("test_push_failed")
+        message_box(self.hwnd if self.is_open() else None,
+                    ("发送成功。\n\n" if ok else "发送失败。\n\n") + (detail or ""), "测试消息发送",
                     MB_OK | (MB_ICONINFORMATION if ok else MB_ICONERROR))
 
     def on_test_hib(self):
@@ -725,7 +745,7 @@ class SettingsWindow:
         if not cfg.get("pushplus_topic"):
             message_box(self.hwnd, "群组 topic 不能为空。", "提示", MB_OK | MB_ICONWARNING); return
 
-        self.app.cfg = cfg
+        self.app.set_cfg(cfg)
         save_config(cfg)
         self.app.apply_main_timer()
         self.app.tray_info("AutoShutdown", "设置已保存并生效。", NIIF_INFO)
@@ -759,6 +779,21 @@ def _main_wndproc(hwnd, msg, wparam, lparam):
             app.on_menu(mid)
             return 0
 
+        if msg == WM_WORKER_DONE:
+            if app:
+                app.on_worker_done()
+            return 0
+
+        if msg == WM_USER_ACTIVE:
+            if app:
+                app.on_user_active()
+            return 0
+
+        if msg in (WM_INPUT, WM_WTSSESSION_CHANGE):
+            # WM_INPUT 仍需交给 DefWindowProc 清理
+            if app:
+                app.on_input_message(int(msg), int(wparam))
+
         if msg == WM_POWERBROADCAST:
             if int(wparam) in (PBT_APMRESUMEAUTOMATIC, PBT_APMRESUMESUSPEND, PBT_APMRESUMECRITICAL):
                 if app:
@@ -767,8 +802,8 @@ def _main_wndproc(hwnd, msg, wparam, lparam):
 
         if msg == WM_TIMER:
             if int(wparam) == TIMER_MAIN:
-                if app.active_dialog is None:
-                    app.tick()
+                if app:
+                    app.on_timer()
                 return 0
 
         if msg == WM_DESTROY:
@@ -831,10 +866,6 @@ def _countdown_wndproc(hwnd, msg, wparam, lparam):
                 dlg.on_now()
             return 0
 
-        if msg == WM_TIMER and int(wparam) == TIMER_COUNTDOWN:
-            dlg.on_timer()
-            return 0
-
         if msg == WM_CLOSE:
             dlg.on_cancel()
             return 0
@@ -869,6 +900,8 @@ def _countdown_wndproc(hwnd, msg, wparam, lparam):
                                 MB_OK | MB_ICONERROR)
                         except:
                             pass  # 如果无法显示消息框，则静默失败
+                elif dlg_obj and getattr(dlg_obj, "app", None) is not None:
+                    dlg_obj.app.record_outcome(OUTCOME_CANCEL)
             except Exception as e:
                 log_error(e)
             return 0
@@ -876,4 +909,3 @@ def _countdown_wndproc(hwnd, msg, wparam, lparam):
         log_error(e)
 
     return int(user32.DefWindowProcW(hwnd, msg, wparam, lparam))
-    MID_SETTINGS,
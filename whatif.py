@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+批量 what-if 分析：在记录下来的空闲/开机轨迹上，按 App.should_trigger 与 App.tick 的提醒计数语义，
+一次性评估一组候选配置（uptime_hours × idle_minutes × online_remind_times）。
+
+轨迹先被切分为“空闲段”（用户输入或重启即开始新段），每段只需首个触发时刻与触发次数的闭式解，
+再对 段 × 配置 做广播计算，不逐个采样调用 should_trigger。安装了 NumPy 时走向量化路径，
+否则退化为按段循环的纯 Python 实现（结果相同）。
+
+    python whatif.py traces.csv --uptime-hours 1,2,4 --idle-minutes 30,60 --remind-times 0,1,2
+    python whatif.py %APPDATA%\\AutoShutdown\\activity.bin
+"""
+
+import sys
+import csv
+import json
+import math
+import time
+import argparse
+from itertools import product
+
+from core import DEFAULT_CONFIG
+
+try:
+    import numpy as np
+except ImportError:  # 仅标准库环境
+    np = None
+
+# -----------------------------
+# Runs
+# -----------------------------
+def split_runs(t, idle, uptime):
+    """
+    将一台机器的采样轨迹切分为空闲段（以最近一次输入时刻为界）。
+    返回 (run_start, run_end, boot, returned)：空闲开始时刻、段内最后一次采样时刻、
+    开机时刻、段结束后用户是否回来（最后一段为 False）。
+    """
+    if np is not None:
+        t = np.asarray(t, dtype=np.float64)
+        idle = np.asarray(idle, dtype=np.float64)
+        uptime = np.asarray(uptime, dtype=np.float64)
+        n = len(t)
+        if n == 0:
+            empty = np.empty(0)
+            return empty, empty, empty, np.empty(0, dtype=bool)
+        # 最近一次输入时刻 t - idle 前移（超出 1 秒取整误差）即有新输入；开机时长回退即重启
+        last_input = t - idle
+        brk = np.empty(n, dtype=bool)
+        brk[0] = True
+        brk[1:] = (last_input[1:] - last_input[:-1] > 1.0) | (uptime[1:] < uptime[:-1])
+        starts = np.flatnonzero(brk)
+        ends = np.append(starts[1:] - 1, n - 1)
+        returned = np.ones(len(starts), dtype=bool)
+        returned[-1] = False
+        return t[starts] - idle[starts], t[ends], t[ends] - uptime[ends], returned
+
+    runs_s, runs_e, boots, returned = [], [], [], []
+    n = len(t)
+    i = 0
+    while i < n:
+        j = i
+        while (j + 1 < n and (t[j + 1] - idle[j + 1]) - (t[j] - idle[j]) <= 1.0
+               and uptime[j + 1] >= uptime[j]):
+            j += 1
+        runs_s.append(t[i] - idle[i])
+        runs_e.append(t[j])
+        boots.append(t[j] - uptime[j])
+        returned.append(j + 1 < n)
+        i = j + 1
+    return runs_s, runs_e, boots, returned
+
+# -----------------------------
+# Evaluation
+# -----------------------------
+class Grid:
+    def __init__(self, uptime_hours, idle_minutes, remind_times):
+        combos = list(product(uptime_hours, idle_minutes, remind_times))
+        self.configs = [{"uptime_hours": u, "idle_minutes": m, "online_remind_times": r} for u, m, r in combos]
+        self.uptime_sec = [u * 3600.0 for u, _, _ in combos]
+        # 与 apply_main_timer 一致：阈值为 0 时按 1 秒间隔检查
+        self.idle_sec = [max(1.0, m * 60.0) for _, m, _ in combos]
+        self.remind_times = [max(0, int(r)) for _, _, r in combos]
+
+    def __len__(self):
+        return len(self.configs)
+
+
+def _eval_np(runs, grid: Grid, countdown: float, fp_window: float):
+    rs, re_, boot, returned = (a[:, None] for a in runs)
+    U = np.asarray(grid.uptime_sec)[None, :]
+    I = np.asarray(grid.idle_sec)[None, :]
+    N = np.asarray(grid.remind_times)[None, :]
+
+    # 空闲满阈值后每隔 I 秒检查一次；首个同时满足开机时长的检查点即首次触发
+    k0 = np.maximum(1.0, np.ceil((boot + U - rs) / I))
+    first = rs + k0 * I
+    n_trig = np.where(re_ >= first, np.floor((re_ - first) / I) + 1.0, 0.0)
+
+    fires = (N > 0) & (n_trig >= N)
+    reminds = np.where(N > 0, np.minimum(n_trig, N), n_trig)
+    hib_at = first + (N - 1) * I
+    away = re_ - hib_at
+    cancelled = fires & returned & (away < countdown)
+    hib = fires & ~cancelled
+    off = np.where(hib, np.maximum(0.0, away - countdown), 0.0)
+    interrupted = fires & returned & (away < countdown + fp_window)
+    return (reminds.sum(axis=0), hib.sum(axis=0), cancelled.sum(axis=0),
+            interrupted.sum(axis=0), off.sum(axis=0))
+
+
+def _eval_py(runs, grid: Grid, countdown: float, fp_window: float):
+    C = len(grid)
+    reminds, hibs, cancels, interrupts, off = [0] * C, [0] * C, [0] * C, [0] * C, [0.0] * C
+    for rs, re_, boot, returned in zip(*runs):
+        for c in range(C):
+            U, I, N = grid.uptime_sec[c], grid.idle_sec[c], grid.remind_times[c]
+            first = rs + max(1.0, math.ceil((boot + U - rs) / I)) * I
+            if re_ < first:
+                continue
+            n_trig = math.floor((re_ - first) / I) + 1
+            if N <= 0:
+                reminds[c] += n_trig
+                continue
+            reminds[c] += min(n_trig, N)
+            if n_trig < N:
+                continue
+            away = re_ - (first + (N - 1) * I)
+            if returned and away < countdown:
+                cancels[c] += 1
+            else:
+                hibs[c] += 1
+                off[c] += max(0.0, away - countdown)
+            if returned and away < countdown + fp_window:
+                interrupts[c] += 1
+    return reminds, hibs, cancels, interrupts, off
+
+
+def analyze(traces, grid: Grid, countdown: float = None, fp_window: float = 1800.0):
+    """
+    traces: 可迭代的 (t, idle, uptime) 三元组（每台机器一条，单位秒）。
+    fp_window: 休眠后用户在该时长内回来，记为一次误打扰（倒计时内取消同样计入）。
+    返回每个配置一条结果 dict。
+    """
+    if countdown is None:
+        countdown = float(DEFAULT_CONFIG["pre_hibernate_countdown_sec"])
+    C = len(grid)
+    totals = [[0.0] * C for _ in range(5)]
+    evaluate = _eval_np if np is not None else _eval_py
+    machines = 0
+    for t, idle, uptime in traces:
+        machines += 1
+        runs = split_runs(t, idle, uptime)
+        if len(runs[0]) == 0:
+            continue
+        for acc, part in zip(totals, evaluate(runs, grid, float(countdown), float(fp_window))):
+            for c in range(C):
+                acc[c] += float(part[c])
+
+    results = []
+    for c, cfg in enumerate(grid.configs):
+        results.append(dict(
+            cfg,
+            machines=machines,
+            reminds=int(totals[0][c]),
+            hibernates=int(totals[1][c]),
+            cancelled=int(totals[2][c]),
+            interruptions=int(totals[3][c]),
+            powered_off_hours=round(totals[4][c] / 3600.0, 2),
+        ))
+    return results
+
+# -----------------------------
+# Input
+# -----------------------------
+def read_csv_traces(path: str):
+    """CSV 列：machine,t,idle,uptime（秒，按机器与时间排序）。"""
+    current, t, idle, uptime = None, [], [], []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith("#") or row[0] == "machine":
+                continue
+            if row[0] != current:
+                if t:
+                    yield t, idle, uptime
+                current, t, idle, uptime = row[0], [], [], []
+            t.append(float(row[1]))
+            idle.append(float(row[2]))
+            uptime.append(float(row[3]))
+    if t:
+        yield t, idle, uptime
+
+
+def read_journal_trace(path: str):
+    """activity.bin（journal.ActivityJournal）中的周期采样，视为一台机器。"""
+    from journal import ActivityJournal
+    j = ActivityJournal(path, readonly=True)
+    try:
+        t, idle, uptime = j.to_trace()
+    finally:
+        j.close()
+    if t:
+        yield t, idle, uptime
+
+
+def _int_list(s: str):
+    return [int(x) for x in s.split(",") if x.strip()]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="AutoShutdown what-if analyzer")
+    ap.add_argument("traces", nargs="+", help="CSV trace files (machine,t,idle,uptime) or activity.bin journals")
+    ap.add_argument("--uptime-hours", type=_int_list, default=[1, 2, 4])
+    ap.add_argument("--idle-minutes", type=_int_list, default=[30, 45, 60, 90])
+    ap.add_argument("--remind-times", type=_int_list, default=[0, 1, 2, 3])
+    ap.add_argument("--countdown", type=float, default=DEFAULT_CONFIG["pre_hibernate_countdown_sec"])
+    ap.add_argument("--fp-window", type=float, default=1800.0)
+    args = ap.parse_args(argv)
+
+    grid = Grid(args.uptime_hours, args.idle_minutes, args.remind_times)
+
+    def _all():
+        for p in args.traces:
+            if p.lower().endswith(".bin"):
+                yield from read_journal_trace(p)
+            else:
+                yield from read_csv_traces(p)
+
+    t0 = time.perf_counter()
+    results = analyze(_all(), grid, countdown=args.countdown, fp_window=args.fp_window)
+    elapsed = time.perf_counter() - t0
+    for r in results:
+        print(json.dumps(r, ensure_ascii=False))
+    print(json.dumps({"configs": len(grid), "elapsed_sec": round(elapsed, 3),
+                      "engine": "numpy" if np is not None else "python"}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
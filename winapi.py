@@ -22,20 +22,122 @@ HBRUSH_T = getattr(wintypes, "HBRUSH", HANDLE_T)
 ATOM_T = getattr(wintypes, "ATOM", wintypes.WORD)
 
 # -----------------------------
-# DLLs
+# DLLs (lazy binding)
 # -----------------------------
-user32 = ctypes.WinDLL("user32", use_last_error=True)
-kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
-shell32 = ctypes.WinDLL("shell32", use_last_error=True)
-wininet = ctypes.WinDLL("wininet", use_last_error=True)
-comctl32 = ctypes.WinDLL("comctl32", use_last_error=True)
-gdi32 = ctypes.WinDLL("gdi32", use_last_error=True)
+class _LazyFunction:
+    """
+    导出函数的占位：argtypes / restype / errcheck 先记录下来，
+    第一次调用时才加载 DLL、解析导出并应用原型，之后 DLL 属性直接指向真实函数。
+    """
+
+    def __init__(self, dll, name: str):
+        object.__setattr__(self, "_dll", dll)
+        object.__setattr__(self, "_proto", {})
+        object.__setattr__(self, "_fn", None)
+        object.__setattr__(self, "__name__", name)
+
+    def __setattr__(self, attr, value):
+        self._proto[attr] = value
+        if self._fn is not None:
+            setattr(self._fn, attr, value)
+
+    def __getattr__(self, attr):
+        if attr in ("argtypes", "restype", "errcheck"):
+            return self._proto.get(attr)
+        raise AttributeError(attr)
+
+    def _bind(self):
+        if self._fn is None:
+            fn = getattr(self._dll._load(), self.__name__)
+            for attr, value in self._proto.items():
+                setattr(fn, attr, value)
+            object.__setattr__(self, "_fn", fn)
+            # 之后通过 DLL 取到的就是真实函数，调用不再经过占位
+            self._dll.__dict__[self.__name__] = fn
+        return self._fn
+
+    def __call__(self, *args):
+        return self._bind()(*args)
+
+
+class _LazyDLL:
+    """
+    按名称延迟加载的 DLL：导入本模块时不加载任何 DLL，第一次调用其中的函数时才 LoadLibrary。
+    未加载时 dll.Name 总是返回占位（缺少的导出到调用时才报错），
+    探测可选 API 须使用 get_export() / has_export()，不能用 getattr(dll, name, None)。
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._dll = None
+
+    def _load(self):
+        if self._dll is None:
+            if not IS_WINDOWS:
+                raise OSError(f"{self._name} is not available on this platform")
+            self._dll = ctypes.WinDLL(self._name, use_last_error=True)
+        return self._dll
+
+    @property
+    def loaded(self) -> bool:
+        return self._dll is not None
+
+    def __getattr__(self, attr):
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        if self._dll is not None:
+            # 已加载：直接解析，缺少的导出照常抛 AttributeError（getattr(dll, name, None) 可用于探测）
+            fn = getattr(self._dll, attr)
+        else:
+            fn = _LazyFunction(self, attr)
+        self.__dict__[attr] = fn
+        return fn
+
+    def get_export(self, name: str):
+        """加载 DLL 并返回真实的导出函数（已记录的原型照常应用）；DLL 或导出不存在时返回 None。"""
+        try:
+            dll = self._load()
+        except OSError:
+            return None
+        fn = self.__dict__.get(name)
+        if isinstance(fn, _LazyFunction):
+            try:
+                return fn._bind()
+            except AttributeError:
+                return None
+        try:
+            fn = getattr(dll, name)
+        except AttributeError:
+            return None
+        self.__dict__[name] = fn
+        return fn
+
+
+def get_export(dll, name: str):
+    return dll.get_export(name)
+
+
+def has_export(dll, name: str) -> bool:
+    return dll.get_export(name) is not None
+
+
+IS_WINDOWS = hasattr(ctypes, "WinDLL")
+
+# 非 Windows 环境也可导入（模拟/测试），真正调用时抛出 OSError
+user32 = _LazyDLL("user32")
+kernel32 = _LazyDLL("kernel32")
+shell32 = _LazyDLL("shell32")
+wininet = _LazyDLL("wininet")
+comctl32 = _LazyDLL("comctl32")
+gdi32 = _LazyDLL("gdi32")
+wtsapi32 = _LazyDLL("wtsapi32")
+_FUNCTYPE = ctypes.WINFUNCTYPE if IS_WINDOWS else ctypes.CFUNCTYPE
 
 # -----------------------------
 # WinAPI prototypes (critical for 64-bit safety)
 # -----------------------------
 # Window proc
-WNDPROC = ctypes.WINFUNCTYPE(LRESULT_T, HWND_T, wintypes.UINT, WPARAM_T, LPARAM_T)
+WNDPROC = _FUNCTYPE(LRESULT_T, HWND_T, wintypes.UINT, WPARAM_T, LPARAM_T)
 
 # DefWindowProc
 user32.DefWindowProcW.argtypes = [HWND_T, wintypes.UINT, WPARAM_T, LPARAM_T]
@@ -122,7 +224,7 @@ user32.LoadCursorW.argtypes = [HINSTANCE_T, HANDLE_T]
 user32.LoadCursorW.restype = HCURSOR_T
 
 # EnumChildWindows
-EnumProc = ctypes.WINFUNCTYPE(wintypes.BOOL, HWND_T, LPARAM_T)
+EnumProc = _FUNCTYPE(wintypes.BOOL, HWND_T, LPARAM_T)
 user32.EnumChildWindows.argtypes = [HWND_T, EnumProc, LPARAM_T]
 user32.EnumChildWindows.restype = wintypes.BOOL
 
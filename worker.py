@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+import queue
+import threading
+
+from core import log_error
+
+# -----------------------------
+# Background worker
+# -----------------------------
+class BackgroundWorker:
+    """
+    在后台线程执行阻塞任务（联网检测、消息发送等）。
+    任务完成后结果进入队列，并调用 notify（通常为 PostMessageW）唤醒 UI 线程，
+    由 UI 线程调用 drain() 执行回调，保证回调与窗口过程在同一线程。
+    """
+
+    def __init__(self, notify, max_workers: int = 2, low_priority_init=None):
+        self._notify = notify
+        self._results = queue.SimpleQueue()
+        self.max_workers = max_workers
+        # 线程池在第一次提交任务时创建（启动时不导入 concurrent.futures）
+        self._pool = None
+        # 低优先级任务（启动后的非关键工作）单独一个线程，线程启动时调用 low_priority_init 降低优先级
+        self._low_pool = None
+        self._low_priority_init = low_priority_init
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def _init_low_priority(self):
+        if self._low_priority_init is None:
+            return
+        try:
+            self._low_priority_init()
+        except Exception as e:
+            log_error(e)
+
+    def _executor(self, low_priority: bool):
+        from concurrent.futures import ThreadPoolExecutor
+        with self._lock:
+            if low_priority:
+                if self._low_pool is None:
+                    self._low_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AutoShutdownIdle",
+                                                        initializer=self._init_low_priority)
+                return self._low_pool
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="AutoShutdownWorker")
+            return self._pool
+
+    def busy(self, key) -> bool:
+        with self._lock:
+            return key in self._pending
+
+    def submit(self, fn, callback=None, key=None, low_priority: bool = False) -> bool:
+        """提交任务；同一 key 的任务未完成时不重复提交，返回 False。low_priority 的任务在低优先级线程中依次执行。"""
+        with self._lock:
+            if key is not None:
+                if key in self._pending:
+                    return False
+                self._pending.add(key)
+
+        def _run():
+            try:
+                result = fn()
+            except Exception as e:
+                log_error(e)
+                result = None
+            self._results.put((key, callback, result))
+            try:
+                self._notify()
+            except Exception as e:
+                log_error(e)
+
+        try:
+            self._executor(low_priority).submit(_run)
+        except Exception as e:
+            log_error(e)
+            with self._lock:
+                self._pending.discard(key)
+            return False
+        return True
+
+    def drain(self):
+        """在 UI 线程调用：依次执行已完成任务的回调。"""
+        while True:
+            try:
+                key, callback, result = self._results.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                self._pending.discard(key)
+            if callback is None:
+                continue
+            try:
+                callback(result)
+            except Exception as e:
+                log_error(e)
+
+    def shutdown(self):
+        with self._lock:
+            pools = [p for p in (self._pool, self._low_pool) if p is not None]
+            self._pool = self._low_pool = None
+        for pool in pools:
+            try:
+                pool.shutdown(wait=False, cancel_futures=True)
+            except Exception:
+                pass
+
+
+class InlineWorker:
+    """同步执行任务并立即回调，用于无消息循环的环境（测试、模拟）。"""
+
+    def busy(self, key) -> bool:
+        return False
+
+    def submit(self, fn, callback=None, key=None, low_priority: bool = False) -> bool:
+        try:
+            result = fn()
+        except Exception as e:
+            log_error(e)
+            result = None
+        if callback is not None:
+            try:
+                callback(result)
+            except Exception as e:
+                log_error(e)
+        return True
+
+    def drain(self):
+        pass
+
+    def shutdown(self):
+        pass